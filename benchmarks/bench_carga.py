@@ -0,0 +1,179 @@
+"""
+Prueba de carga de extremo a extremo: un worker de la API contra un PostgREST local.
+
+Levanta `benchmarks.stub_postgrest` (con latencia inyectada por petición) y la API
+(`src/api/main.py` bajo uvicorn, un solo worker) apuntando a él como si fuera
+Supabase. Luego `--concurrencia` clientes envían tráfico mixto durante
+`--duracion` segundos:
+
+    crear    -> POST   /experiments/calculate/mru
+    listar   -> GET    /experiments?limit=50
+    detalle  -> GET    /experiments/{id}
+    borrar   -> DELETE /experiments/{id}
+
+y se reporta el rendimiento (peticiones por segundo) y la latencia p50/p95/p99
+de cada ruta. Detalle y borrado eligen entre los IDs creados durante la prueba.
+
+Uso:
+    uv run python -m benchmarks.bench_carga --concurrencia 32 --duracion 15 --latencia-ms 5
+    uv run python -m benchmarks.bench_carga --mezcla crear=1 --latencia-ms 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+MEZCLA = {"crear": 4, "listar": 3, "detalle": 2, "borrar": 1}
+
+ETIQUETAS = {
+    "crear": "POST /experiments/calculate/mru",
+    "listar": "GET /experiments",
+    "detalle": "GET /experiments/{id}",
+    "borrar": "DELETE /experiments/{id}",
+}
+
+
+def _mezcla(texto: str) -> dict[str, float]:
+    pesos = {}
+    for parte in texto.split(","):
+        ruta, peso = parte.split("=")
+        if ruta not in MEZCLA:
+            raise argparse.ArgumentTypeError(f"Ruta desconocida: {ruta} (opciones: {', '.join(MEZCLA)})")
+        pesos[ruta] = float(peso)
+    return pesos
+
+
+def _lanzar(modulo: list[str], entorno: dict | None = None) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", *modulo], env={**os.environ, **(entorno or {})})
+
+
+async def _esperar(url: str, timeout: float = 20.0) -> None:
+    limite = time.monotonic() + timeout
+    async with httpx.AsyncClient() as cliente:
+        while True:
+            try:
+                if (await cliente.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > limite:
+                raise RuntimeError(f"{url} no respondió en {timeout:.0f} s")
+            await asyncio.sleep(0.1)
+
+
+class Carga:
+    """Clientes concurrentes con una mezcla de rutas; acumula latencias por ruta."""
+
+    def __init__(self, api: str, mezcla: dict[str, float], semilla: int = 0) -> None:
+        self.api = api
+        self.rutas, self.pesos = list(mezcla), list(mezcla.values())
+        self.rng = random.Random(semilla)
+        self.ids: list[int] = []
+        self.latencias: dict[str, list[float]] = defaultdict(list)
+        self.errores: dict[str, int] = defaultdict(int)
+
+    async def _peticion(self, cliente: httpx.AsyncClient, ruta: str) -> None:
+        if ruta in ("detalle", "borrar") and not self.ids:
+            ruta = "crear"  # Todavía no hay nada que leer o borrar
+        inicio = time.perf_counter()
+        if ruta == "crear":
+            respuesta = await cliente.post(
+                "/experiments/calculate/mru",
+                params={"nombre": f"Carga {self.rng.randrange(10**6)}"},
+                json={"velocidad": self.rng.uniform(1, 50), "tiempo": self.rng.uniform(1, 20)},
+            )
+            if respuesta.status_code == 200 and "id" in respuesta.json():
+                self.ids.append(respuesta.json()["id"])
+        elif ruta == "listar":
+            respuesta = await cliente.get("/experiments", params={"limit": 50})
+        elif ruta == "detalle":
+            respuesta = await cliente.get(f"/experiments/{self.rng.choice(self.ids)}")
+        else:
+            exp_id = self.ids.pop(self.rng.randrange(len(self.ids)))
+            respuesta = await cliente.delete(f"/experiments/{exp_id}")
+        self.latencias[ruta].append(time.perf_counter() - inicio)
+        # Un 404 de detalle es una carrera legítima con un borrado concurrente
+        if respuesta.status_code >= 400 and not (ruta == "detalle" and respuesta.status_code == 404):
+            self.errores[ruta] += 1
+
+    async def _cliente(self, cliente: httpx.AsyncClient, fin: float) -> None:
+        while time.monotonic() < fin:
+            await self._peticion(cliente, self.rng.choices(self.rutas, self.pesos)[0])
+
+    async def correr(self, concurrencia: int, duracion: float, calentamiento: float = 1.0) -> float:
+        limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+        async with httpx.AsyncClient(base_url=self.api, limits=limites, timeout=30.0) as cliente:
+            if calentamiento > 0:
+                await asyncio.gather(*(self._cliente(cliente, time.monotonic() + calentamiento) for _ in range(concurrencia)))
+                self.latencias.clear()
+                self.errores.clear()
+            inicio = time.monotonic()
+            await asyncio.gather(*(self._cliente(cliente, inicio + duracion) for _ in range(concurrencia)))
+            return time.monotonic() - inicio
+
+
+def reporte(latencias: dict[str, list[float]], errores: dict[str, int], segundos: float) -> str:
+    lineas = [f"{'Ruta':<34}{'n':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}"]
+    total = 0
+    for ruta, etiqueta in ETIQUETAS.items():
+        muestras = latencias.get(ruta)
+        if not muestras:
+            continue
+        total += len(muestras)
+        p50, p95, p99 = np.percentile(np.array(muestras) * 1000, [50, 95, 99])
+        lineas.append(
+            f"{etiqueta:<34}{len(muestras):>7}{len(muestras) / segundos:>9.1f}"
+            f"{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}{errores.get(ruta, 0):>9}"
+        )
+    lineas.append(f"{'Total':<34}{total:>7}{total / segundos:>9.1f}")
+    return "\n".join(lineas)
+
+
+async def _principal(args: argparse.Namespace) -> None:
+    stub = _lanzar(["benchmarks.stub_postgrest", "--puerto", str(args.puerto_stub), "--latencia-ms", str(args.latencia_ms)])
+    api = _lanzar(
+        ["uvicorn", "src.api.main:app", "--port", str(args.puerto_api), "--log-level", "warning", "--no-access-log"],
+        {
+            "STORAGE_BACKEND": "supabase",
+            "SUPABASE_URL": f"http://127.0.0.1:{args.puerto_stub}",
+            "SUPABASE_KEY": "stub.stub.stub",
+        },
+    )
+    try:
+        await _esperar(f"http://127.0.0.1:{args.puerto_stub}/")
+        await _esperar(f"http://127.0.0.1:{args.puerto_api}/")
+        carga = Carga(f"http://127.0.0.1:{args.puerto_api}", args.mezcla, args.semilla)
+        segundos = await carga.correr(args.concurrencia, args.duracion)
+        print(
+            f"{args.concurrencia} clientes durante {segundos:.1f} s, "
+            f"latencia inyectada {args.latencia_ms:.1f} ms por viaje a la base\n"
+        )
+        print(reporte(carga.latencias, carga.errores, segundos))
+    finally:
+        for proceso in (api, stub):
+            proceso.terminate()
+            proceso.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrencia", type=int, default=32, help="Clientes simultáneos")
+    parser.add_argument("--duracion", type=float, default=10.0, help="Segundos de medición (tras 1 s de calentamiento)")
+    parser.add_argument("--latencia-ms", type=float, default=5.0, help="Latencia inyectada por viaje a la base (ms)")
+    parser.add_argument("--mezcla", type=_mezcla, default=MEZCLA, help="Pesos por ruta, p. ej. crear=4,listar=3,detalle=2,borrar=1")
+    parser.add_argument("--puerto-api", type=int, default=8100)
+    parser.add_argument("--puerto-stub", type=int, default=54399)
+    parser.add_argument("--semilla", type=int, default=0)
+    asyncio.run(_principal(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Compara la latencia de creación de experimentos: dos inserciones vs. una RPC.
+
+Usa el cliente Supabase en memoria con una latencia simulada por viaje, de modo
+que la diferencia medida refleja el número de viajes a la base de datos.
+
+Uso:
+    uv run python -m benchmarks.bench_creacion --latencia-ms 20 --repeticiones 50
+"""
+
+import argparse
+import functools
+import statistics
+import time
+
+from src.schemas.experiment import ExperimentCreate
+from src.storage.experiment_repository import TABLAS_DETALLE, ExperimentRepository
+from src.storage.fake_client import FakeSupabaseClient
+
+FISICA_MRU = {"distancia": 50.0, "velocidad": 10.0, "tiempo": 5.0}
+
+
+def crear_con_dos_inserciones(cliente, exp: ExperimentCreate, physics_data: dict) -> dict:
+    """Camino anterior a la RPC (línea base): maestro y detalle en dos viajes, sin transacción."""
+    nuevo_id = cliente.table("experimentos").insert({"nombre": exp.nombre, "tipo": exp.tipo}).execute().data[0]["id"]
+    detalle = cliente.table(TABLAS_DETALLE[exp.tipo]).insert({**physics_data, "experimento_id": nuevo_id}).execute()
+    return {"id": nuevo_id, "nombre": exp.nombre, "detalle": detalle.data[0]}
+
+
+def medir(crear, repeticiones: int) -> list[float]:
+    tiempos = []
+    for i in range(repeticiones):
+        exp = ExperimentCreate(nombre=f"Bench {i}", tipo="MRU")
+        inicio = time.perf_counter()
+        crear(exp, dict(FISICA_MRU))
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latencia-ms", type=float, default=20.0, help="Latencia simulada por viaje (ms)")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"Latencia simulada por viaje: {args.latencia_ms:.1f} ms, {args.repeticiones} creaciones por camino\n")
+    print(f"{'Camino':<32}{'viajes/op':>10}{'p50 (ms)':>10}{'media (ms)':>12}")
+    for etiqueta, camino in [
+        ("Dos inserciones", lambda cliente: functools.partial(crear_con_dos_inserciones, cliente)),
+        ("RPC transaccional", lambda cliente: ExperimentRepository(cliente).create_experiment_with_detail),
+    ]:
+        cliente = FakeSupabaseClient(latencia=args.latencia_ms / 1000)
+        tiempos = medir(camino(cliente), args.repeticiones)
+        print(
+            f"{etiqueta:<32}{cliente.viajes / args.repeticiones:>10.1f}"
+            f"{statistics.median(tiempos):>10.2f}{statistics.fmean(tiempos):>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
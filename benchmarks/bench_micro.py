@@ -0,0 +1,279 @@
+"""
+Micro-benchmarks de los caminos calientes: solucionadores, esquemas y serialización.
+
+Cada caso se mide con varios tamaños de entrada (filas por llamada) y se
+reporta en microsegundos por fila, de modo que el camino escalar (una llamada
+por ensayo) y el de lote (una llamada por lote) se comparan directamente. El
+almacenamiento es el cliente Supabase en memoria, sin latencia: lo medido es
+el costo del servicio, no el de la red.
+
+Los tiempos se normalizan contra una carga de referencia fija, medida en
+rondas intercaladas con cada caso: la comparación contra la línea base usa esa
+razón, que cambia mucho menos que el tiempo absoluto entre máquinas o cuando
+el equipo está cargado.
+
+Uso:
+    uv run python -m benchmarks.bench_micro                      # medir e imprimir
+    uv run python -m benchmarks.bench_micro --guardar            # actualizar la línea base
+    uv run python -m benchmarks.bench_micro --comparar           # falla si algo empeoró > umbral
+    uv run python -m benchmarks.bench_micro --filtro mru --tamanos 10 1000
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from src.api.columnar import respuesta_columnar
+from src.schemas.experiment import ExperimentSummary
+from src.schemas.mru import MRULoteSchema, MRUSchema
+from src.schemas.mrua import MRUALoteSchema, MRUASchema
+from src.services.cache import LRUTTLCache
+from src.services.kinematics import muestrear_trayectoria
+from src.services.physics_service import PhysicsService
+from src.services.stats import EstadisticasExperimentos
+from src.storage.experiment_repository import ExperimentRepository
+from src.storage.fake_client import FakeSupabaseClient
+
+LINEA_BASE = Path(__file__).with_name("baseline_micro.json")
+TAMANOS = (10, 100, 1000)
+UMBRAL = 0.25
+RONDAS = 15
+SEGUNDOS_POR_RONDA = 0.01
+
+# Un caso recibe el tamaño y devuelve la función a medir, con las entradas ya armadas
+Caso = Callable[[int], Callable[[], object]]
+
+
+def nuevo_servicio() -> PhysicsService:
+    return PhysicsService(
+        ExperimentRepository(FakeSupabaseClient()),
+        cache=LRUTTLCache(max_entradas=16, ttl=60),
+        estadisticas=EstadisticasExperimentos(),
+    )
+
+
+def filas_mru(n: int) -> list[dict]:
+    # Una incógnita distinta por fila para recorrer los tres despejes
+    rng = np.random.default_rng(0)
+    d, v, t = rng.uniform(1, 100, (3, n)).tolist()
+    return [
+        {"distancia": None if i % 3 == 0 else d[i], "velocidad": None if i % 3 == 1 else v[i], "tiempo": None if i % 3 == 2 else t[i]}
+        for i in range(n)
+    ]
+
+
+def filas_mrua(n: int) -> list[dict]:
+    rng = np.random.default_rng(0)
+    x0, vi, a, t = rng.uniform(1, 10, (4, n)).tolist()
+    return [{"posicion_inicial": x0[i], "velocidad_inicial": vi[i], "aceleracion": a[i], "tiempo": t[i]} for i in range(n)]
+
+
+def columnas(filas: list[dict], nombres: tuple[str, ...]) -> dict[str, list]:
+    return {nombre: [fila.get(nombre) for fila in filas] for nombre in nombres}
+
+
+COLUMNAS_MRU = ("distancia", "velocidad", "tiempo")
+COLUMNAS_MRUA = ("posicion_inicial", "posicion_final", "aceleracion", "tiempo", "velocidad_inicial", "velocidad_final")
+
+
+def mru_escalar(n: int):
+    service, filas = nuevo_servicio(), filas_mru(n)
+    return lambda: [service.resolver_y_guardar_mru("Bench", MRUSchema(**fila)) for fila in filas]
+
+
+def mru_lote(n: int):
+    service, lote = nuevo_servicio(), MRULoteSchema(**columnas(filas_mru(n), COLUMNAS_MRU))
+    return lambda: service.resolver_y_guardar_mru_lote("Bench", lote)
+
+
+def mrua_escalar(n: int):
+    service, filas = nuevo_servicio(), filas_mrua(n)
+    return lambda: [service.resolver_y_guardar_mrua("Bench", MRUASchema(**fila)) for fila in filas]
+
+
+def mrua_lote(n: int):
+    service, lote = nuevo_servicio(), MRUALoteSchema(**columnas(filas_mrua(n), COLUMNAS_MRUA))
+    return lambda: service.resolver_y_guardar_mrua_lote("Bench", lote)
+
+
+def esquema_mru(n: int):
+    filas = filas_mru(n)
+    return lambda: [MRUSchema(**fila) for fila in filas]
+
+
+def esquema_mru_lote(n: int):
+    datos = columnas(filas_mru(n), COLUMNAS_MRU)
+    return lambda: MRULoteSchema(**datos)
+
+
+def esquema_mrua(n: int):
+    filas = filas_mrua(n)
+    return lambda: [MRUASchema(**fila) for fila in filas]
+
+
+def esquema_mrua_lote(n: int):
+    datos = columnas(filas_mrua(n), COLUMNAS_MRUA)
+    return lambda: MRUALoteSchema(**datos)
+
+
+def serializar_lote(n: int):
+    respuesta = nuevo_servicio().resolver_y_guardar_mru_lote("Bench", MRULoteSchema(**columnas(filas_mru(n), COLUMNAS_MRU)))
+    return lambda: JSONResponse(respuesta).body
+
+
+def serializar_listado(n: int):
+    # Mismo camino que `response_model=List[ExperimentSummary]` en GET /experiments
+    adaptador = TypeAdapter(list[ExperimentSummary])
+    filas = [{"id": i, "nombre": f"Ensayo {i}", "tipo": "MRU", "fecha_creacion": "2026-10-17T10:00:00.000+00:00"} for i in range(n)]
+    return lambda: adaptador.dump_json(adaptador.validate_python(filas), exclude_unset=True)
+
+
+def serializar_trayectoria(formato: str) -> Caso:
+    def caso(n: int):
+        curvas = muestrear_trayectoria("MRUA", {"velocidad_inicial": 1.0, "aceleracion": 2.0, "tiempo": 5.0}, puntos=max(n, 2))
+        return lambda: respuesta_columnar(curvas, formato).body
+    return caso
+
+
+CASOS: dict[str, Caso] = {
+    "mru/escalar": mru_escalar,
+    "mru/lote": mru_lote,
+    "mrua/escalar": mrua_escalar,
+    "mrua/lote": mrua_lote,
+    "esquema/mru": esquema_mru,
+    "esquema/mru_lote": esquema_mru_lote,
+    "esquema/mrua": esquema_mrua,
+    "esquema/mrua_lote": esquema_mrua_lote,
+    "serializacion/lote_json": serializar_lote,
+    "serializacion/listado": serializar_listado,
+    "serializacion/trayectoria_json": serializar_trayectoria("json"),
+    "serializacion/trayectoria_npy": serializar_trayectoria("npy"),
+}
+
+
+def _referencia() -> float:
+    # Carga fija (Python puro + NumPy) contra la que se normalizan los casos
+    total = sum(i * i for i in range(20_000))
+    return total + float(np.sqrt(np.arange(20_000.0)).sum())
+
+
+def _llamadas_por_ronda(funcion: Callable[[], object]) -> int:
+    inicio, llamadas = time.perf_counter(), 0
+    while time.perf_counter() - inicio < SEGUNDOS_POR_RONDA:
+        funcion()
+        llamadas += 1
+    return llamadas
+
+
+def _ronda(funcion: Callable[[], object], numero: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(numero):
+        funcion()
+    return (time.perf_counter() - inicio) / numero
+
+
+def medir(funcion: Callable[[], object], rondas: int = RONDAS) -> tuple[float, float]:
+    """Segundos por llamada de `funcion` y de la referencia, en rondas cortas intercaladas.
+
+    De cada una se toma el mínimo entre rondas: el ruido del equipo solo suma
+    tiempo, y al intercalarlas ambas ven las mismas ventanas de CPU libre. Como
+    `timeit`, el recolector de ciclos queda apagado mientras se mide (la base en
+    memoria crece con cada llamada y sus pasadas dependerían de lo insertado).
+    """
+    funcion()  # Calentamiento: cachés de pydantic, imports perezosos
+    numero, numero_ref = _llamadas_por_ronda(funcion), _llamadas_por_ronda(_referencia)
+    gc.collect()
+    gc.disable()
+    try:
+        tiempos, referencias = [], []
+        for _ in range(rondas):
+            tiempos.append(_ronda(funcion, numero))
+            referencias.append(_ronda(_referencia, numero_ref))
+    finally:
+        gc.enable()
+    return min(tiempos), min(referencias)
+
+
+def ejecutar(tamanos=TAMANOS, filtro: str = "", rondas: int = RONDAS) -> dict:
+    """Mide los casos que contienen `filtro`; µs por fila, absolutos y relativos a la referencia."""
+    resultados, referencias = {}, []
+    for nombre, caso in CASOS.items():
+        if filtro not in nombre:
+            continue
+        for n in tamanos:
+            segundos, referencia = medir(caso(n), rondas)
+            referencias.append(referencia)
+            resultados[f"{nombre}[{n}]"] = {"us_fila": segundos / n * 1e6, "relativo": segundos / n / referencia}
+    return {"referencia_us": min(referencias, default=0.0) * 1e6, "casos": resultados}
+
+
+def remedir(claves: list[str], rondas: int = RONDAS) -> dict:
+    """Vuelve a medir casos puntuales (`"mru/lote[100]"`) para confirmar una regresión."""
+    casos = {}
+    for clave in claves:
+        nombre, n = clave.rstrip("]").split("[")
+        segundos, referencia = medir(CASOS[nombre](int(n)), rondas)
+        casos[clave] = {"us_fila": segundos / int(n) * 1e6, "relativo": segundos / int(n) / referencia}
+    return {"casos": casos}
+
+
+def comparar(actual: dict, base: dict, umbral: float = UMBRAL) -> list[tuple[str, float]]:
+    """Casos cuyo tiempo relativo empeoró más que `umbral` respecto de la línea base, con su razón."""
+    regresiones = []
+    for clave, medida in actual["casos"].items():
+        previa = base["casos"].get(clave)
+        if previa is None:
+            continue
+        razon = medida["relativo"] / previa["relativo"]
+        if razon > 1 + umbral:
+            regresiones.append((clave, razon))
+    return regresiones
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=list(TAMANOS), help="Filas por llamada")
+    parser.add_argument("--filtro", default="", help="Solo los casos cuyo nombre contiene este texto")
+    parser.add_argument("--rondas", type=int, default=RONDAS, help="Rondas intercaladas por caso")
+    parser.add_argument("--umbral", type=float, default=UMBRAL, help="Empeoramiento tolerado (0.25 = 25 %%)")
+    parser.add_argument("--guardar", action="store_true", help=f"Guarda los resultados en {LINEA_BASE.name}")
+    parser.add_argument("--comparar", action="store_true", help="Compara contra la línea base y falla si hay regresiones")
+    args = parser.parse_args()
+
+    actual = ejecutar(args.tamanos, args.filtro, args.rondas)
+    base = json.loads(LINEA_BASE.read_text()) if LINEA_BASE.exists() else {"casos": {}}
+
+    print(f"Referencia: {actual['referencia_us']:.0f} µs\n")
+    print(f"{'Caso':<40}{'µs/fila':>12}{'base':>12}{'Δ':>9}")
+    for clave, medida in actual["casos"].items():
+        previa = base["casos"].get(clave)
+        delta = f"{medida['relativo'] / previa['relativo'] - 1:+.0%}" if previa else "-"
+        base_us = f"{previa['us_fila']:.2f}" if previa else "-"
+        print(f"{clave:<40}{medida['us_fila']:>12.2f}{base_us:>12}{delta:>9}")
+
+    if args.guardar:
+        base["referencia_us"] = actual["referencia_us"]
+        base["casos"].update(actual["casos"])
+        LINEA_BASE.write_text(json.dumps(base, indent=2, sort_keys=True) + "\n")
+        print(f"\nLínea base actualizada: {LINEA_BASE}")
+    if args.comparar:
+        # Una sola medición lenta puede ser ruido: solo cuenta si se repite al volver a medir
+        sospechosas = [clave for clave, _ in comparar(actual, base, args.umbral)]
+        regresiones = comparar(remedir(sospechosas, args.rondas), base, args.umbral) if sospechosas else []
+        for clave, razon in regresiones:
+            print(f"REGRESIÓN {clave}: {razon:.2f}x la línea base")
+        if regresiones:
+            sys.exit(1)
+        print(f"\nSin regresiones mayores a {args.umbral:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
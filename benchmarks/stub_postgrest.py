@@ -0,0 +1,127 @@
+"""
+Servidor HTTP que imita a PostgREST (la API REST de Supabase) sobre la base en memoria.
+
+Atiende el subconjunto de la API que usan los repositorios: `GET`/`POST`/`DELETE`
+sobre `/rest/v1/{tabla}` con `select` (incluidos recursos embebidos), filtros
+`col=op.valor`, `in.(...)`, `or=(...)`, `order` y `limit`, la cabecera
+`Prefer: return=minimal|representation` y las funciones de `/rest/v1/rpc/{fn}`.
+Las consultas se resuelven con `ConsultaFalsa`, así que la semántica es la misma
+que la del cliente falso de las pruebas.
+
+Cada petición espera `latencia` segundos antes de responder (sin bloquear a las
+demás), como el viaje de red hasta una base remota.
+
+Uso:
+    uv run python -m benchmarks.stub_postgrest --puerto 54399 --latencia-ms 5
+"""
+
+import argparse
+import asyncio
+import json
+
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from src.storage.fake_client import (
+    OPERADORES,
+    FakeSupabaseClient,
+    _comparar,
+    filtro_postgrest,
+)
+
+# Parámetros de la URL que no son filtros
+MODIFICADORES = {"select", "order", "limit", "offset", "columns", "on_conflict"}
+
+
+def _filtro(columna: str, expresion: str):
+    op, valor = expresion.split(".", 1)
+    if op == "in":
+        valores = {v.strip('"') for v in valor.strip("()").split(",")}
+        return lambda fila: fila.get(columna) is not None and str(fila.get(columna)) in valores
+    if op not in OPERADORES:
+        raise ValueError(f"Operador no soportado por el stub: {op}")
+    valor = valor[1:-1] if len(valor) >= 2 and valor[0] == valor[-1] == '"' else valor
+    return lambda fila: _comparar(fila.get(columna), op, valor)
+
+
+def _aplicar_parametros(consulta, request: Request):
+    for clave, valor in request.query_params.multi_items():
+        if clave == "select" and consulta._operacion == "select":
+            consulta.select(valor)
+        elif clave == "order":
+            for termino in valor.split(","):
+                columna, *modos = termino.split(".")
+                consulta.order(columna, desc="desc" in modos)
+        elif clave == "limit":
+            consulta.limit(int(valor))
+        elif clave in ("or", "and"):
+            consulta._filtros.append(filtro_postgrest(f"{clave}{valor}"))
+        elif clave not in MODIFICADORES:
+            consulta._filtros.append(_filtro(clave, valor))
+    return consulta
+
+
+def crear_app(latencia: float = 0.0) -> Starlette:
+    cliente = FakeSupabaseClient()
+
+    async def tabla(request: Request) -> Response:
+        await asyncio.sleep(latencia)
+        consulta = cliente.table(request.path_params["tabla"])
+        representacion = "return=minimal" not in request.headers.get("prefer", "")
+        if request.method == "POST":
+            consulta.insert(
+                json.loads(await request.body()),
+                returning=ReturnMethod.representation if representacion else ReturnMethod.minimal,
+            )
+        elif request.method == "DELETE":
+            consulta.delete()
+        try:
+            respuesta = _aplicar_parametros(consulta, request)._resolver()
+        except APIError as e:
+            return JSONResponse({"message": e.message, "code": e.code}, status_code=400)
+        except (KeyError, ValueError, RuntimeError) as e:
+            return JSONResponse({"message": str(e)}, status_code=400)
+        cliente._registrar_viaje()
+        if request.method == "POST" and not representacion:
+            return Response(status_code=201)
+        return JSONResponse(respuesta.data, status_code=201 if request.method == "POST" else 200)
+
+    async def rpc(request: Request) -> Response:
+        await asyncio.sleep(latencia)
+        cuerpo = await request.body()
+        consulta = cliente.rpc(request.path_params["funcion"], json.loads(cuerpo) if cuerpo else {})
+        try:
+            respuesta = consulta._resolver()
+        except APIError as e:
+            return JSONResponse({"message": e.message, "code": e.code}, status_code=400)
+        except (KeyError, ValueError, RuntimeError) as e:
+            return JSONResponse({"message": str(e)}, status_code=400)
+        cliente._registrar_viaje()
+        return JSONResponse(respuesta.data)
+
+    async def estado(request: Request) -> Response:
+        return JSONResponse({"viajes": cliente.viajes, "filas": {t: len(f) for t, f in cliente.db.tablas.items()}})
+
+    return Starlette(routes=[
+        Route("/", estado),
+        Route("/rest/v1/rpc/{funcion}", rpc, methods=["POST"]),
+        Route("/rest/v1/{tabla}", tabla, methods=["GET", "POST", "DELETE"]),
+    ])
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--puerto", type=int, default=54399)
+    parser.add_argument("--latencia-ms", type=float, default=5.0, help="Latencia inyectada por petición (ms)")
+    args = parser.parse_args()
+    uvicorn.run(crear_app(args.latencia_ms / 1000), host="127.0.0.1", port=args.puerto, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Respuestas columnares: varias columnas numéricas del mismo largo.
+
+    json  -> {"t": [...], "x": [...]}                  (siempre disponible)
+    npy   -> un arreglo float64 de forma (columnas, n) en formato `.npy`;
+             los nombres van en la cabecera `X-Columns` (separados por coma)
+    arrow -> stream IPC de Apache Arrow (requiere `pyarrow`)
+
+En `.npy` cada columna ocupa un bloque contiguo, así que el cliente la obtiene
+con `np.load(...)[i]` sin copiar ni parsear texto.
+"""
+
+import io
+from typing import Literal
+
+import numpy as np
+from fastapi import HTTPException, Response
+from fastapi.responses import JSONResponse
+
+FormatoColumnar = Literal["json", "npy", "arrow"]
+
+MEDIA_NPY = "application/x-npy"
+MEDIA_ARROW = "application/vnd.apache.arrow.stream"
+
+
+def codificar_npy(columnas: dict[str, np.ndarray]) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, np.stack([np.asarray(c, dtype=np.float64) for c in columnas.values()]), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def codificar_arrow(columnas: dict[str, np.ndarray]) -> bytes:
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise HTTPException(status_code=406, detail="Formato 'arrow' no disponible: instala pyarrow o usa 'npy'/'json'.")
+    tabla = pa.table({nombre: np.asarray(columna) for nombre, columna in columnas.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabla.schema) as writer:
+        writer.write_table(tabla)
+    return sink.getvalue().to_pybytes()
+
+
+def respuesta_columnar(columnas: dict[str, np.ndarray], formato: FormatoColumnar = "json", headers: dict | None = None) -> Response:
+    cabeceras = {"X-Columns": ",".join(columnas), **(headers or {})}
+    if formato == "npy":
+        return Response(codificar_npy(columnas), media_type=MEDIA_NPY, headers=cabeceras)
+    if formato == "arrow":
+        return Response(codificar_arrow(columnas), media_type=MEDIA_ARROW, headers=cabeceras)
+    return JSONResponse({nombre: np.asarray(columna).tolist() for nombre, columna in columnas.items()}, headers=cabeceras)
@@ -1,6 +1,13 @@
 # Importaremos tu servicio de física cuando lo creemos
-from src.services.physics_service import PhysicsService
+from src.services.physics_service import AsyncPhysicsService, PhysicsService
+from src.services.write_behind import get_cola_escritura
+from src.storage.factory import crear_repositorio_async
+
 
 def get_physics_service() -> PhysicsService:
     """Provee la lógica de negocio de PhysiLab lista para usar."""
-    return PhysicsService()
\ No newline at end of file
+    return PhysicsService()
+
+async def get_async_physics_service() -> AsyncPhysicsService:
+    """Provee el servicio asíncrono sobre el backend de almacenamiento configurado."""
+    return AsyncPhysicsService(await crear_repositorio_async(), write_behind=get_cola_escritura())
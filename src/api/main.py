@@ -1,12 +1,43 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.middleware.cors import CORSMiddleware
-from src.api.routers import experiments
+from fastapi.responses import PlainTextResponse
+
+from src.api.metrics import MetricasMiddleware
+from src.api.routers import experiments, live, simulation
 from src.core.config import settings
+from src.core.exceptions import StorageError
+from src.core.metrics import metricas
+from src.services.uncertainty import cerrar_pool_montecarlo
+from src.services.write_behind import abrir_cola_escritura, cerrar_cola_escritura
+from src.storage.factory import (
+    abrir_almacenamiento,
+    cerrar_almacenamiento,
+    crear_repositorio,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # La configuración se lee aquí y no al importar el módulo: un worker nuevo
+    # (o un test) importa la API sin tocar el entorno ni cargar el cliente Supabase
+    app.title, app.version = settings.api_title, settings.api_version
+    # Un solo cliente Supabase (con pool keep-alive) o base SQLite para todo el proceso
+    await abrir_almacenamiento()
+    if settings.write_behind_enabled:
+        # Reencola lo que haya quedado en el respaldo de una ejecución anterior
+        abrir_cola_escritura(crear_repositorio())
+    yield
+    cerrar_cola_escritura()
+    cerrar_pool_montecarlo()
+    await cerrar_almacenamiento()
+
 
 app = FastAPI(
-    title=settings.api_title,
-    version=settings.api_version,
-    description="Backend modular de procesamiento físico y cinemático para PhysiLab"
+    description="Backend modular de procesamiento físico y cinemático para PhysiLab",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -15,10 +46,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Columns", "X-Grid-Axes", "X-Grid-Shape", "X-Fit", "Server-Timing"],
 )
 
+# Se agrega después de CORS, así que lo envuelve y mide también su procesamiento
+app.add_middleware(MetricasMiddleware)
+
+@app.exception_handler(StorageError)
+async def error_de_almacenamiento(request: Request, exc: StorageError):
+    # Falla del backend de datos, no del pedido: misma respuesta en todas las rutas
+    return await http_exception_handler(request, HTTPException(status_code=502, detail=exc.message))
+
 app.include_router(experiments.router, prefix="/experiments", tags=["Experiments CRUD"])
+app.include_router(simulation.router, prefix="/simulate", tags=["Simulation"])
+app.include_router(live.router, prefix="/live", tags=["Live"])
 
 @app.get("/", tags=["Root"])
 def read_root():
-    return {"status": "online", "message": "Bienvenido a la API de PhysiLab"}
\ No newline at end of file
+    return {"status": "online", "message": "Bienvenido a la API de PhysiLab"}
+
+@app.get("/metrics", include_in_schema=False)
+def exponer_metricas():
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(metricas.exponer(), media_type="text/plain; version=0.0.4; charset=utf-8")
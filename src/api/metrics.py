@@ -0,0 +1,68 @@
+"""
+Middleware de métricas por petición (ASGI puro, sin envolver la respuesta).
+
+Mide cada petición HTTP con su plantilla de ruta y su estado, y cuántas
+llamadas al repositorio y viajes a Supabase hizo. Con
+`server_timing_enabled` agrega la cabecera `Server-Timing`, que el panel de
+red del navegador muestra desglosada; como se escribe al iniciar la
+respuesta, en las respuestas en streaming `total` es el tiempo hasta el
+primer byte.
+"""
+
+import time
+
+from starlette.routing import replace_params
+
+from src.core.config import settings
+from src.core.metrics import (
+    DURACION_HTTP,
+    LLAMADAS_POR_PETICION,
+    VIAJES_POR_PETICION,
+    medir_peticion,
+)
+
+
+def _plantilla(scope) -> str:
+    """Plantilla completa de la ruta que atendió la petición (`/experiments/{id}`).
+
+    La ruta que FastAPI deja en el scope puede ser la del router incluido, sin
+    el prefijo; el prefijo se recupera de la URL concreta.
+    """
+    ruta = scope.get("route")
+    if ruta is None or not hasattr(ruta, "param_convertors"):
+        return "desconocida"
+    concreta, _ = replace_params(ruta.path_format, ruta.param_convertors, dict(scope.get("path_params", {})))
+    ruta_url = scope["path"]
+    prefijo = ruta_url[: len(ruta_url) - len(concreta)] if ruta_url.endswith(concreta) else ""
+    return prefijo + ruta.path
+
+
+class MetricasMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        estado = 500  # Si la aplicación falla antes de responder
+
+        with medir_peticion() as medicion:
+            async def enviar(mensaje) -> None:
+                nonlocal estado
+                if mensaje["type"] == "http.response.start":
+                    estado = mensaje["status"]
+                    if settings.server_timing_enabled:
+                        valor = medicion.server_timing(time.perf_counter() - inicio)
+                        mensaje["headers"] = [*mensaje.get("headers", []), (b"server-timing", valor.encode())]
+                await send(mensaje)
+
+            try:
+                await self.app(scope, receive, enviar)
+            finally:
+                plantilla = _plantilla(scope)
+                DURACION_HTTP.observar(time.perf_counter() - inicio, scope["method"], plantilla, str(estado))
+                LLAMADAS_POR_PETICION.observar(len(medicion.llamadas), plantilla)
+                VIAJES_POR_PETICION.observar(medicion.viajes, plantilla)
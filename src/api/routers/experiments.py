@@ -1,55 +1,351 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from src.schemas.experiment import ExperimentResponse
-from src.schemas.mru import MRUSchema
-from src.schemas.mrua import MRUASchema
-from src.services.physics_service import PhysicsService
-from src.api.dependencies import get_physics_service 
+import json
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from src.api.columnar import FormatoColumnar, respuesta_columnar
+from src.api.dependencies import get_async_physics_service
+from src.core.exceptions import ValidationError
+from src.core.modelos import MODELOS
+from src.schemas.experiment import ExperimentSummary
+from src.schemas.mru import MRULoteSchema, MRUSchema
+from src.schemas.mrua import MRUALoteSchema, MRUASchema
+from src.schemas.uncertainty import IncertidumbreSchema
+from src.services.export import MEDIA_EXPORTACION, FormatoExportacion
+from src.services.fitting import FormatoSerie
+from src.services.kinematics import MAX_PUNTOS, PUNTOS_POR_DEFECTO
+from src.services.physics_service import AsyncPhysicsService
+from src.services.series import PrecisionSerie
+from src.services.tablas import MEDIA_TABLA, FormatoTabla, pyarrow_disponible
 
 router = APIRouter()
 
 @router.post("/calculate/mru")
-def calculate_mru(
+async def calculate_mru(
     nombre: str, 
     datos: MRUSchema, 
-    service: PhysicsService = Depends(get_physics_service)
+    response: Response,
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
 ):
     """Calcula y guarda un ensayo de MRU."""
     try:
         # El router no sabe de física, solo le pasa el trabajo al Service
-        return service.resolver_y_guardar_mru(nombre, datos)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        resultado = await service.resolver_y_guardar_mru(nombre, datos)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    if "ticket" in resultado:
+        response.status_code = status.HTTP_202_ACCEPTED  # Encolado con escritura diferida
+    return resultado
+
+@router.post("/calculate/mru/batch")
+async def calculate_mru_batch(
+    nombre: str,
+    lote: MRULoteSchema,
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Calcula y guarda un lote columnar de ensayos MRU, reportando errores por fila."""
+    try:
+        return await service.resolver_y_guardar_mru_lote(nombre, lote)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
 
 @router.post("/calculate/mrua")
-def calculate_mrua(
+async def calculate_mrua(
     nombre: str, 
     datos: MRUASchema, 
-    service: PhysicsService = Depends(get_physics_service)
+    response: Response,
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
 ):
     """Calcula y guarda un ensayo de MRUA."""
     try:
-        return service.resolver_y_guardar_mrua(nombre, datos)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        resultado = await service.resolver_y_guardar_mrua(nombre, datos)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    if "ticket" in resultado:
+        response.status_code = status.HTTP_202_ACCEPTED
+    return resultado
+
+@router.post("/calculate/mrua/batch")
+async def calculate_mrua_batch(
+    nombre: str,
+    lote: MRUALoteSchema,
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Calcula y guarda un lote columnar de ensayos MRUA, reportando errores por fila."""
+    try:
+        return await service.resolver_y_guardar_mrua_lote(nombre, lote)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+@router.post("/calculate/mru/uncertainty")
+async def calculate_mru_uncertainty(
+    datos: MRUSchema,
+    incertidumbre: IncertidumbreSchema,
+    nombre: str = "Ensayo con incertidumbre",
+    guardar: bool = False,
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Propaga la desviación de cada dato medido a las incógnitas de un MRU (Monte Carlo)."""
+    try:
+        return await service.propagar_incertidumbre("MRU", nombre, datos, incertidumbre, guardar)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+@router.post("/calculate/mrua/uncertainty")
+async def calculate_mrua_uncertainty(
+    datos: MRUASchema,
+    incertidumbre: IncertidumbreSchema,
+    nombre: str = "Ensayo con incertidumbre",
+    guardar: bool = False,
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Propaga la desviación de cada dato medido a las incógnitas de un MRUA (Monte Carlo)."""
+    try:
+        return await service.propagar_incertidumbre("MRUA", nombre, datos, incertidumbre, guardar)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+@router.post("/import/{tipo}")
+async def import_experiments(
+    tipo: Literal["mru", "mrua"],
+    request: Request,
+    nombre: str = "Importado",
+    formato: FormatoTabla = Query("parquet", alias="format"),
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Importa un archivo Parquet o Arrow IPC (cuerpo crudo): valida, resuelve y guarda en bloque."""
+    if not pyarrow_disponible():
+        raise HTTPException(status_code=415, detail="La importación columnar requiere pyarrow; usa /calculate/{tipo}/batch.")
+    contenido = await request.body()
+    try:
+        return await service.importar_tabla(tipo.upper(), nombre, contenido, formato)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+@router.post("/fit/{tipo}")
+async def fit_series(
+    tipo: Literal["mru", "mrua"],
+    request: Request,
+    response: Response,
+    nombre: str = "Serie ajustada",
+    formato: FormatoSerie = Query("json", alias="format"),
+    guardar: bool = False,
+    residuos: Optional[FormatoColumnar] = Query(
+        None, alias="residuals", description="Devuelve t, x, ajuste y residuo en este formato; el resumen viaja en X-Fit",
+    ),
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Ajusta MRU o MRUA a una serie medida (t, x) por mínimos cuadrados (cuerpo crudo)."""
+    if formato in MEDIA_TABLA and not pyarrow_disponible():
+        raise HTTPException(status_code=415, detail=f"El formato '{formato}' requiere pyarrow; usa 'json' o 'npy'.")
+    contenido = await request.body()
+    try:
+        resumen, columnas = await service.ajustar_serie(
+            tipo.upper(), nombre, contenido, formato, guardar, con_residuos=residuos is not None
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    estado = status.HTTP_202_ACCEPTED if "ticket" in resumen else status.HTTP_200_OK
+    if columnas is None:
+        response.status_code = estado
+        return resumen
+    respuesta = respuesta_columnar(columnas, residuos, headers={"X-Fit": json.dumps(resumen)})
+    respuesta.status_code = estado
+    return respuesta
+
+@router.get("", response_model=List[ExperimentSummary], response_model_exclude_unset=True)
+async def get_all_experiments(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Columnas separadas por coma (id y fecha_creacion van siempre)"),
+    tipo: Optional[str] = None,
+    desde: Optional[datetime] = Query(None, description="Fecha de creación mínima (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha de creación máxima (exclusiva)"),
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Obtiene el listado maestro paginado, del más reciente al más antiguo.
+
+    El cursor de la página siguiente viaja en la cabecera `X-Next-Cursor`.
+    """
+    try:
+        filas, siguiente = await service.list_page(limit, cursor, fields, tipo, desde, hasta)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    if siguiente:
+        response.headers["X-Next-Cursor"] = siguiente
+    return filas
+
+@router.get("/cache/stats")
+async def get_cache_stats(service: AsyncPhysicsService = Depends(get_async_physics_service)):
+    """Aciertos, fallos y desalojos de la caché de lecturas (para dimensionarla)."""
+    return service.cache_stats()
+
+@router.get("/export")
+async def export_experiments(
+    formato: FormatoExportacion = Query("ndjson", alias="format"),
+    tipo: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Exporta el historial con su detalle físico (NDJSON, CSV, Parquet o Arrow), en streaming."""
+    if formato in MEDIA_TABLA and not pyarrow_disponible():
+        raise HTTPException(status_code=406, detail=f"Formato '{formato}' no disponible: instala pyarrow o usa 'ndjson'/'csv'.")
+    return StreamingResponse(
+        service.exportar(formato, tipo, desde, hasta),
+        media_type=MEDIA_EXPORTACION[formato],
+        headers={"Content-Disposition": f'attachment; filename="experimentos.{formato}"'},
+    )
+
+@router.get("/models")
+def list_models():
+    """Modelos registrados: variables, ecuaciones y cuántos patrones de incógnitas resuelven."""
+    return [modelo.describir() for modelo in MODELOS.values()]
+
+@router.get("/stats")
+async def get_experiment_stats(service: AsyncPhysicsService = Depends(get_async_physics_service)):
+    """Conteos por tipo y por día, y media/mín/máx/percentiles de cada campo físico."""
+    return await service.stats()
+
+@router.get("/tickets/{ticket}")
+async def get_write_status(ticket: str, service: AsyncPhysicsService = Depends(get_async_physics_service)):
+    """Estado de un cálculo encolado con escritura diferida (`pendiente` o `guardado` con su id)."""
+    estado = service.estado_escritura(ticket)
+    if estado is None:
+        raise HTTPException(status_code=404, detail=f"El ticket {ticket} no existe.")
+    return estado
+
+def _parsear_ids(ids: str) -> list[int]:
+    try:
+        return [int(valor) for valor in ids.split(",") if valor.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Lista de IDs inválida: {ids!r}")
 
-@router.get("", response_model=List[ExperimentResponse])
-def get_all_experiments(service: PhysicsService = Depends(get_physics_service)):
-    """Obtiene el listado maestro de todos los experimentos realizados."""
-    return service.list_all()
+@router.get("/details")
+async def get_experiment_details(
+    ids: str = Query(..., description="IDs separados por coma, p. ej. 1,2,3"),
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Obtiene varios experimentos con su detalle físico en una sola consulta (los inexistentes se omiten)."""
+    exp_ids = _parsear_ids(ids)
+    try:
+        return await service.get_many(exp_ids)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+@router.get("/compare")
+async def compare_experiments(
+    ids: str = Query(..., description="IDs separados por coma, p. ej. 1,2,3"),
+    variables: str = Query("x,v,a", description="Curvas a devolver: x, v y/o a"),
+    points: int = Query(1000, ge=2, le=MAX_PUNTOS),
+    t0: Optional[float] = None,
+    t1: Optional[float] = Query(None, description="Por defecto, el tiempo del ensayo más largo"),
+    max_points: int = Query(2000, ge=4, le=MAX_PUNTOS, description="Puntos por curva tras la decimación min/max"),
+    formato: FormatoColumnar = Query("json", alias="format"),
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Curvas de varios experimentos sobre una malla de tiempo común, para superponerlas.
+
+    Columnas: `t` y `<variable>:<id>` por experimento (p. ej. `x:12`).
+    """
+    exp_ids = _parsear_ids(ids)
+    try:
+        curvas = await service.compare(
+            exp_ids, [v.strip() for v in variables.split(",") if v.strip()], points, t0, t1, max_points
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    if curvas is None:
+        raise HTTPException(status_code=404, detail="Ninguno de los experimentos pedidos existe.")
+    return respuesta_columnar(curvas, formato)
 
 @router.get("/{id}")
-def get_experiment_detail(id: int, service: PhysicsService = Depends(get_physics_service)):
+async def get_experiment_detail(id: int, service: AsyncPhysicsService = Depends(get_async_physics_service)):
     """Obtiene un experimento específico junto con su desglose de variables físicas."""
-    exp = service.get_one(id)
+    exp = await service.get_one(id)
     if not exp:
         raise HTTPException(status_code=404, detail=f"El experimento con ID {id} no existe.")
     return exp
 
+@router.get("/{id}/uncertainty")
+async def get_experiment_uncertainty(id: int, service: AsyncPhysicsService = Depends(get_async_physics_service)):
+    """Incertidumbre Monte Carlo guardada con el experimento (una fila por variable)."""
+    filas = await service.get_uncertainty(id)
+    if not filas:
+        raise HTTPException(status_code=404, detail=f"El experimento {id} no tiene incertidumbre guardada.")
+    return filas
+
+@router.get("/{id}/trajectory")
+async def get_experiment_trajectory(
+    id: int,
+    points: int = Query(PUNTOS_POR_DEFECTO, ge=2, le=MAX_PUNTOS),
+    t0: Optional[float] = Query(None, description="Inicio del intervalo (s); por defecto 0"),
+    t1: Optional[float] = Query(None, description="Fin del intervalo (s); por defecto el tiempo del ensayo (mínimo 1 s)"),
+    formato: FormatoColumnar = Query("json", alias="format"),
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Curvas t, x(t), v(t), a(t) del experimento, calculadas en el servidor en formato columnar."""
+    try:
+        curvas = await service.get_trajectory(id, points, t0, t1)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    if curvas is None:
+        raise HTTPException(status_code=404, detail=f"El experimento con ID {id} no existe.")
+    return respuesta_columnar(curvas, formato)
+
+@router.post("/{id}/series")
+async def append_experiment_series(
+    id: int,
+    request: Request,
+    formato: FormatoSerie = Query("json", alias="format"),
+    precision: PrecisionSerie = Query("float64", description="Precisión con la que se guarda x (t siempre en float64)"),
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Agrega muestras crudas (t, x) a la serie del experimento, comprimidas por bloques (cuerpo crudo)."""
+    if formato in MEDIA_TABLA and not pyarrow_disponible():
+        raise HTTPException(status_code=415, detail=f"El formato '{formato}' requiere pyarrow; usa 'json' o 'npy'.")
+    contenido = await request.body()
+    try:
+        resumen = await service.agregar_serie(id, contenido, formato, precision)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    if resumen is None:
+        raise HTTPException(status_code=404, detail=f"El experimento con ID {id} no existe.")
+    return resumen
+
+@router.get("/{id}/series")
+async def get_experiment_series(
+    id: int,
+    t0: Optional[float] = Query(None, description="Inicio del rango (mismas unidades que t); por defecto el inicio de la serie"),
+    t1: Optional[float] = Query(None, description="Fin del rango; por defecto el final de la serie"),
+    max_points: Optional[int] = Query(None, ge=2, le=MAX_PUNTOS, description="Envolvente min/max con a lo sumo estos puntos"),
+    formato: FormatoColumnar = Query("json", alias="format"),
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Muestras guardadas en [t0, t1], completas o reducidas para graficar, en formato columnar."""
+    try:
+        columnas = await service.leer_serie_guardada(id, t0, t1, max_points)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    if columnas is None:
+        raise HTTPException(status_code=404, detail=f"El experimento con ID {id} no existe.")
+    return respuesta_columnar(columnas, formato)
+
+@router.get("/{id}/series/info")
+async def get_experiment_series_info(id: int, service: AsyncPhysicsService = Depends(get_async_physics_service)):
+    """Puntos, bloques, rango y tamaño comprimido de la serie guardada."""
+    resumen = await service.info_serie(id)
+    if resumen is None:
+        raise HTTPException(status_code=404, detail=f"El experimento {id} no tiene serie guardada.")
+    return resumen
+
 @router.delete("/{id}", status_code=status.HTTP_200_OK)
-def delete_experiment(id: int, service: PhysicsService = Depends(get_physics_service)):
+async def delete_experiment(id: int, service: AsyncPhysicsService = Depends(get_async_physics_service)):
     """Elimina un experimento de la base de datos (Borrado en cascada automatizado)."""
-    eliminado = service.remove_one(id)
+    eliminado = await service.remove_one(id)
     if not eliminado:
         raise HTTPException(status_code=404, detail=f"No se encontró el experimento {id} para eliminar.")
     return {"message": f"Experimento {id} eliminado exitosamente."}
\ No newline at end of file
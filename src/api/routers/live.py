@@ -0,0 +1,113 @@
+import json
+from typing import Literal
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, status
+
+from src.api.dependencies import get_async_physics_service
+from src.core.exceptions import AppError, ValidationError
+from src.services.fitting import leer_serie
+from src.services.live import (
+    SesionEnVivo,
+    abrir_sesion,
+    cerrar_sesion,
+    obtener_sesion,
+    sesiones_activas,
+)
+from src.services.physics_service import AsyncPhysicsService
+
+router = APIRouter()
+
+def _es_fin(texto: str) -> bool:
+    try:
+        mensaje = json.loads(texto)
+    except ValueError:
+        return False
+    return isinstance(mensaje, dict) and bool(mensaje.get("fin"))
+
+async def _finalizar(sesion: SesionEnVivo, service: AsyncPhysicsService, guardar: bool) -> dict:
+    """Mensaje de cierre de la sesión; con `guardar`, registra el ajuste final como experimento."""
+    final = {**sesion.estado(), "evento": "fin", "guardado": None}
+    ajuste = sesion.acumulado.ajuste()
+    if not guardar or ajuste is None:
+        return final
+    try:
+        final["guardado"] = await service.guardar_ajuste(sesion.nombre, ajuste)
+    except AppError as e:
+        final["error"] = e.message
+    return final
+
+@router.websocket("/{tipo}")
+async def live_ingest(
+    websocket: WebSocket,
+    tipo: Literal["mru", "mrua"],
+    nombre: str = "Ensayo en vivo",
+    guardar: bool = True,
+    service: AsyncPhysicsService = Depends(get_async_physics_service)
+):
+    """Recibe lotes de muestras de un sensor y ajusta el modelo a medida que llegan.
+
+    Cada mensaje de texto es un lote `{"t": [...], "x": [...]}` y cada mensaje
+    binario un npy de forma (2, n). Tras cada lote se responde (y se publica a los
+    suscriptores) el ajuste acumulado; `{"fin": true}` o desconectarse cierra la
+    sesión y, con `guardar`, registra el ajuste como un experimento más.
+    """
+    await websocket.accept()
+    sesion = abrir_sesion(tipo.upper(), nombre)
+    conectado = True
+    try:
+        await websocket.send_json({"evento": "sesion", "sesion": sesion.id, "tipo": sesion.tipo})
+        while True:
+            mensaje = await websocket.receive()
+            if mensaje["type"] == "websocket.disconnect":
+                conectado = False
+                break
+            if mensaje.get("bytes") is not None:
+                contenido, formato = mensaje["bytes"], "npy"
+            elif _es_fin(mensaje["text"]):
+                break
+            else:
+                contenido, formato = mensaje["text"].encode(), "json"
+            try:
+                sesion.acumulado.agregar(*leer_serie(contenido, formato))
+            except ValidationError as e:
+                # Un lote inválido no corta la sesión
+                await websocket.send_json({"evento": "error", "detalle": e.message})
+                continue
+            estado = sesion.estado()
+            sesion.publicar(estado)
+            await websocket.send_json(estado)
+    except WebSocketDisconnect:
+        conectado = False
+    finally:
+        final = await _finalizar(sesion, service, guardar)
+        sesion.publicar(final)
+        cerrar_sesion(sesion.id)
+    if conectado:
+        await websocket.send_json(final)
+        await websocket.close()
+
+@router.websocket("/sessions/{sesion_id}")
+async def live_watch(websocket: WebSocket, sesion_id: str):
+    """Recibe el ajuste de una sesión en vivo cada vez que cambia, hasta su mensaje `fin`."""
+    sesion = obtener_sesion(sesion_id)
+    if sesion is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=f"La sesión {sesion_id} no existe.")
+        return
+    await websocket.accept()
+    cola = sesion.suscribir()
+    try:
+        while True:
+            mensaje = await cola.get()
+            await websocket.send_json(mensaje)
+            if mensaje["evento"] == "fin":
+                break
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sesion.desuscribir(cola)
+
+@router.get("/sessions")
+def list_live_sessions():
+    """Sesiones en vivo abiertas en este proceso, para elegir a cuál suscribirse."""
+    return sesiones_activas()
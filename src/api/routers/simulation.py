@@ -0,0 +1,43 @@
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from src.api.columnar import MEDIA_ARROW, MEDIA_NPY
+from src.core.exceptions import ValidationError
+from src.schemas.simulation import BarridoSchema
+from src.services.sweep import (
+    codificar_arrow,
+    codificar_npy,
+    largo_npy,
+    planificar_barrido,
+)
+from src.services.tablas import pyarrow_disponible
+
+router = APIRouter()
+
+@router.post("/sweep")
+def simulate_sweep(
+    barrido: BarridoSchema,
+    formato: Literal["npy", "arrow"] = Query("npy", alias="format"),
+):
+    """Evalúa un modelo sobre una grilla de parámetros, sin guardar nada, y la envía en streaming.
+
+    El cuerpo es de forma (salidas, celdas); `X-Grid-Axes` y `X-Grid-Shape`
+    indican cómo volver a darle la forma de la grilla (último eje más rápido).
+    """
+    try:
+        plan = planificar_barrido(barrido)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    cabeceras = {
+        "X-Columns": ",".join(plan.salidas),
+        "X-Grid-Axes": ",".join(plan.ejes),
+        "X-Grid-Shape": ",".join(map(str, plan.forma)),
+    }
+    if formato == "arrow":
+        if not pyarrow_disponible():
+            raise HTTPException(status_code=406, detail="Formato 'arrow' no disponible: instala pyarrow o usa 'npy'.")
+        return StreamingResponse(codificar_arrow(plan), media_type=MEDIA_ARROW, headers=cabeceras)
+    cabeceras["Content-Length"] = str(largo_npy(plan))
+    return StreamingResponse(codificar_npy(plan), media_type=MEDIA_NPY, headers=cabeceras)
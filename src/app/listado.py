@@ -0,0 +1,33 @@
+"""
+Lectura completa del listado paginado de la API (sin Streamlit, para poder probarla).
+
+`GET /experiments` entrega como máximo `limit` filas y el cursor de la página
+siguiente en la cabecera `X-Next-Cursor`; las páginas de la app que muestran
+el historial completo lo recorren hasta que la cabecera deja de venir.
+Streamlit agrega `src/app` al path, así que las páginas lo importan como `listado`.
+"""
+
+from collections.abc import Callable
+
+# Máximo que acepta la API por página
+LIMITE_PAGINA = 1000
+
+
+def recorrer_listado(obtener: Callable, url: str, params: dict | None = None, timeout: float = 20) -> list[dict]:
+    """Todas las filas del listado, siguiendo `X-Next-Cursor`.
+
+    Args:
+        obtener: Función con la firma de `requests.get` (o el `get` de un cliente de pruebas).
+        url: URL del listado.
+        params: Filtros y proyección (`fields`, `tipo`, ...); `limit` por defecto es el máximo.
+    """
+    params = {"limit": LIMITE_PAGINA, **(params or {})}
+    filas = []
+    while True:
+        response = obtener(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        filas.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return filas
+        params["cursor"] = cursor
@@ -1,6 +1,5 @@
 import streamlit as st
 
-
 st.set_page_config(page_title="PhysiLab Digital", page_icon="🔬", layout="wide")
 
 st.title("🔬 PhysiLab Digital")
@@ -1,9 +1,17 @@
-import numpy as np
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from __future__ import annotations
+
+import io
+from typing import TYPE_CHECKING
+
 import requests
 import streamlit as st
+from listado import recorrer_listado
+
+# numpy, pandas y plotly se importan al dibujar: la página abre sin esperarlos
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import plotly.graph_objects as go
 
 
 API_BASE = "http://localhost:8000/experiments"
@@ -11,9 +19,8 @@ API_BASE = "http://localhost:8000/experiments"
 
 @st.cache_data(ttl=20)
 def cargar_experimentos() -> list[dict]:
-    response = requests.get(API_BASE, timeout=20)
-    response.raise_for_status()
-    return response.json()
+    # El listado viene paginado: se recorren todas las páginas, solo con las columnas que se muestran
+    return recorrer_listado(requests.get, API_BASE, {"fields": "nombre,tipo"})
 
 
 def cargar_detalle(exp_id: int) -> dict:
@@ -22,36 +29,33 @@ def cargar_detalle(exp_id: int) -> dict:
     return response.json()
 
 
+def cargar_trayectoria(exp_id: int, puntos: int = 500) -> dict[str, np.ndarray]:
+    """Curvas calculadas por la API, en `.npy` (un bloque contiguo por columna)."""
+    import numpy as np
+
+    response = requests.get(
+        f"{API_BASE}/{exp_id}/trajectory", params={"points": puntos, "format": "npy"}, timeout=20
+    )
+    response.raise_for_status()
+    valores = np.load(io.BytesIO(response.content), allow_pickle=False)
+    return dict(zip(response.headers["X-Columns"].split(","), valores))
+
+
 def construir_dataframe(detalle: dict) -> pd.DataFrame:
-    tipo = detalle.get("tipo")
-    physics = detalle.get("detalle", {})
-
-    if tipo == "MRUA":
-        tiempo = float(physics.get("tiempo") or 1)
-        t = np.linspace(0, max(tiempo, 1.0), 100)
-        x0 = float(physics.get("posicion_inicial") or 0)
-        v0 = float(physics.get("velocidad_inicial") or 0)
-        a = float(physics.get("aceleracion") or 0)
-        x = x0 + v0 * t + 0.5 * a * t**2
-        v = v0 + a * t
-        acc = np.full_like(t, a)
-    else:
-        tiempo = float(physics.get("tiempo") or 1)
-        t = np.linspace(0, max(tiempo, 1.0), 100)
-        v0 = float(physics.get("velocidad") or 0)
-        x = v0 * t
-        v = np.full_like(t, v0)
-        acc = np.zeros_like(t)
+    import pandas as pd
 
+    curvas = cargar_trayectoria(detalle["id"])
     return pd.DataFrame({
-        "Tiempo (s)": t,
-        "Posición (m)": x,
-        "Velocidad (m/s)": v,
-        "Aceleración (m/s²)": acc,
+        "Tiempo (s)": curvas["t"],
+        "Posición (m)": curvas["x"],
+        "Velocidad (m/s)": curvas["v"],
+        "Aceleración (m/s²)": curvas["a"],
     })
 
 
 def crear_figura(df: pd.DataFrame, variable: str, titulo: str) -> go.Figure:
+    import plotly.express as px
+
     fig = px.line(df, x="Tiempo (s)", y=variable, title=titulo)
     fig.update_traces(line_width=3)
     fig.update_layout(hovermode="x unified", template="plotly_white")
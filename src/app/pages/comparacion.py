@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import io
+from typing import TYPE_CHECKING
+
+import requests
+import streamlit as st
+from listado import recorrer_listado
+
+# numpy y plotly se importan al dibujar: la página abre sin esperarlos
+if TYPE_CHECKING:
+    import numpy as np
+    import plotly.graph_objects as go
+
+
+API_BASE = "http://localhost:8000/experiments"
+
+VARIABLES = {
+    "Posición (m)": "x",
+    "Velocidad (m/s)": "v",
+    "Aceleración (m/s²)": "a",
+}
+
+
+@st.cache_data(ttl=20)
+def cargar_experimentos() -> list[dict]:
+    # El listado viene paginado: se recorren todas las páginas, solo con las columnas que se muestran
+    return recorrer_listado(requests.get, API_BASE, {"fields": "nombre,tipo"})
+
+
+def cargar_comparacion(ids: list[int], variable: str, puntos: int = 2000) -> dict[str, np.ndarray]:
+    """Curvas de todos los ensayos en una sola petición, ya decimadas por la API."""
+    import numpy as np
+
+    # Malla fina (dentro del límite de celdas de la API) reducida a `puntos` por min/max
+    resolucion = max(puntos, min(10 * puntos, 5_000_000 // len(ids)))
+    response = requests.get(
+        f"{API_BASE}/compare",
+        params={"ids": ",".join(map(str, ids)), "variables": variable, "points": resolucion,
+                "max_points": puntos, "format": "npy"},
+        timeout=60,
+    )
+    response.raise_for_status()
+    valores = np.load(io.BytesIO(response.content), allow_pickle=False)
+    return dict(zip(response.headers["X-Columns"].split(","), valores))
+
+
+def crear_figura_superpuesta(curvas: dict[str, np.ndarray], nombres: dict[int, str], titulo: str) -> go.Figure:
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    t = curvas["t"]
+    for columna, valores in curvas.items():
+        if columna == "t":
+            continue
+        exp_id = int(columna.split(":")[1])
+        # Scattergl dibuja en WebGL: cientos de trazas siguen siendo interactivas
+        fig.add_trace(go.Scattergl(x=t, y=valores, mode="lines", name=nombres.get(exp_id, str(exp_id)), line_width=1.5))
+    fig.update_layout(
+        title=titulo,
+        xaxis_title="Tiempo (s)",
+        hovermode="closest",
+        template="plotly_white",
+        showlegend=len(curvas) <= 21,
+    )
+    return fig
+
+
+st.set_page_config(page_title="Comparación - PhysiLab", page_icon="📈", layout="wide")
+
+st.title("📈 Comparación de ensayos")
+st.caption("Superpone las curvas de varios experimentos sobre una misma escala de tiempo.")
+
+try:
+    experimentos = cargar_experimentos()
+except requests.RequestException as exc:
+    st.error(f"No se pudo cargar el historial: {exc}")
+    st.stop()
+
+if not experimentos:
+    st.warning("Todavía no hay ensayos guardados.")
+    st.stop()
+
+nombres = {item["id"]: f"{item['nombre']} ({item['tipo']})" for item in experimentos}
+tipos = st.sidebar.multiselect("Tipos", ["MRU", "MRUA"], default=["MRU", "MRUA"])
+candidatos = [item["id"] for item in experimentos if item["tipo"] in tipos]
+seleccion = st.sidebar.multiselect(
+    "Ensayos a comparar", candidatos, default=candidatos[:10], format_func=lambda exp_id: nombres[exp_id]
+)
+etiqueta = st.sidebar.radio("Variable", list(VARIABLES))
+
+if not seleccion:
+    st.info("Selecciona al menos un ensayo.")
+    st.stop()
+
+try:
+    curvas = cargar_comparacion(seleccion, VARIABLES[etiqueta])
+except requests.RequestException as exc:
+    st.error(f"No se pudo calcular la comparación: {exc}")
+    st.stop()
+
+st.plotly_chart(
+    crear_figura_superpuesta(curvas, nombres, f"{etiqueta} vs Tiempo ({len(seleccion)} ensayos)"),
+    use_container_width=True,
+)
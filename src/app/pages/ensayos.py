@@ -1,22 +1,37 @@
-import pandas as pd
-import plotly.express as px
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 import requests
 import streamlit as st
 
+# pandas y plotly solo hacen falta para el resumen: el formulario abre sin esperarlos
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
 
 API_BASE = "http://localhost:8000/experiments"
 
 
-def cargar_experimentos() -> list[dict]:
-    response = requests.get(API_BASE, timeout=20)
+def cargar_experimentos(limite: int = 50) -> list[dict]:
+    response = requests.get(API_BASE, params={"limit": limite}, timeout=20)
+    response.raise_for_status()
+    return response.json()
+
+
+def cargar_estadisticas() -> dict:
+    response = requests.get(f"{API_BASE}/stats", timeout=20)
     response.raise_for_status()
     return response.json()
 
 
-def construir_resumen(experimentos: list[dict]) -> pd.DataFrame:
-    if not experimentos:
-        return pd.DataFrame(columns=["tipo", "cantidad"])
-    return pd.DataFrame(experimentos).groupby("tipo", as_index=False).size().rename(columns={"size": "cantidad"})
+def construir_resumen(estadisticas: dict) -> go.Figure:
+    import plotly.express as px
+
+    # Los conteos ya vienen agregados por la API: no hace falta descargar el historial
+    por_tipo = estadisticas.get("por_tipo", {})
+    datos = {"tipo": list(por_tipo), "cantidad": list(por_tipo.values())}
+    return px.bar(datos, x="tipo", y="cantidad", color="tipo", title="Cantidad de ensayos por tipo")
 
 
 def guardar_mru(nombre: str, variable_faltante: str, valores: dict[str, float]) -> None:
@@ -76,21 +91,19 @@ st.title("🧪 Ensayos")
 st.caption("Registra experimentos y revisa un resumen rápido del historial.")
 
 try:
+    estadisticas = cargar_estadisticas()
     experimentos = cargar_experimentos()
 except requests.RequestException as exc:
     st.warning(f"No se pudo cargar el historial: {exc}")
-    experimentos = []
+    estadisticas, experimentos = {}, []
 
-if experimentos:
-    resumen = construir_resumen(experimentos)
+if estadisticas.get("total"):
     st.subheader("Resumen del historial")
-    st.plotly_chart(
-        px.bar(resumen, x="tipo", y="cantidad", color="tipo", title="Cantidad de ensayos por tipo"),
-        use_container_width=True,
-    )
+    st.plotly_chart(construir_resumen(estadisticas), use_container_width=True)
 
+if experimentos:
     st.subheader("Últimos registros")
-    st.dataframe(pd.DataFrame(experimentos).sort_values("fecha_creacion", ascending=False), use_container_width=True)
+    st.dataframe(experimentos, use_container_width=True)
 
 st.divider()
 
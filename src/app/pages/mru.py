@@ -1,18 +1,37 @@
-import numpy as np
-import plotly.graph_objects as go
+from __future__ import annotations
+
+import io
+from typing import TYPE_CHECKING
+
 import requests
 import streamlit as st
 
+# numpy y plotly solo hacen falta para la gráfica, después de guardar un ensayo
+if TYPE_CHECKING:
+    import numpy as np
+    import plotly.graph_objects as go
+
+
+API_BASE = "http://localhost:8000/experiments"
+API_URL = f"{API_BASE}/calculate/mru"
+
+
+def cargar_trayectoria(exp_id: int, puntos: int = 200) -> dict[str, np.ndarray]:
+    import numpy as np
+
+    response = requests.get(
+        f"{API_BASE}/{exp_id}/trajectory", params={"points": puntos, "format": "npy"}, timeout=20
+    )
+    response.raise_for_status()
+    valores = np.load(io.BytesIO(response.content), allow_pickle=False)
+    return dict(zip(response.headers["X-Columns"].split(","), valores))
 
-API_URL = "http://localhost:8000/experiments/calculate/mru"
 
+def construir_figura_mru(exp_id: int, detalle: dict) -> go.Figure:
+    import plotly.graph_objects as go
 
-def construir_figura_mru(detalle: dict) -> go.Figure:
-    tiempo = float(detalle.get("tiempo") or 0)
-    velocidad = float(detalle.get("velocidad") or 0)
-    t = np.linspace(0, max(tiempo, 1.0), 100)
-    posicion = velocidad * t
-    velocidad_constante = np.full_like(t, velocidad)
+    curvas = cargar_trayectoria(exp_id)
+    t, posicion, velocidad_constante = curvas["t"], curvas["x"], curvas["v"]
 
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=t, y=posicion, mode="lines", name="Posición", line=dict(color="#00d1ff", width=3)))
@@ -68,12 +87,16 @@ if enviar:
         resultado = response.json()
         detalle = resultado.get("detalle", {})
 
-        st.success(f"Ensayo guardado con ID {resultado.get('id')}.")
+        if "ticket" in resultado:
+            st.info(f"Ensayo en cola de guardado (ticket {resultado['ticket']}).")
+        else:
+            st.success(f"Ensayo guardado con ID {resultado.get('id')}.")
         st.json(resultado)
 
         if detalle:
-            st.subheader("Gráfica del movimiento")
-            st.plotly_chart(construir_figura_mru({**detalle, "nombre": nombre.strip()}), use_container_width=True)
+            if resultado.get("id") is not None:
+                st.subheader("Gráfica del movimiento")
+                st.plotly_chart(construir_figura_mru(resultado["id"], {**detalle, "nombre": nombre.strip()}), use_container_width=True)
 
             col_a, col_b, col_c = st.columns(3)
             col_a.metric("Velocidad", f"{float(detalle.get('velocidad', 0)):.2f} m/s")
@@ -1,5 +1,9 @@
+from functools import cache
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -7,9 +11,37 @@ class Settings(BaseSettings):
         case_sensitive=False,
     )
 
+    # ── Almacenamiento ────────────────────────────────────────────────────────
+    storage_backend: Literal["supabase", "sqlite"] = "supabase"
+    sqlite_path: str = "data/physilab.db"    # Solo con storage_backend="sqlite"
+
+    # ── Caché de lecturas (experimentos) ──────────────────────────────────────
+    cache_max_entries: int = 1024
+    cache_ttl_seconds: float = 60.0
+    trajectory_cache_mb: int = 64            # Memoria máxima de la caché de trayectorias muestreadas
+    stats_resync_seconds: float = 0.0        # Recarga periódica de /stats (0 = nunca; útil con varios workers)
+
+    # ── Escritura diferida de los cálculos (write-behind) ─────────────────────
+    write_behind_enabled: bool = False
+    write_behind_flush_ms: int = 50            # Espera máxima de un experimento en la cola
+    write_behind_max_rows: int = 500           # Filas que disparan un flush inmediato
+    write_behind_spill_path: str = "data/write_behind.jsonl"
+
+    # ── Incertidumbre (Monte Carlo) ───────────────────────────────────────────
+    montecarlo_workers: int = 0              # Procesos para repartir las muestras (0 = en el mismo proceso)
+
     # ── Supabase ──────────────────────────────────────────────────────────────
-    supabase_url: str
-    supabase_key: str
+    supabase_url: str = ""                   # Obligatorias con storage_backend="supabase"
+    supabase_key: str = ""
+    supabase_pool_size: int = 20            # Conexiones HTTP simultáneas del pool
+    supabase_keepalive_expiry: float = 30.0  # Segundos que una conexión ociosa sigue abierta
+    supabase_timeout: float = 10.0           # Segundos por petición a Supabase
+    supabase_http2: bool = False             # HTTP/2 multiplexado; requiere `httpx[http2]`
+
+    # ── Métricas ──────────────────────────────────────────────────────────────
+    metrics_enabled: bool = True             # Expone GET /metrics (formato Prometheus)
+    server_timing_enabled: bool = False      # Cabecera Server-Timing en cada respuesta
+
     # ── FastAPI (Personalizado para PhysiLab) ─────────────────────────────────
     api_base_url: str = "http://localhost:8000"
     api_title: str = "PhysiLab API - Laboratorio de Física"
@@ -18,4 +50,25 @@ class Settings(BaseSettings):
     # ── Entorno ───────────────────────────────────────────────────────────────
     debug: bool = True  # Activado para desarrollo
 
-settings = Settings()
\ No newline at end of file
+@cache
+def get_settings() -> Settings:
+    """Lee el entorno y `.env` una sola vez, en el primer uso (no al importar)."""
+    return Settings()
+
+
+class _SettingsPerezosos:
+    """Acceso a `get_settings()` con la sintaxis de siempre (`settings.storage_backend`).
+
+    Importar `settings` no construye nada, así que importar la API, los
+    servicios o los tests no falla ni lee `.env` hasta que se usa un valor.
+    Asignar un atributo lo cambia en la instancia real (útil en los tests).
+    """
+
+    def __getattr__(self, nombre: str):
+        return getattr(get_settings(), nombre)
+
+    def __setattr__(self, nombre: str, valor) -> None:
+        setattr(get_settings(), nombre, valor)
+
+
+settings: Settings = _SettingsPerezosos()  # type: ignore[assignment]
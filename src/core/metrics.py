@@ -0,0 +1,251 @@
+"""
+Métricas del proceso en formato de texto de Prometheus (`GET /metrics`).
+
+    physilab_http_request_duration_seconds   histograma por método, ruta y estado
+    physilab_http_storage_calls              llamadas al repositorio por petición, por ruta
+    physilab_http_storage_round_trips        viajes HTTP a Supabase por petición, por ruta
+    physilab_storage_call_duration_seconds   histograma por backend, operación y resultado
+    physilab_storage_round_trips_total       viajes HTTP a Supabase
+
+Las rutas se registran con su plantilla (`/experiments/{id}`), no con la URL
+concreta, para que la cantidad de series no crezca con los IDs.
+
+Dentro de una petición, `medir_peticion` abre una `MedicionPeticion` en una
+`ContextVar`: los repositorios instrumentados con `instrumentar` y los ganchos
+del cliente HTTP (`contar_viaje`) anotan ahí sus tiempos, que el middleware
+usa para los histogramas por petición y la cabecera `Server-Timing`. Las
+variables de contexto viajan a `asyncio.to_thread`, así que también se anotan
+las llamadas que corren en hilos.
+"""
+
+import functools
+import inspect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONTEO = (0, 1, 2, 3, 4, 6, 8, 12, 16, 32, 64)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres: tuple[str, ...], valores: tuple, extra: str = "") -> str:
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class Histograma:
+    """Histograma acumulativo con etiquetas, al estilo de `prometheus_client.Histogram`."""
+
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...], buckets=BUCKETS_SEGUNDOS) -> None:
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, etiquetas
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}  # valores de etiquetas -> [conteos por bucket, suma, total]
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, *etiquetas) -> None:
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+                    break
+            serie[1] += valor
+            serie[2] += 1
+
+    def muestras(self) -> list[str]:
+        lineas = []
+        with self._lock:
+            series = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._series.items())
+        for valores, (conteos, suma, total) in series:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets, conteos):
+                acumulado += conteo
+                le = f'le="{_numero(limite)}"'
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, le)} {acumulado}")
+            le = 'le="+Inf"'
+            lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, le)} {total}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {total}")
+        return lineas
+
+
+class Contador:
+    """Contador monótono con etiquetas; se expone con el sufijo `_total`."""
+
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = ()) -> None:
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, etiquetas
+        self._valores: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, *etiquetas, cantidad: float = 1) -> None:
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + cantidad
+
+    def muestras(self) -> list[str]:
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return [f"{self.nombre}_total{_etiquetas(self.etiquetas, k)} {_numero(v)}" for k, v in valores]
+
+
+class Registro:
+    def __init__(self) -> None:
+        self.metricas: list[Histograma | Contador] = []
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...], buckets=BUCKETS_SEGUNDOS) -> Histograma:
+        metrica = Histograma(nombre, ayuda, etiquetas, buckets)
+        self.metricas.append(metrica)
+        return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = ()) -> Contador:
+        metrica = Contador(nombre, ayuda, etiquetas)
+        self.metricas.append(metrica)
+        return metrica
+
+    def exponer(self) -> str:
+        """Todas las métricas en el formato de texto 0.0.4 de Prometheus."""
+        lineas = []
+        for metrica in self.metricas:
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            lineas.extend(metrica.muestras())
+        return "\n".join(lineas) + "\n"
+
+
+metricas = Registro()
+
+DURACION_HTTP = metricas.histograma(
+    "physilab_http_request_duration_seconds", "Duración de las peticiones HTTP.", ("method", "route", "status"),
+)
+LLAMADAS_POR_PETICION = metricas.histograma(
+    "physilab_http_storage_calls", "Llamadas al repositorio por petición.", ("route",), BUCKETS_CONTEO,
+)
+VIAJES_POR_PETICION = metricas.histograma(
+    "physilab_http_storage_round_trips", "Viajes HTTP a Supabase por petición.", ("route",), BUCKETS_CONTEO,
+)
+DURACION_ALMACENAMIENTO = metricas.histograma(
+    "physilab_storage_call_duration_seconds", "Duración de cada llamada al repositorio.", ("backend", "operation", "result"),
+)
+VIAJES_ALMACENAMIENTO = metricas.contador("physilab_storage_round_trips", "Viajes HTTP a Supabase.")
+
+
+@dataclass
+class MedicionPeticion:
+    """Lo que el almacenamiento hizo durante una petición."""
+
+    llamadas: list[tuple[str, float]] = field(default_factory=list)  # (operación, segundos)
+    viajes: int = 0
+
+    def server_timing(self, total: float) -> str:
+        """Valor de la cabecera `Server-Timing` (duraciones en ms)."""
+        por_operacion: dict[str, float] = {}
+        for operacion, segundos in self.llamadas:
+            por_operacion[operacion] = por_operacion.get(operacion, 0.0) + segundos
+        almacenamiento = sum(por_operacion.values())
+        entradas = [
+            f"total;dur={total * 1000:.1f}",
+            f'storage;dur={almacenamiento * 1000:.1f};desc="{len(self.llamadas)} llamadas, {self.viajes} viajes"',
+        ]
+        entradas += [f"{operacion};dur={segundos * 1000:.1f}" for operacion, segundos in por_operacion.items()]
+        return ", ".join(entradas)
+
+
+_peticion: ContextVar[MedicionPeticion | None] = ContextVar("medicion_peticion", default=None)
+
+
+@contextmanager
+def medir_peticion():
+    medicion = MedicionPeticion()
+    token = _peticion.set(medicion)
+    try:
+        yield medicion
+    finally:
+        _peticion.reset(token)
+
+
+def _registrar_llamada(backend: str, operacion: str, segundos: float, resultado: str) -> None:
+    DURACION_ALMACENAMIENTO.observar(segundos, backend, operacion, resultado)
+    medicion = _peticion.get()
+    if medicion is not None:
+        medicion.llamadas.append((operacion, segundos))
+
+
+def instrumentar(backend: str):
+    """Decorador de clase: mide cada método público del repositorio (síncrono o asíncrono)."""
+
+    def decorar(cls):
+        for nombre, metodo in list(vars(cls).items()):
+            if nombre.startswith("_") or not inspect.isfunction(metodo):
+                continue
+            setattr(cls, nombre, _medido(backend, nombre, metodo))
+        return cls
+
+    return decorar
+
+
+# Operación instrumentada en curso: las llamadas anidadas (p. ej. `get_by_id` ->
+# `get_many` en SQLite) se cuentan una sola vez, en la más externa
+_operacion: ContextVar[str | None] = ContextVar("operacion_almacenamiento", default=None)
+
+
+def _medido(backend: str, operacion: str, metodo):
+    if inspect.iscoroutinefunction(metodo):
+        @functools.wraps(metodo)
+        async def envoltura_async(*args, **kwargs):
+            if _operacion.get() is not None:
+                return await metodo(*args, **kwargs)
+            token, inicio, resultado = _operacion.set(operacion), time.perf_counter(), "error"
+            try:
+                valor = await metodo(*args, **kwargs)
+                resultado = "ok"
+                return valor
+            finally:
+                _operacion.reset(token)
+                _registrar_llamada(backend, operacion, time.perf_counter() - inicio, resultado)
+        return envoltura_async
+
+    @functools.wraps(metodo)
+    def envoltura(*args, **kwargs):
+        if _operacion.get() is not None:
+            return metodo(*args, **kwargs)
+        token, inicio, resultado = _operacion.set(operacion), time.perf_counter(), "error"
+        try:
+            valor = metodo(*args, **kwargs)
+            resultado = "ok"
+            return valor
+        finally:
+            _operacion.reset(token)
+            _registrar_llamada(backend, operacion, time.perf_counter() - inicio, resultado)
+    return envoltura
+
+
+def contar_viaje(_request) -> None:
+    """Gancho `request` de httpx: un viaje más a Supabase."""
+    VIAJES_ALMACENAMIENTO.incrementar()
+    medicion = _peticion.get()
+    if medicion is not None:
+        medicion.viajes += 1
+
+
+async def contar_viaje_async(request) -> None:
+    contar_viaje(request)
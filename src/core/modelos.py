@@ -0,0 +1,224 @@
+"""
+Registro declarativo de modelos físicos.
+
+Cada modelo declara una sola vez sus variables (que son también las columnas
+de su tabla de detalle) y sus ecuaciones. Cada ecuación lista las variables
+que relaciona y los despejes que sabe hacer, como expresiones de NumPy sobre
+columnas completas.
+
+Al registrar un modelo se compila un plan de despejes por cada combinación
+de variables faltantes: se recorren las ecuaciones en orden de declaración y
+se toma la primera que tiene una sola incógnita con despeje, hasta que no
+quedan incógnitas o ninguna ecuación avanza (datos insuficientes). Resolver
+un ensayo o un lote es entonces buscar el plan de su patrón en un dict y
+aplicar sus pasos (ver `batch_solver.resolver_lote`); el cálculo escalar, los
+lotes, las tablas importadas y el almacenamiento salen del mismo registro.
+
+Agregar un modelo:
+    1. declararlo aquí con `registrar_modelo`
+    2. crear su tabla de detalle (una columna float por variable) con una
+       migración que además lo inserte en `modelos`; SQLite la crea sola
+"""
+
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Callable
+
+import numpy as np
+
+from src.core.exceptions import ValidationError
+
+Columnas = dict[str, np.ndarray]
+
+
+@dataclass(frozen=True)
+class Despeje:
+    """Una variable en función de las demás variables de su ecuación.
+
+    `calcular` retorna NaN o infinito donde el despeje divide entre cero;
+    `discriminante`, si está, marca sin solución real las filas donde es
+    negativo, y `no_negativo` rechaza resultados negativos.
+    """
+
+    variable: str
+    calcular: Callable[[Columnas], np.ndarray]
+    discriminante: Callable[[Columnas], np.ndarray] | None = None
+    no_negativo: bool = False
+
+
+@dataclass(frozen=True)
+class Ecuacion:
+    texto: str
+    variables: tuple[str, ...]
+    despejes: tuple[Despeje, ...]
+
+    def despeje(self, variable: str) -> Despeje | None:
+        return next((d for d in self.despejes if d.variable == variable), None)
+
+
+@dataclass(frozen=True)
+class PlanDespeje:
+    """Pasos que resuelven un patrón de variables faltantes, en orden."""
+
+    faltantes: frozenset[str]
+    pasos: tuple[Despeje, ...]
+    sin_despejar: tuple[str, ...]   # Incógnitas que ninguna ecuación alcanza
+
+    @property
+    def resoluble(self) -> bool:
+        return not self.sin_despejar
+
+
+@dataclass
+class Modelo:
+    tipo: str
+    tabla: str
+    variables: tuple[str, ...]
+    ecuaciones: tuple[Ecuacion, ...]
+    # Variables que pueden faltar y toman un valor por defecto en lugar de despejarse
+    opcionales: dict[str, float] = field(default_factory=dict)
+    planes: dict[int, PlanDespeje] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self) -> None:
+        usadas = {v for e in self.ecuaciones for v in e.variables} | set(self.opcionales)
+        if not usadas <= set(self.variables):
+            raise ValueError(f"Variables no declaradas en {self.tipo}: {sorted(usadas - set(self.variables))}")
+        despejables = [v for v in self.variables if v not in self.opcionales]
+        for n in range(len(despejables) + 1):
+            for faltantes in combinations(despejables, n):
+                self.planes[self.patron(faltantes)] = self._compilar(frozenset(faltantes))
+
+    def patron(self, faltantes) -> int:
+        """Máscara de bits de las variables faltantes (bit i = variable i)."""
+        return sum(1 << self.variables.index(v) for v in faltantes)
+
+    def patrones(self, columnas: Columnas) -> np.ndarray:
+        """Patrón de variables faltantes (NaN) de cada fila."""
+        patron = np.zeros(len(columnas[self.variables[0]]), dtype=np.uint32)
+        for i, variable in enumerate(self.variables):
+            patron += np.isnan(columnas[variable]) * np.uint32(1 << i)
+        return patron
+
+    def plan(self, faltantes) -> PlanDespeje:
+        return self.planes[self.patron(faltantes)]
+
+    def _compilar(self, faltantes: frozenset[str]) -> PlanDespeje:
+        pendientes, pasos = set(faltantes), []
+        while pendientes:
+            for ecuacion in self.ecuaciones:
+                incognitas = pendientes.intersection(ecuacion.variables)
+                despeje = ecuacion.despeje(next(iter(incognitas))) if len(incognitas) == 1 else None
+                if despeje is not None:
+                    pasos.append(despeje)
+                    pendientes.discard(despeje.variable)
+                    break
+            else:
+                break
+        sin_despejar = tuple(v for v in self.variables if v in pendientes)
+        return PlanDespeje(faltantes, tuple(pasos), sin_despejar)
+
+    def describir(self) -> dict:
+        return {
+            "tipo": self.tipo,
+            "tabla": self.tabla,
+            "variables": list(self.variables),
+            "opcionales": self.opcionales,
+            "ecuaciones": [
+                {"ecuacion": e.texto, "despeja": [d.variable for d in e.despejes]} for e in self.ecuaciones
+            ],
+            "patrones_resolubles": sum(plan.resoluble for plan in self.planes.values()),
+        }
+
+
+MODELOS: dict[str, Modelo] = {}
+
+
+def registrar_modelo(modelo: Modelo) -> Modelo:
+    MODELOS[modelo.tipo] = modelo
+    return modelo
+
+
+def obtener_modelo(tipo: str) -> Modelo:
+    try:
+        return MODELOS[tipo]
+    except KeyError:
+        raise ValidationError(f"Tipo de experimento desconocido: {tipo}. Disponibles: {', '.join(MODELOS)}.")
+
+
+def tiempo_cuadratico(aceleracion: np.ndarray, velocidad_inicial: np.ndarray, desplazamiento: np.ndarray):
+    """Raíz no negativa de 0.5·a·t² + v0·t - Δx = 0.
+
+    Evita la cancelación catastrófica de (-b + √D) / 2A usando la forma
+    conjugada 2Δx / (b + √D) cuando b ≥ 0, que además degenera en el caso
+    lineal Δx / v0 cuando a = 0. Retorna (tiempo, discriminante); las filas
+    sin solución quedan en NaN.
+    """
+    a, b, dx = aceleracion, velocidad_inicial, desplazamiento
+    discriminante = b * b + 2.0 * a * dx
+    raiz = np.sqrt(np.where(discriminante >= 0, discriminante, np.nan))
+
+    conjugada = b + raiz
+    tiempo = np.full(np.broadcast(a, b, dx).shape, np.nan)
+    usar_conjugada = (b >= 0) & (conjugada != 0)
+    np.divide(2.0 * dx, conjugada, out=tiempo, where=usar_conjugada)
+    usar_directa = ~usar_conjugada & (a != 0)
+    np.divide(raiz - b, a, out=tiempo, where=usar_directa)
+    return tiempo, discriminante
+
+
+# --- MOVIMIENTO RECTILÍNEO UNIFORME: d = v * t ---
+
+MRU = registrar_modelo(Modelo(
+    tipo="MRU",
+    tabla="ensayos_mru",
+    variables=("distancia", "velocidad", "tiempo"),
+    ecuaciones=(
+        Ecuacion("d = v·t", ("distancia", "velocidad", "tiempo"), (
+            Despeje("distancia", lambda c: c["velocidad"] * c["tiempo"]),
+            Despeje("tiempo", lambda c: c["distancia"] / c["velocidad"]),
+            Despeje("velocidad", lambda c: c["distancia"] / c["tiempo"]),
+        )),
+    ),
+))
+
+
+# --- MOVIMIENTO RECTILÍNEO UNIFORMEMENTE ACELERADO ---
+
+def _desplazamiento(c: Columnas) -> np.ndarray:
+    return c["posicion_final"] - c["posicion_inicial"]
+
+
+MRUA = registrar_modelo(Modelo(
+    tipo="MRUA",
+    tabla="ensayos_mrua",
+    variables=("posicion_inicial", "posicion_final", "aceleracion", "tiempo", "velocidad_inicial", "velocidad_final"),
+    opcionales={"posicion_inicial": 0.0},
+    ecuaciones=(
+        Ecuacion("vf = vi + a·t", ("velocidad_final", "velocidad_inicial", "aceleracion", "tiempo"), (
+            Despeje("aceleracion", lambda c: (c["velocidad_final"] - c["velocidad_inicial"]) / c["tiempo"]),
+            Despeje("velocidad_final", lambda c: c["velocidad_inicial"] + c["aceleracion"] * c["tiempo"]),
+            Despeje("velocidad_inicial", lambda c: c["velocidad_final"] - c["aceleracion"] * c["tiempo"]),
+        )),
+        Ecuacion("xf = x0 + vi·t + a·t²/2", ("posicion_final", "posicion_inicial", "velocidad_inicial", "aceleracion", "tiempo"), (
+            Despeje(
+                "posicion_final",
+                lambda c: c["posicion_inicial"] + c["velocidad_inicial"] * c["tiempo"] + 0.5 * c["aceleracion"] * c["tiempo"] ** 2,
+            ),
+            Despeje(
+                "tiempo",
+                lambda c: tiempo_cuadratico(c["aceleracion"], c["velocidad_inicial"], _desplazamiento(c))[0],
+                discriminante=lambda c: c["velocidad_inicial"] ** 2 + 2.0 * c["aceleracion"] * _desplazamiento(c),
+                no_negativo=True,
+            ),
+            Despeje(
+                "velocidad_inicial",
+                lambda c: (_desplazamiento(c) - 0.5 * c["aceleracion"] * c["tiempo"] ** 2) / c["tiempo"],
+            ),
+        )),
+        # Ecuación sin aceleración: alcanza a las velocidades cuando la aceleración también falta
+        Ecuacion("xf - x0 = (vi + vf)·t/2", ("posicion_final", "posicion_inicial", "velocidad_inicial", "velocidad_final", "tiempo"), (
+            Despeje("velocidad_inicial", lambda c: 2.0 * _desplazamiento(c) / c["tiempo"] - c["velocidad_final"]),
+            Despeje("velocidad_final", lambda c: 2.0 * _desplazamiento(c) / c["tiempo"] - c["velocidad_inicial"]),
+        )),
+    ),
+))
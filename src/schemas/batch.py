@@ -0,0 +1,24 @@
+from typing import Optional
+
+from pydantic import BaseModel, model_validator
+
+
+class LoteSchema(BaseModel):
+    """Base de los lotes columnares: todas las columnas deben tener el mismo largo."""
+    nombres: Optional[list[str]] = None
+
+    @model_validator(mode="after")
+    def validar_columnas(self):
+        largos = {len(valor) for nombre, valor in self if nombre != "nombres" and isinstance(valor, list)}
+        if len(largos) > 1:
+            raise ValueError("Todas las columnas del lote deben tener el mismo largo.")
+        largo = largos.pop() if largos else 0
+        if self.nombres is not None and len(self.nombres) != largo:
+            raise ValueError("Debe haber un nombre por fila del lote.")
+        if self.nombres is not None and any(not 3 <= len(n) <= 100 for n in self.nombres):
+            raise ValueError("Cada nombre debe tener entre 3 y 100 caracteres.")
+        return self
+
+    def columnas(self) -> dict[str, list]:
+        """Columnas físicas del lote en el orden declarado por el esquema."""
+        return {nombre: valor for nombre, valor in self if nombre != "nombres"}
@@ -1,5 +1,8 @@
-from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
 
 class ExperimentBase(BaseModel):
     nombre: str = Field(..., min_length=3, max_length=100)
@@ -13,4 +16,12 @@ class ExperimentResponse(ExperimentBase):
     fecha_creacion: datetime
 
     # Corrección del Warning: Sintaxis moderna de Pydantic V2
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ExperimentSummary(BaseModel):
+    """Fila del listado paginado; nombre y tipo faltan si `fields=` no los pide."""
+    id: int
+    fecha_creacion: datetime
+    nombre: Optional[str] = None
+    tipo: Optional[str] = None
@@ -1,6 +1,10 @@
-from pydantic import BaseModel, field_validator
 from typing import Optional
+
+from pydantic import BaseModel, field_validator
+
 from src.core.exceptions import ErrorValorNegativo
+from src.schemas.batch import LoteSchema
+
 
 class MRUSchema(BaseModel):
     distancia: Optional[float] = None
@@ -12,4 +16,11 @@ class MRUSchema(BaseModel):
     def validar_no_negativos(cls, v):
         if v is not None and v < 0:
             raise ErrorValorNegativo(v)
-        return v
\ No newline at end of file
+        return v
+
+
+class MRULoteSchema(LoteSchema):
+    """Lote columnar de ensayos MRU; `None` marca la variable a despejar en cada fila."""
+    distancia: list[Optional[float]]
+    velocidad: list[Optional[float]]
+    tiempo: list[Optional[float]]
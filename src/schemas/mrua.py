@@ -1,6 +1,10 @@
-from pydantic import BaseModel, field_validator
 from typing import Optional
+
+from pydantic import BaseModel, field_validator
+
 from src.core.exceptions import ErrorValorNegativo
+from src.schemas.batch import LoteSchema
+
 
 class MRUASchema(BaseModel):
     posicion_inicial: Optional[float] = 0.0
@@ -17,4 +21,14 @@ class MRUASchema(BaseModel):
     def validar_no_negativos(cls, v):
         if v is not None and v < 0:
             raise ErrorValorNegativo(v)
-        return v
\ No newline at end of file
+        return v
+
+
+class MRUALoteSchema(LoteSchema):
+    """Lote columnar de ensayos MRUA; `None` marca las variables a despejar en cada fila."""
+    posicion_inicial: Optional[list[Optional[float]]] = None
+    posicion_final: list[Optional[float]]
+    aceleracion: list[Optional[float]]
+    tiempo: list[Optional[float]]
+    velocidad_inicial: list[Optional[float]]
+    velocidad_final: list[Optional[float]]
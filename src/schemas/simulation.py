@@ -0,0 +1,61 @@
+from typing import Literal, Optional, Union
+
+from pydantic import BaseModel, Field, model_validator
+
+# Parámetros de entrada y magnitudes calculadas de cada modelo en un barrido
+PARAMETROS_BARRIDO = {
+    "mru": ("velocidad", "tiempo"),
+    "mrua": ("posicion_inicial", "velocidad_inicial", "aceleracion", "tiempo"),
+}
+PARAMETROS_OPCIONALES = {"posicion_inicial": 0.0}
+SALIDAS_BARRIDO = {
+    "mru": ("distancia",),
+    "mrua": ("posicion_final", "velocidad_final"),
+}
+
+# Valores máximos por eje del barrido
+MAX_PASOS = 100_000
+
+
+class RangoSchema(BaseModel):
+    """Eje del barrido: `pasos` valores equiespaciados de `inicio` a `fin`, ambos incluidos."""
+    inicio: float
+    fin: float
+    pasos: int = Field(ge=1, le=MAX_PASOS)
+
+    @model_validator(mode="after")
+    def validar_rango(self):
+        if self.inicio < 0 or self.fin < 0:
+            raise ValueError("Los extremos del rango deben ser no negativos.")
+        if self.fin < self.inicio:
+            raise ValueError("El rango debe cumplir inicio <= fin.")
+        return self
+
+
+class BarridoSchema(BaseModel):
+    """Grilla de "qué pasaría si": cada parámetro es un valor fijo o un rango.
+
+    La grilla es el producto cartesiano de los rangos, en el orden en que se
+    declaran; las salidas se devuelven con el último eje variando más rápido.
+    """
+    modelo: Literal["mru", "mrua"]
+    parametros: dict[str, Union[float, RangoSchema]]
+    salidas: Optional[list[str]] = None  # Por defecto, todas las del modelo
+    precision: Literal["float32", "float64"] = "float64"
+
+    @model_validator(mode="after")
+    def validar_parametros(self):
+        validos = PARAMETROS_BARRIDO[self.modelo]
+        desconocidos = [p for p in self.parametros if p not in validos]
+        if desconocidos:
+            raise ValueError(f"Parámetros no válidos para {self.modelo}: {', '.join(desconocidos)}.")
+        faltantes = [p for p in validos if p not in self.parametros and p not in PARAMETROS_OPCIONALES]
+        if faltantes:
+            raise ValueError(f"Faltan parámetros de {self.modelo}: {', '.join(faltantes)}.")
+        if any(isinstance(v, float) and v < 0 for v in self.parametros.values()):
+            raise ValueError("Los valores fijos deben ser no negativos.")
+        if self.salidas is not None:
+            invalidas = [s for s in self.salidas if s not in SALIDAS_BARRIDO[self.modelo]]
+            if invalidas or not self.salidas:
+                raise ValueError(f"Salidas de {self.modelo}: {', '.join(SALIDAS_BARRIDO[self.modelo])}.")
+        return self
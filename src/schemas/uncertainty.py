@@ -0,0 +1,25 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+# Muestras máximas por petición (acota el tiempo de CPU; la memoria la acotan los bloques)
+MAX_MUESTRAS = 50_000_000
+
+
+class IncertidumbreSchema(BaseModel):
+    """Desviación estándar de cada dato medido y parámetros del muestreo Monte Carlo.
+
+    Los datos sin desviación se toman como exactos; las incógnitas no llevan desviación.
+    """
+    desviaciones: dict[str, float]
+    muestras: int = Field(1_000_000, ge=1_000, le=MAX_MUESTRAS)
+    confianza: float = Field(0.95, gt=0.5, lt=1.0)
+    semilla: Optional[int] = Field(None, ge=0)  # Fija los resultados (los mismos con o sin procesos)
+
+    @field_validator("desviaciones")
+    @classmethod
+    def validar_desviaciones(cls, v):
+        negativas = [nombre for nombre, sigma in v.items() if sigma < 0]
+        if negativas:
+            raise ValueError(f"Las desviaciones deben ser no negativas: {', '.join(negativas)}.")
+        return v
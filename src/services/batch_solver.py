@@ -0,0 +1,208 @@
+"""
+Solucionadores vectorizados de PhysiLab.
+
+Resuelven lotes completos de ensayos en una sola pasada de NumPy. Cada
+columna es un arreglo float64 donde NaN marca la variable desconocida de
+esa fila. Los errores se reportan por fila en lugar de abortar el lote.
+
+Las ecuaciones salen del registro de `src.core.modelos`: cada fila usa el
+plan de despejes precompilado para su patrón de variables faltantes, y las
+filas con el mismo patrón se resuelven juntas.
+
+Códigos de estado por fila:
+    ESTADO_OK                    -> fila resuelta
+    ESTADO_DATOS_INSUFICIENTES   -> faltan más variables de las que se pueden despejar
+    ESTADO_DIVISION_CERO         -> el despeje requiere dividir entre cero
+    ESTADO_VALOR_NEGATIVO        -> algún dato de entrada (o un despeje no negativo) es negativo
+    ESTADO_DISCRIMINANTE_NEGATIVO -> el despeje (p. ej. el tiempo del MRUA) no tiene raíz real
+"""
+
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.core.exceptions import (
+    AppError,
+    ErrorDiscriminanteNegativo,
+    ErrorDivisionPorCeroFisica,
+    ErrorValorNegativo,
+    ValidationError,
+)
+from src.core.modelos import Modelo, PlanDespeje, obtener_modelo, tiempo_cuadratico  # noqa: F401 (reexportado)
+
+ESTADO_OK = 0
+ESTADO_DATOS_INSUFICIENTES = 1
+ESTADO_DIVISION_CERO = 2
+ESTADO_VALOR_NEGATIVO = 3
+ESTADO_DISCRIMINANTE_NEGATIVO = 4
+
+
+@dataclass
+class ResultadoLote:
+    """Columnas resueltas de un lote junto con el estado de cada fila."""
+
+    columnas: dict[str, np.ndarray]
+    estado: np.ndarray
+    fallos: dict[int, AppError] = field(default_factory=dict)   # Error de cada fila inválida
+
+    @property
+    def validas(self) -> np.ndarray:
+        return self.estado == ESTADO_OK
+
+    @property
+    def errores(self) -> dict[int, str]:
+        return {i: error.message for i, error in self.fallos.items()}
+
+    def __len__(self) -> int:
+        return len(self.estado)
+
+
+def a_columna(valores) -> np.ndarray:
+    """Convierte una secuencia (con None como desconocido) en un arreglo float64 con NaN."""
+    return np.array(valores, dtype=np.float64)
+
+
+def _marcar(indices: np.ndarray, codigo: int, error, estado: np.ndarray, fallos: dict[int, AppError]) -> None:
+    """Asigna `codigo` a las filas `indices`; `error(k)` arma la excepción del k-ésimo índice."""
+    for k, i in enumerate(indices.tolist()):
+        fallos[i] = error(k)
+    estado[indices] = codigo
+
+
+def _marcar_negativos(columnas: dict[str, np.ndarray], estado: np.ndarray, fallos: dict[int, AppError]) -> None:
+    for valores in columnas.values():
+        negativos = np.flatnonzero((valores < 0) & (estado == ESTADO_OK))
+        _marcar(negativos, ESTADO_VALOR_NEGATIVO,
+                lambda k, v=valores, idx=negativos: ErrorValorNegativo(float(v[idx[k]])), estado, fallos)
+
+
+def _ejecutar_plan(plan: PlanDespeje, columnas: dict[str, np.ndarray], filas: np.ndarray | None,
+                   estado: np.ndarray, fallos: dict[int, AppError]) -> None:
+    """Aplica los pasos de `plan` a las `filas` del lote (None: todas) y escribe lo despejado."""
+    locales = dict(columnas) if filas is None else {v: c[filas] for v, c in columnas.items()}
+    indices = np.arange(len(estado)) if filas is None else filas
+    vivas = np.ones(len(indices), dtype=bool)
+
+    for paso in plan.pasos:
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            valores = np.broadcast_to(np.asarray(paso.calcular(locales), dtype=np.float64), vivas.shape)
+            discriminante = paso.discriminante(locales) if paso.discriminante is not None else None
+
+        sin_raiz = np.zeros_like(vivas)
+        if discriminante is not None:
+            sin_raiz = vivas & (np.broadcast_to(discriminante, vivas.shape) < 0)
+            negativos = np.broadcast_to(discriminante, vivas.shape)[sin_raiz]
+            _marcar(indices[sin_raiz], ESTADO_DISCRIMINANTE_NEGATIVO,
+                    lambda k, d=negativos: ErrorDiscriminanteNegativo(float(d[k])), estado, fallos)
+        # Un resultado no finito solo sale de dividir entre cero (o de 0/0)
+        indefinido = vivas & ~sin_raiz & ~np.isfinite(valores)
+        _marcar(indices[indefinido], ESTADO_DIVISION_CERO,
+                lambda k, variable=paso.variable: ErrorDivisionPorCeroFisica(variable), estado, fallos)
+        vivas &= ~(sin_raiz | indefinido)
+        if paso.no_negativo:
+            negativo = vivas & (valores < 0)
+            _marcar(indices[negativo], ESTADO_VALOR_NEGATIVO,
+                    lambda k, v=valores[negativo]: ErrorValorNegativo(float(v[k])), estado, fallos)
+            vivas &= ~negativo
+        locales[paso.variable] = valores
+
+    for paso in plan.pasos:
+        if filas is None:
+            np.copyto(columnas[paso.variable], locales[paso.variable], where=vivas)
+        else:
+            columnas[paso.variable][filas[vivas]] = locales[paso.variable][vivas]
+
+
+def _datos_insuficientes(modelo: Modelo, plan: PlanDespeje) -> ValidationError:
+    return ValidationError(
+        f"Datos insuficientes para resolver el ensayo {modelo.tipo}: no se puede despejar {', '.join(plan.sin_despejar)}."
+    )
+
+
+def resolver_fila(tipo: str, valores: dict) -> dict[str, float]:
+    """Un solo ensayo (None = incógnita) con el mismo plan que `resolver_lote`.
+
+    Trabaja con escalares en lugar de arreglos de largo 1 y lanza el error de
+    la fila en vez de reportarlo.
+    """
+    modelo = obtener_modelo(tipo)
+    fila = {}
+    for variable in modelo.variables:
+        valor = valores.get(variable)
+        if valor is None:
+            valor = modelo.opcionales.get(variable, math.nan)
+        if valor < 0:
+            raise ErrorValorNegativo(valor)
+        fila[variable] = np.float64(valor)
+
+    plan = modelo.plan(v for v, valor in fila.items() if math.isnan(valor))
+    if not plan.resoluble:
+        raise _datos_insuficientes(modelo, plan)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for paso in plan.pasos:
+            if paso.discriminante is not None and (discriminante := float(paso.discriminante(fila))) < 0:
+                raise ErrorDiscriminanteNegativo(discriminante)
+            valor = float(paso.calcular(fila))
+            if not math.isfinite(valor):
+                raise ErrorDivisionPorCeroFisica(paso.variable)
+            if paso.no_negativo and valor < 0:
+                raise ErrorValorNegativo(valor)
+            fila[paso.variable] = np.float64(valor)
+    return {variable: float(valor) for variable, valor in fila.items()}
+
+
+def resolver_lote(tipo: str | Modelo, columnas: dict) -> ResultadoLote:
+    """Despeja las incógnitas (NaN) de cada fila con el plan precompilado de su patrón.
+
+    Las filas se agrupan por patrón de variables faltantes; cada grupo pasa por
+    su plan en una sola pasada vectorizada. Las variables opcionales del modelo
+    que falten toman su valor por defecto.
+    """
+    modelo = tipo if isinstance(tipo, Modelo) else obtener_modelo(tipo)
+    faltantes = [v for v in modelo.variables if columnas.get(v) is None and v not in modelo.opcionales]
+    if faltantes:
+        raise ValueError(f"Faltan columnas de {modelo.tipo}: {', '.join(faltantes)}.")
+    columnas = {v: a_columna(columnas[v]) for v in modelo.variables if columnas.get(v) is not None}
+    largo = next(iter(columnas.values())).shape
+    for variable, defecto in modelo.opcionales.items():
+        columnas[variable] = np.nan_to_num(columnas[variable], nan=defecto) if variable in columnas else np.full(largo, defecto)
+    columnas = {v: columnas[v] for v in modelo.variables}
+    if len({c.shape for c in columnas.values()}) != 1 or len(largo) != 1:
+        raise ValueError("Las columnas del lote deben ser unidimensionales y del mismo largo.")
+
+    estado = np.zeros(largo, dtype=np.int8)
+    fallos: dict[int, AppError] = {}
+    _marcar_negativos(columnas, estado, fallos)
+
+    patrones = modelo.patrones(columnas)
+    # Patrones presentes entre las filas aún válidas (hay a lo sumo 2^variables)
+    presentes = np.flatnonzero(np.bincount(patrones[estado == ESTADO_OK], minlength=1))
+    for patron in presentes.tolist():
+        plan = modelo.planes[patron]
+        if len(presentes) == 1 and not fallos:
+            filas = None  # Caso común (lotes homogéneos, Monte Carlo): sin copiar columnas
+        else:
+            filas = np.flatnonzero((patrones == patron) & (estado == ESTADO_OK))
+        if plan.resoluble:
+            _ejecutar_plan(plan, columnas, filas, estado, fallos)
+            continue
+        error = _datos_insuficientes(modelo, plan)
+        _marcar(np.flatnonzero(estado == ESTADO_OK) if filas is None else filas,
+                ESTADO_DATOS_INSUFICIENTES, lambda k, e=error: e, estado, fallos)
+
+    return ResultadoLote(columnas=columnas, estado=estado, fallos=fallos)
+
+
+def resolver_mru_lote(distancia, velocidad, tiempo) -> ResultadoLote:
+    """Despeja la variable faltante de cada fila MRU (d = v * t)."""
+    return resolver_lote("MRU", {"distancia": distancia, "velocidad": velocidad, "tiempo": tiempo})
+
+
+def resolver_mrua_lote(posicion_inicial, posicion_final, aceleracion, tiempo,
+                       velocidad_inicial, velocidad_final) -> ResultadoLote:
+    """Resuelve un lote MRUA; la posición inicial desconocida se toma como 0, igual que en `MRUASchema`."""
+    return resolver_lote("MRUA", {
+        "posicion_inicial": posicion_inicial, "posicion_final": posicion_final, "aceleracion": aceleracion,
+        "tiempo": tiempo, "velocidad_inicial": velocidad_inicial, "velocidad_final": velocidad_final,
+    })
@@ -0,0 +1,174 @@
+"""
+Caché en memoria LRU con expiración (TTL) para lecturas de experimentos.
+
+Los experimentos no cambian una vez creados, así que listados y detalles se
+pueden servir desde memoria. El servicio invalida las entradas afectadas al
+crear o borrar; el TTL acota lo desactualizado que puede quedar un proceso
+cuando otro worker es quien escribe.
+
+Las claves son tuplas cuyo primer elemento es el grupo (p. ej. ("detalle", 5)),
+lo que permite invalidar un grupo completo de una vez.
+
+`get` y `set` copian los valores: quien modifica un resultado no altera la
+entrada cacheada. Cada invalidación avanza la generación de su grupo; una
+lectura que empezó antes (`generacion` tomada al inicio) no vuelve a guardar
+su resultado, ya desactualizado.
+"""
+
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from src.core.config import settings
+
+
+class LRUTTLCache:
+    """Caché acotada por cantidad de entradas y por antigüedad.
+
+    Args:
+        max_entradas: Entradas máximas; al superarlas se desaloja la menos usada.
+        ttl: Segundos que una entrada sigue siendo válida.
+        copiar: Copiar los valores al guardar y al leer (desactivar solo para valores inmutables).
+        max_bytes: Presupuesto de memoria; requiere `tamano`, que estima los bytes de un valor.
+    """
+
+    def __init__(
+        self, max_entradas: int, ttl: float, copiar: bool = True,
+        max_bytes: int | None = None, tamano: Callable[[Any], int] | None = None,
+    ) -> None:
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.copiar = copiar
+        self.max_bytes = max_bytes
+        self.tamano = tamano
+        self.bytes = 0
+        self._datos: OrderedDict[Hashable, tuple[float, Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generaciones: dict[Hashable, int] = {}
+        self._epoca = 0   # Avanza con `limpiar`, que invalida todos los grupos
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.expiraciones = 0
+        self.invalidaciones = 0
+
+    def get(self, clave: Hashable) -> Any | None:
+        """Retorna el valor vigente o None (y cuenta el acierto/fallo)."""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and entrada[0] < time.monotonic():
+                self._quitar(clave)
+                self.expiraciones += 1
+                entrada = None
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            valor = entrada[1]
+        return copy.deepcopy(valor) if self.copiar else valor
+
+    @staticmethod
+    def _grupo(clave: Hashable) -> Hashable:
+        return clave[0] if isinstance(clave, tuple) and clave else clave
+
+    def generacion(self, grupo: Hashable) -> int:
+        """Marca a tomar antes de leer del repositorio y pasar luego a `set`."""
+        with self._lock:
+            return self._epoca + self._generaciones.get(grupo, 0)
+
+    def _avanzar(self, grupo: Hashable) -> None:
+        self._generaciones[grupo] = self._generaciones.get(grupo, 0) + 1
+
+    def _quitar(self, clave: Hashable) -> tuple[float, Any, int] | None:
+        entrada = self._datos.pop(clave, None)
+        if entrada is not None:
+            self.bytes -= entrada[2]
+        return entrada
+
+    def set(self, clave: Hashable, valor: Any, generacion: int | None = None) -> None:
+        """Guarda `valor`; con `generacion`, solo si su grupo no se invalidó desde entonces."""
+        peso = self.tamano(valor) if self.tamano is not None else 0
+        if self.max_bytes is not None and peso > self.max_bytes:
+            return  # No entra ni vaciando la caché
+        if self.copiar:
+            valor = copy.deepcopy(valor)
+        with self._lock:
+            if generacion is not None and generacion != self._epoca + self._generaciones.get(self._grupo(clave), 0):
+                return
+            self._quitar(clave)
+            self._datos[clave] = (time.monotonic() + self.ttl, valor, peso)
+            self.bytes += peso
+            while len(self._datos) > self.max_entradas or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                self._quitar(next(iter(self._datos)))
+                self.desalojos += 1
+
+    def invalidar(self, clave: Hashable) -> None:
+        with self._lock:
+            self._avanzar(self._grupo(clave))
+            if self._quitar(clave) is not None:
+                self.invalidaciones += 1
+
+    def invalidar_grupo(self, grupo: str) -> None:
+        """Elimina todas las claves cuyo primer elemento es `grupo`."""
+        with self._lock:
+            self._avanzar(grupo)
+            for clave in [c for c in self._datos if isinstance(c, tuple) and c and c[0] == grupo]:
+                self._quitar(clave)
+                self.invalidaciones += 1
+
+    def invalidar_prefijo(self, *prefijo: Hashable) -> None:
+        """Elimina las claves que empiezan con `prefijo` (p. ej. ("trayectoria", 5))."""
+        with self._lock:
+            self._avanzar(prefijo[0])
+            for clave in [c for c in self._datos if isinstance(c, tuple) and c[:len(prefijo)] == prefijo]:
+                self._quitar(clave)
+                self.invalidaciones += 1
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._epoca += 1
+            self._datos.clear()
+            self.bytes = 0
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._datos),
+                "max_entradas": self.max_entradas,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_segundos": self.ttl,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "desalojos": self.desalojos,
+                "expiraciones": self.expiraciones,
+                "invalidaciones": self.invalidaciones,
+            }
+
+
+@functools.cache
+def get_experiment_cache() -> LRUTTLCache:
+    """Caché compartida por todas las instancias del servicio dentro del proceso (se crea en el primer uso)."""
+    return LRUTTLCache(settings.cache_max_entries, settings.cache_ttl_seconds)
+
+
+def bytes_curvas(curvas: dict) -> int:
+    return sum(getattr(columna, "nbytes", 0) for columna in curvas.values())
+
+
+@functools.cache
+def get_trajectory_cache() -> LRUTTLCache:
+    """Caché de trayectorias muestreadas, acotada en bytes: cada resolución puede pesar megabytes.
+
+    Los arreglos se guardan sin copiar y de solo lectura.
+    """
+    return LRUTTLCache(
+        settings.cache_max_entries, settings.cache_ttl_seconds, copiar=False,
+        max_bytes=settings.trajectory_cache_mb * 1024 * 1024, tamano=bytes_curvas,
+    )
@@ -0,0 +1,57 @@
+"""
+Codificación del historial para `GET /experiments/export`.
+
+El servicio recorre la tabla por páginas keyset (con el detalle unido) y cada
+página se codifica y se entrega apenas llega, así que la memoria usada no
+depende del tamaño del historial.
+
+    ndjson  -> un experimento por línea, con su detalle anidado
+    csv     -> una fila plana por experimento: columnas del maestro y la unión de
+               las columnas físicas de todos los tipos (vacías si no aplican)
+    parquet -> las mismas columnas planas, un row group por página (requiere pyarrow)
+    arrow   -> stream IPC de Arrow, un lote por página (requiere pyarrow)
+"""
+
+import csv
+import io
+import json
+from typing import Literal
+
+from src.services.tablas import (
+    COLUMNAS_PLANAS,
+    MEDIA_TABLA,
+    CodificadorTabla,
+    fila_plana,
+)
+
+FormatoExportacion = Literal["ndjson", "csv", "parquet", "arrow"]
+
+MEDIA_EXPORTACION = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8", **MEDIA_TABLA}
+
+
+class CodificadorTexto:
+    """NDJSON o CSV: cada página se codifica de forma independiente."""
+
+    def __init__(self, formato: FormatoExportacion) -> None:
+        self.formato = formato
+
+    def inicio(self) -> str:
+        return _escribir_csv([COLUMNAS_PLANAS]) if self.formato == "csv" else ""
+
+    def pagina(self, pagina: list[dict]) -> str:
+        if self.formato == "csv":
+            return _escribir_csv(fila_plana(exp) for exp in pagina)
+        return "".join(json.dumps(exp, ensure_ascii=False, separators=(",", ":")) + "\n" for exp in pagina)
+
+    def cerrar(self) -> str:
+        return ""
+
+
+def crear_codificador(formato: FormatoExportacion) -> CodificadorTexto | CodificadorTabla:
+    return CodificadorTabla(formato) if formato in MEDIA_TABLA else CodificadorTexto(formato)
+
+
+def _escribir_csv(filas) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(filas)
+    return buffer.getvalue()
@@ -0,0 +1,181 @@
+"""
+Ajuste de MRU/MRUA a una serie medida de posición contra tiempo.
+
+Una serie (t, x) de un sensor se ajusta por mínimos cuadrados lineales a
+    MRU  -> x(t) = x0 + v·t
+    MRUA -> x(t) = x0 + v0·t + a·t²/2
+con t medido desde la primera muestra. Los parámetros se reportan con su
+error estándar, junto con R², el RMSE y el residuo máximo.
+
+El tiempo se lleva a τ ∈ [-1, 1] (centrado y escalado) para que las
+ecuaciones normales queden bien condicionadas aunque el sensor use tiempos
+absolutos grandes. La matriz de Gram (p × p) y el momento (p) se acumulan
+recorriendo la serie en bloques de `PUNTOS_POR_BLOQUE` con NumPy, y una
+segunda pasada calcula los residuos de forma explícita (restar sumas de
+cuadrados perdería precisión justo cuando el ajuste es muy bueno). La
+memoria adicional es la de un bloque, sin importar el largo de la serie.
+
+Formatos de entrada de la serie:
+    json    -> {"t": [...], "x": [...]}
+    npy     -> arreglo de forma (2, n): fila 0 = t, fila 1 = x (como las respuestas columnares)
+    parquet -> columnas `t` y `x` (requiere `pyarrow`)
+    arrow   -> stream IPC con columnas `t` y `x` (requiere `pyarrow`)
+"""
+
+import io
+import json
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+
+from src.core.exceptions import ValidationError
+
+FormatoSerie = Literal["json", "npy", "parquet", "arrow"]
+
+# Grado del polinomio de cada modelo y nombre de sus parámetros (en orden de potencia de t)
+GRADOS = {"MRU": 1, "MRUA": 2}
+PARAMETROS_AJUSTE = {
+    "MRU": ("posicion_inicial", "velocidad"),
+    "MRUA": ("posicion_inicial", "velocidad_inicial", "aceleracion"),
+}
+
+PUNTOS_POR_BLOQUE = 1_048_576
+MAX_PUNTOS_SERIE = 10_000_000
+
+
+def leer_serie(contenido: bytes, formato: FormatoSerie) -> tuple[np.ndarray, np.ndarray]:
+    """Columnas t y x de la serie como float64."""
+    if formato == "json":
+        try:
+            datos = json.loads(contenido)
+            t, x = np.asarray(datos["t"], dtype=np.float64), np.asarray(datos["x"], dtype=np.float64)
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValidationError(f"La serie JSON debe ser {{\"t\": [...], \"x\": [...]}} numérica: {e}")
+    elif formato == "npy":
+        try:
+            arreglo = np.load(io.BytesIO(contenido), allow_pickle=False)
+        except ValueError as e:
+            raise ValidationError(f"El archivo no es un npy válido: {e}")
+        if arreglo.ndim != 2 or arreglo.shape[0] != 2:
+            raise ValidationError(f"El npy debe tener forma (2, n) con t y x; llegó {arreglo.shape}.")
+        t, x = arreglo.astype(np.float64, copy=False)
+    else:
+        from src.services.tablas import abrir_tabla, columna_float64
+
+        tabla = abrir_tabla(contenido, formato)
+        faltantes = [c for c in ("t", "x") if c not in tabla.column_names]
+        if faltantes:
+            raise ValidationError(f"Faltan columnas de la serie: {', '.join(faltantes)}.")
+        t, x = columna_float64(tabla, "t"), columna_float64(tabla, "x")
+
+    if t.ndim != 1 or t.shape != x.shape:
+        raise ValidationError("t y x deben ser listas del mismo largo.")
+    if len(t) > MAX_PUNTOS_SERIE:
+        raise ValidationError(f"La serie tiene {len(t)} puntos y el máximo es {MAX_PUNTOS_SERIE}.")
+    if not (np.isfinite(t).all() and np.isfinite(x).all()):
+        raise ValidationError("La serie no puede tener valores nulos, NaN ni infinitos.")
+    return t, x
+
+
+@dataclass
+class Ajuste:
+    tipo: str
+    puntos: int
+    t_inicio: float
+    t_fin: float
+    parametros: dict[str, float]
+    errores: dict[str, float]       # Error estándar de cada parámetro
+    r2: float
+    rmse: float
+    residuo_max: float | None      # None en el ajuste en vivo, que no guarda las muestras
+    residuos: np.ndarray | None = None
+
+    def detalle(self) -> dict:
+        """Variables del experimento equivalente, sobre la duración de la serie."""
+        duracion = self.t_fin - self.t_inicio
+        p = self.parametros
+        if self.tipo == "MRU":
+            return {"distancia": p["velocidad"] * duracion, "velocidad": p["velocidad"], "tiempo": duracion}
+        return {
+            "posicion_inicial": p["posicion_inicial"],
+            "posicion_final": p["posicion_inicial"] + p["velocidad_inicial"] * duracion + 0.5 * p["aceleracion"] * duracion**2,
+            "aceleracion": p["aceleracion"],
+            "tiempo": duracion,
+            "velocidad_inicial": p["velocidad_inicial"],
+            "velocidad_final": p["velocidad_inicial"] + p["aceleracion"] * duracion,
+        }
+
+    def resumen(self) -> dict:
+        return {
+            "tipo": self.tipo,
+            "puntos": self.puntos,
+            "t_inicio": self.t_inicio,
+            "t_fin": self.t_fin,
+            "parametros": self.parametros,
+            "errores_estandar": self.errores,
+            "r2": self.r2,
+            "rmse": self.rmse,
+            "residuo_max": self.residuo_max,
+        }
+
+
+def _bloques(n: int):
+    for inicio in range(0, n, PUNTOS_POR_BLOQUE):
+        yield slice(inicio, min(inicio + PUNTOS_POR_BLOQUE, n))
+
+
+def ajustar(tipo: str, t: np.ndarray, x: np.ndarray, con_residuos: bool = False) -> Ajuste:
+    """Mínimos cuadrados de `x(t)` con el polinomio del modelo, en dos pasadas por bloques."""
+    p = GRADOS[tipo] + 1
+    n = len(t)
+    if n <= p:
+        raise ValidationError(f"El ajuste de {tipo} necesita al menos {p + 1} puntos.")
+    t_inicio, t_fin = float(t.min()), float(t.max())
+    # Con p coeficientes hacen falta p instantes distintos
+    if t_inicio == t_fin or (p == 3 and not np.any((t > t_inicio) & (t < t_fin))):
+        raise ValidationError(f"El ajuste de {tipo} necesita al menos {p} instantes distintos.")
+
+    centro, escala = (t_inicio + t_fin) / 2, (t_fin - t_inicio) / 2
+    gram, momento = np.zeros((p, p)), np.zeros(p)
+    for bloque in _bloques(n):
+        potencias = np.vander((t[bloque] - centro) / escala, p, increasing=True)
+        gram += potencias.T @ potencias
+        momento += potencias.T @ x[bloque]
+    try:
+        coeficientes = np.linalg.solve(gram, momento)
+    except np.linalg.LinAlgError:
+        raise ValidationError(f"La serie no permite ajustar un {tipo}: tiempos degenerados.")
+
+    media_x = float(x.mean())
+    ss_res = ss_tot = residuo_max = 0.0
+    residuos = np.empty(n) if con_residuos else None
+    for bloque in _bloques(n):
+        potencias = np.vander((t[bloque] - centro) / escala, p, increasing=True)
+        r = x[bloque] - potencias @ coeficientes
+        ss_res += float(r @ r)
+        ss_tot += float(np.square(x[bloque] - media_x).sum())
+        residuo_max = max(residuo_max, float(np.abs(r).max()))
+        if residuos is not None:
+            residuos[bloque] = r
+
+    # Parámetros físicos en t = t_inicio (τ = -1) como combinación lineal de los coeficientes en τ
+    if p == 2:
+        jacobiano = np.array([[1.0, -1.0], [0.0, 1.0 / escala]])
+    else:
+        jacobiano = np.array([[1.0, -1.0, 1.0], [0.0, 1.0 / escala, -2.0 / escala], [0.0, 0.0, 2.0 / escala**2]])
+    valores = jacobiano @ coeficientes
+    covarianza = ss_res / (n - p) * (jacobiano @ np.linalg.inv(gram) @ jacobiano.T)
+    nombres = PARAMETROS_AJUSTE[tipo]
+    return Ajuste(
+        tipo=tipo,
+        puntos=n,
+        t_inicio=t_inicio,
+        t_fin=t_fin,
+        parametros={nombre: float(v) for nombre, v in zip(nombres, valores)},
+        errores={nombre: float(np.sqrt(max(c, 0.0))) for nombre, c in zip(nombres, np.diag(covarianza))},
+        r2=1.0 - ss_res / ss_tot if ss_tot > 0 else 1.0,
+        rmse=float(np.sqrt(ss_res / n)),
+        residuo_max=residuo_max,
+        residuos=residuos,
+    )
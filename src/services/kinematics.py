@@ -0,0 +1,120 @@
+"""
+Curvas de posición, velocidad y aceleración de un experimento guardado.
+
+Todas las curvas salen de la misma ecuación de MRUA,
+
+    x(t) = x0 + v0·t + ½·a·t²      v(t) = v0 + a·t      a(t) = a
+
+donde un MRU es el caso a = 0 y x0 = 0. Los parámetros se pueden pasar como
+escalares o como arreglos: con forma (n, 1) frente a un `t` de forma (m,),
+NumPy evalúa n experimentos sobre la misma malla de tiempo en una sola pasada.
+"""
+
+import numpy as np
+
+from src.core.exceptions import ValidationError
+
+COLUMNAS_TRAYECTORIA = ("t", "x", "v", "a")
+
+# Límites de resolución de GET /experiments/{id}/trajectory
+PUNTOS_POR_DEFECTO = 100
+MAX_PUNTOS = 100_000
+
+
+def _valor(detalle: dict, campo: str) -> float:
+    return float(detalle.get(campo) or 0)
+
+
+def parametros_movimiento(tipo: str, detalle: dict) -> tuple[float, float, float, float]:
+    """(x0, v0, a, tiempo) de la fila física guardada; los campos nulos cuentan como 0."""
+    if tipo == "MRUA":
+        return (
+            _valor(detalle, "posicion_inicial"),
+            _valor(detalle, "velocidad_inicial"),
+            _valor(detalle, "aceleracion"),
+            _valor(detalle, "tiempo"),
+        )
+    return 0.0, _valor(detalle, "velocidad"), 0.0, _valor(detalle, "tiempo")
+
+
+def intervalo_por_defecto(tiempo: float) -> tuple[float, float]:
+    # Mismo rango que graficaban las páginas: al menos un segundo
+    return 0.0, max(tiempo, 1.0)
+
+
+def malla_tiempo(t0: float, t1: float, puntos: int) -> np.ndarray:
+    if not t1 > t0:
+        raise ValidationError(f"El intervalo de tiempo es vacío: t0={t0}, t1={t1}.")
+    if not 2 <= puntos <= MAX_PUNTOS:
+        raise ValidationError(f"La cantidad de puntos debe estar entre 2 y {MAX_PUNTOS}.")
+    return np.linspace(t0, t1, puntos)
+
+
+def evaluar(x0, v0, a, t: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """x, v, a sobre `t`, con broadcasting entre parámetros y malla."""
+    x0, v0, a = np.asarray(x0, dtype=float), np.asarray(v0, dtype=float), np.asarray(a, dtype=float)
+    x = x0 + t * (v0 + 0.5 * a * t)
+    v = v0 + a * t
+    return x, v, np.broadcast_to(a, v.shape)
+
+
+def muestrear_trayectoria(
+    tipo: str, detalle: dict, puntos: int = PUNTOS_POR_DEFECTO, t0: float | None = None, t1: float | None = None,
+) -> dict[str, np.ndarray]:
+    """Columnas t, x, v, a de un experimento (de solo lectura, aptas para cachear)."""
+    x0, v0, a, tiempo = parametros_movimiento(tipo, detalle)
+    inicio, fin = intervalo_por_defecto(tiempo)
+    t = malla_tiempo(inicio if t0 is None else t0, fin if t1 is None else t1, puntos)
+    x, v, acc = evaluar(x0, v0, a, t)
+
+    columnas = dict(zip(COLUMNAS_TRAYECTORIA, (t, x, v, np.ascontiguousarray(acc))))
+    for columna in columnas.values():
+        columna.flags.writeable = False
+    return columnas
+
+
+# Celdas (experimentos × puntos) máximas por comparación, para acotar la memoria
+MAX_CELDAS_COMPARACION = 5_000_000
+
+
+def curvas_superpuestas(
+    experimentos: list[dict], puntos: int, t0: float | None = None, t1: float | None = None,
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Evalúa x, v, a de n experimentos sobre una malla común: arreglos de forma (n, puntos).
+
+    Por defecto la malla cubre desde 0 hasta el ensayo más largo.
+    """
+    if len(experimentos) * puntos > MAX_CELDAS_COMPARACION:
+        raise ValidationError(
+            f"La comparación excede {MAX_CELDAS_COMPARACION} celdas (experimentos × puntos); reduce 'points'."
+        )
+    parametros = np.array([parametros_movimiento(e["tipo"], e["detalle"]) for e in experimentos]).reshape(-1, 4)
+    x0, v0, a, tiempo = (parametros[:, [i]] for i in range(4))
+    _, fin = intervalo_por_defecto(float(tiempo.max(initial=0.0)))
+    t = malla_tiempo(0.0 if t0 is None else t0, fin if t1 is None else t1, puntos)
+    x, v, acc = evaluar(x0, v0, a, t)
+    return t, {"x": x, "v": v, "a": np.ascontiguousarray(acc)}
+
+
+def decimar_min_max(t: np.ndarray, curvas: dict[str, np.ndarray], max_puntos: int) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Reduce cada fila a un mínimo y un máximo por cubeta, conservando la envolvente.
+
+    Las cubetas son comunes a todas las filas, así que la malla de salida sigue
+    siendo compartida: por cubeta se emiten su primer y su último instante, con
+    el mínimo y el máximo en el orden en que la curva los recorre.
+    """
+    if t.size <= max_puntos:
+        return t, curvas
+    bordes = np.linspace(0, t.size, max_puntos // 2 + 1).astype(np.intp)
+    inicios, finales = bordes[:-1], bordes[1:] - 1
+    t_decimado = np.column_stack([t[inicios], t[finales]]).ravel()
+
+    decimadas = {}
+    for nombre, y in curvas.items():
+        minimo = np.minimum.reduceat(y, inicios, axis=1)
+        maximo = np.maximum.reduceat(y, inicios, axis=1)
+        sube = y[:, finales] >= y[:, inicios]
+        decimadas[nombre] = np.stack(
+            [np.where(sube, minimo, maximo), np.where(sube, maximo, minimo)], axis=-1
+        ).reshape(y.shape[0], -1)
+    return t_decimado, decimadas
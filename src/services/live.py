@@ -0,0 +1,150 @@
+"""
+Ajuste en vivo de MRU/MRUA a muestras que llegan de un sensor.
+
+`AjusteIncremental` guarda solo las sumas de las ecuaciones normales
+(Σtᵏ, Σtᵏ·x y Σx²), así que agregar un lote cuesta O(1) por muestra y la
+memoria no crece con la duración del ensayo. t y x se miden desde la primera
+muestra recibida (los tiempos absolutos del sensor no pierden precisión al
+elevarlos a la cuarta) y el sistema se escala por la duración antes de
+resolverlo. A diferencia de `fitting.ajustar`, el residuo sale de las sumas
+(Σx² − c·m), que basta para seguir la convergencia; el residuo máximo no se
+conoce sin las muestras.
+
+Una `SesionEnVivo` publica el estado del ajuste a sus suscriptores. Cada
+suscriptor tiene una cola de un solo mensaje: si no alcanza a leer, recibe
+el estado más reciente en lugar de acumular los intermedios. Las sesiones
+viven en la memoria del proceso (con varios workers, los suscriptores deben
+llegar al mismo que recibe las muestras).
+"""
+
+import asyncio
+import uuid
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.services.fitting import GRADOS, PARAMETROS_AJUSTE, Ajuste
+
+# Número de condición a partir del cual los parámetros aún no están determinados
+# (p. ej. un MRUA con muestras en solo dos instantes)
+MAX_CONDICION = 1e10
+
+
+class AjusteIncremental:
+    """Sumas de mínimos cuadrados de un MRU/MRUA, actualizables por lotes."""
+
+    def __init__(self, tipo: str) -> None:
+        self.tipo = tipo
+        self.p = GRADOS[tipo] + 1
+        self.potencias = np.zeros(2 * self.p - 1)   # Σ tᵏ, k = 0 .. 2(p-1)
+        self.momentos = np.zeros(self.p)            # Σ tᵏ·x, k = 0 .. p-1
+        self.suma_x2 = 0.0
+        self.t_ref: float | None = None
+        self.x_ref = 0.0
+        self.t_max = 0.0                            # Mayor t relativo recibido
+
+    @property
+    def puntos(self) -> int:
+        return int(self.potencias[0])
+
+    def agregar(self, t: np.ndarray, x: np.ndarray) -> None:
+        if len(t) == 0:
+            return
+        if self.t_ref is None:
+            self.t_ref, self.x_ref = float(t[0]), float(x[0])
+        tr, xr = t - self.t_ref, x - self.x_ref
+        potencias = np.vander(tr, 2 * self.p - 1, increasing=True)
+        self.potencias += potencias.sum(axis=0)
+        self.momentos += xr @ potencias[:, :self.p]
+        self.suma_x2 += float(xr @ xr)
+        self.t_max = max(self.t_max, float(tr.max()))
+
+    def ajuste(self) -> Ajuste | None:
+        """Ajuste con las muestras recibidas, o None si todavía no determinan los parámetros."""
+        n = self.puntos
+        if n <= self.p or self.t_max <= 0:
+            return None
+        # Escalar t por la duración deja la matriz de Gram en el orden de n
+        escala = self.t_max ** np.arange(2 * self.p - 1)
+        indices = np.add.outer(np.arange(self.p), np.arange(self.p))
+        gram = self.potencias[indices] / escala[indices]
+        momento = self.momentos / escala[:self.p]
+        if np.linalg.cond(gram) > MAX_CONDICION:
+            return None
+        coeficientes = np.linalg.solve(gram, momento)
+
+        ss_res = max(self.suma_x2 - float(coeficientes @ momento), 0.0)
+        ss_tot = max(self.suma_x2 - self.momentos[0] ** 2 / n, 0.0)
+        # x = x_ref + Σ cₖ·(t/T)ᵏ  ->  x0, v y a (= 2·c₂/T²)
+        jacobiano = np.diag([1.0, 1.0, 2.0][:self.p] / escala[:self.p])
+        valores = jacobiano @ coeficientes + np.eye(self.p)[0] * self.x_ref
+        covarianza = ss_res / (n - self.p) * (jacobiano @ np.linalg.inv(gram) @ jacobiano.T)
+        nombres = PARAMETROS_AJUSTE[self.tipo]
+        return Ajuste(
+            tipo=self.tipo,
+            puntos=n,
+            t_inicio=self.t_ref,
+            t_fin=self.t_ref + self.t_max,
+            parametros={nombre: float(v) for nombre, v in zip(nombres, valores)},
+            errores={nombre: float(np.sqrt(max(c, 0.0))) for nombre, c in zip(nombres, np.diag(covarianza))},
+            r2=1.0 - ss_res / ss_tot if ss_tot > 0 else 1.0,
+            rmse=float(np.sqrt(ss_res / n)),
+            residuo_max=None,
+        )
+
+
+@dataclass
+class SesionEnVivo:
+    id: str
+    tipo: str
+    nombre: str
+    acumulado: AjusteIncremental
+    suscriptores: set[asyncio.Queue] = field(default_factory=set)
+    final: dict | None = None   # Último mensaje, para quien se suscriba después del cierre
+
+    def estado(self) -> dict:
+        ajuste = self.acumulado.ajuste()
+        resumen = ajuste.resumen() if ajuste is not None else {"tipo": self.tipo, "puntos": self.acumulado.puntos, "parametros": None}
+        return {"evento": "ajuste", "sesion": self.id, "nombre": self.nombre, **resumen}
+
+    def publicar(self, mensaje: dict) -> None:
+        if mensaje["evento"] == "fin":
+            self.final = mensaje
+        for cola in self.suscriptores:
+            # Solo interesa el estado más reciente: se reemplaza el que no se alcanzó a leer
+            if cola.full():
+                cola.get_nowait()
+            cola.put_nowait(mensaje)
+
+    def suscribir(self) -> asyncio.Queue:
+        cola: asyncio.Queue = asyncio.Queue(maxsize=1)
+        cola.put_nowait(self.final or self.estado())
+        self.suscriptores.add(cola)
+        return cola
+
+    def desuscribir(self, cola: asyncio.Queue) -> None:
+        self.suscriptores.discard(cola)
+
+
+_sesiones: dict[str, SesionEnVivo] = {}
+
+
+def abrir_sesion(tipo: str, nombre: str) -> SesionEnVivo:
+    sesion = SesionEnVivo(uuid.uuid4().hex, tipo, nombre, AjusteIncremental(tipo))
+    _sesiones[sesion.id] = sesion
+    return sesion
+
+
+def obtener_sesion(sesion_id: str) -> SesionEnVivo | None:
+    return _sesiones.get(sesion_id)
+
+
+def cerrar_sesion(sesion_id: str) -> None:
+    _sesiones.pop(sesion_id, None)
+
+
+def sesiones_activas() -> list[dict]:
+    return [
+        {"sesion": s.id, "tipo": s.tipo, "nombre": s.nombre, "puntos": s.acumulado.puntos, "suscriptores": len(s.suscriptores)}
+        for s in _sesiones.values()
+    ]
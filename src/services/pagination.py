@@ -0,0 +1,56 @@
+"""
+Paginación keyset del listado de experimentos.
+
+El cursor es opaco para el cliente: codifica en base64 (URL-safe) la clave
+`(fecha_creacion, id)` de la última fila entregada. La página siguiente pide
+las filas estrictamente menores a esa clave, así que su costo no crece con la
+profundidad (a diferencia de OFFSET) y no repite ni salta filas si se insertan
+experimentos nuevos mientras se recorre el listado.
+"""
+
+import base64
+import json
+from datetime import datetime, timezone
+
+from src.core.exceptions import ValidationError
+from src.storage.experiment_repository import COLUMNAS_MAESTRO
+
+# Columnas que la paginación necesita siempre, aunque no se pidan en `fields=`
+COLUMNAS_CLAVE = ("id", "fecha_creacion")
+
+
+def codificar_cursor(fila: dict) -> str:
+    clave = json.dumps([fila["fecha_creacion"], fila["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(clave.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        fecha, ultimo_id = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        datetime.fromisoformat(fecha)
+        return fecha, int(ultimo_id)
+    except (ValueError, TypeError) as e:
+        raise ValidationError(f"Cursor de paginación inválido: {cursor!r}") from e
+
+
+def columnas_proyectadas(fields: str | None) -> tuple[str, ...]:
+    """Valida `fields=` (separados por coma) y agrega las columnas de la clave."""
+    if not fields:
+        return COLUMNAS_MAESTRO
+    pedidas = {campo.strip() for campo in fields.split(",") if campo.strip()}
+    desconocidas = pedidas - set(COLUMNAS_MAESTRO)
+    if desconocidas:
+        raise ValidationError(
+            f"Campos desconocidos: {', '.join(sorted(desconocidas))}. Permitidos: {', '.join(COLUMNAS_MAESTRO)}"
+        )
+    return tuple(c for c in COLUMNAS_MAESTRO if c in pedidas or c in COLUMNAS_CLAVE)
+
+
+def normalizar_fecha(fecha: datetime | None) -> str | None:
+    """Fecha en UTC con el mismo formato ISO que guardan las bases (comparable como texto)."""
+    if fecha is None:
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return fecha.astimezone(timezone.utc).isoformat(timespec="milliseconds")
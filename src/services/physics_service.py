@@ -1,73 +1,655 @@
-from src.storage.experiment_repository import ExperimentRepository
-from src.core.exceptions import ErrorDivisionPorCeroFisica, ErrorDiscriminanteNegativo
-from src.schemas.mru import MRUSchema
-from src.schemas.mrua import MRUASchema
+import asyncio
+import functools
+from collections.abc import Callable, Generator
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Iterator
+
+import numpy as np
+from pydantic import BaseModel
+
+from src.core.exceptions import ErrorFisica, ValidationError
+from src.schemas.batch import LoteSchema
 from src.schemas.experiment import ExperimentCreate
+from src.schemas.mru import MRULoteSchema, MRUSchema
+from src.schemas.mrua import MRUALoteSchema, MRUASchema
+from src.schemas.uncertainty import IncertidumbreSchema
+from src.services.batch_solver import ResultadoLote, resolver_fila, resolver_lote
+from src.services.cache import LRUTTLCache, get_experiment_cache, get_trajectory_cache
+from src.services.export import FormatoExportacion, crear_codificador
+from src.services.fitting import Ajuste, FormatoSerie, ajustar, leer_serie
+from src.services.kinematics import (
+    COLUMNAS_TRAYECTORIA,
+    PUNTOS_POR_DEFECTO,
+    curvas_superpuestas,
+    decimar_min_max,
+    muestrear_trayectoria,
+)
+from src.services.pagination import (
+    codificar_cursor,
+    columnas_proyectadas,
+    decodificar_cursor,
+    normalizar_fecha,
+)
+from src.services.series import (
+    PrecisionSerie,
+    ejecutar_lectura,
+    partir_en_bloques,
+    planificar_lectura,
+    resumen_serie,
+    validar_continuacion,
+)
+from src.services.stats import EstadisticasExperimentos, get_experiment_stats
+from src.services.tablas import FormatoTabla, leer_tabla
+from src.services.uncertainty import (
+    filas_incertidumbre,
+    planificar_incertidumbre,
+    propagar,
+)
+from src.services.write_behind import WriteBehindQueue
+from src.storage.experiment_repository import TAMANO_BLOQUE
+from src.storage.factory import crear_repositorio
+
+# IDs máximos por consulta de detalles en bloque (GET /experiments/details)
+MAX_IDS_DETALLE = 1000
+
+
+@dataclass(frozen=True)
+class Llamada:
+    """Paso de E/S que una operación pide a su servicio: un método del repositorio o un cálculo en hilo."""
+
+    funcion: str | Callable
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+    en_hilo: bool = False
+
+
+# Generador que cede `Llamada`s, recibe sus resultados y retorna el de la operación
+Operacion = Generator[Any, Any, Any]
+
+
+class BasePhysicsService:
+    """Lógica y operaciones compartidas por el servicio síncrono y el asíncrono.
+
+    Las subclases solo aportan la E/S: cómo ejecutar una `Llamada` (`_ejecutar`).
+    """
+
+    cache: LRUTTLCache
+    estadisticas: EstadisticasExperimentos
+    write_behind: WriteBehindQueue | None = None
+
+    def _registrar_creacion(self, tipo: str, detalles: list[dict], ids: list[int] | None = None) -> None:
+        # Un experimento nuevo solo cambia los listados; los detalles existentes siguen válidos
+        self.cache.invalidar_grupo("listado")
+        fecha = datetime.now(timezone.utc).isoformat()
+        ids = ids or [detalle.get("experimento_id") for detalle in detalles]
+        for detalle, exp_id in zip(detalles, ids):
+            self.estadisticas.registrar(tipo, fecha, detalle, exp_id)
+
+    def _registrar_borrado(self, exp_id: int, exp: dict | None) -> None:
+        self.cache.invalidar(("detalle", exp_id))
+        self.trayectorias.invalidar_prefijo("trayectoria", exp_id)
+        self.cache.invalidar_grupo("listado")
+        if exp is not None:
+            self.estadisticas.descontar(exp["tipo"], exp["fecha_creacion"], exp["detalle"], exp_id)
+
+    def cache_stats(self) -> dict:
+        return {**self.cache.estadisticas(), "trayectorias": self.trayectorias.estadisticas()}
+
+    def _guardar_trayectoria(self, clave: tuple, curvas: dict, generacion: int) -> None:
+        # La caché de trayectorias no copia: los arreglos compartidos quedan de solo lectura
+        for columna in curvas.values():
+            columna.setflags(write=False)
+        self.trayectorias.set(clave, curvas, generacion)
+
+    def _respuesta_encolado(self, ticket: str, nombre: str, detalle: dict) -> dict:
+        # El id definitivo se conoce tras el flush: se consulta con el ticket
+        return {"ticket": ticket, "estado": "pendiente", "nombre": nombre, "detalle": detalle}
+
+    def estado_escritura(self, ticket: str) -> dict | None:
+        return self.write_behind.estado(ticket) if self.write_behind is not None else None
+
+    def _consulta_pagina(
+        self, limit: int, cursor: str | None, fields: str | None,
+        tipo: str | None, desde: datetime | None, hasta: datetime | None,
+    ) -> tuple[tuple, dict]:
+        """Clave de caché y argumentos de `repository.get_page` para una página."""
+        consulta = {
+            # Una fila extra indica si existe una página siguiente
+            "limit": limit + 1,
+            "after": decodificar_cursor(cursor) if cursor else None,
+            "columns": list(columnas_proyectadas(fields)),
+            "tipo": tipo,
+            "desde": normalizar_fecha(desde),
+            "hasta": normalizar_fecha(hasta),
+        }
+        clave = ("listado", limit, consulta["after"], tuple(consulta["columns"]), tipo, consulta["desde"], consulta["hasta"])
+        return clave, consulta
+
+    def _detalles_en_cache(self, exp_ids: list[int]) -> tuple[dict[int, dict], list[int], int]:
+        """Separa los detalles ya cacheados de los IDs que hay que pedir al repositorio."""
+        if len(exp_ids) > MAX_IDS_DETALLE:
+            raise ValidationError(f"Se pueden pedir como máximo {MAX_IDS_DETALLE} experimentos por consulta.")
+        generacion = self.cache.generacion("detalle")
+        encontrados, faltantes = {}, []
+        for exp_id in dict.fromkeys(exp_ids):
+            exp = self.cache.get(("detalle", exp_id))
+            if exp is None:
+                faltantes.append(exp_id)
+            else:
+                encontrados[exp_id] = exp
+        return encontrados, faltantes, generacion
+
+    def _ordenar_detalles(
+        self, exp_ids: list[int], encontrados: dict[int, dict], nuevos: list[dict], generacion: int,
+    ) -> list[dict]:
+        for exp in nuevos:
+            self.cache.set(("detalle", exp["id"]), exp, generacion)
+            encontrados[exp["id"]] = exp
+        return [encontrados[exp_id] for exp_id in dict.fromkeys(exp_ids) if exp_id in encontrados]
+
+    def _curvas_comparadas(
+        self, experimentos: list[dict], variables: list[str], puntos: int,
+        t0: float | None, t1: float | None, max_puntos: int,
+    ) -> dict[str, np.ndarray]:
+        """Columnas `t` y `<variable>:<id>` de todos los experimentos sobre una malla común."""
+        desconocidas = set(variables) - set(COLUMNAS_TRAYECTORIA[1:])
+        if desconocidas:
+            raise ValidationError(f"Variables desconocidas: {', '.join(sorted(desconocidas))}. Usa x, v o a.")
+        t, curvas = curvas_superpuestas(experimentos, puntos, t0, t1)
+        t, curvas = decimar_min_max(t, {v: curvas[v] for v in variables}, max_puntos)
+        columnas = {"t": t}
+        for variable, matriz in curvas.items():
+            columnas.update({f"{variable}:{exp['id']}": fila for exp, fila in zip(experimentos, matriz)})
+        return columnas
+
+    def _pagina_historial(self, after: tuple[str, int] | None, **filtros) -> dict:
+        # Recorrido completo por páginas keyset con detalle (estadísticas y exportación)
+        return {"limit": TAMANO_BLOQUE, "after": after, "detalle": True, **filtros}
+
+    def _cerrar_pagina(self, filas: list[dict], limit: int) -> tuple[list[dict], str | None]:
+        if len(filas) <= limit:
+            return filas, None
+        filas = filas[:limit]
+        return filas, codificar_cursor(filas[-1])
+
+    def _resolver(self, tipo: str, datos: BaseModel) -> BaseModel:
+        """Despeja las incógnitas del ensayo con el plan de su modelo y las escribe en `datos`."""
+        for variable, valor in resolver_fila(tipo, datos.model_dump()).items():
+            setattr(datos, variable, valor)
+        return datos
+
+    def _propagar_incertidumbre(
+        self, tipo: str, datos: MRUSchema | MRUASchema, incertidumbre: IncertidumbreSchema,
+    ) -> tuple[dict, dict, list[dict]]:
+        """Solución nominal, resumen Monte Carlo y filas de incertidumbre para guardar."""
+        plan = planificar_incertidumbre(tipo, datos.model_dump(), incertidumbre.desviaciones)
+        # El detalle guarda la solución con los valores centrales (falla antes de muestrear)
+        self._resolver(tipo, datos)
+        resultado = propagar(plan, incertidumbre.muestras, incertidumbre.confianza, incertidumbre.semilla)
+        return datos.model_dump(), resultado, filas_incertidumbre(plan, resultado)
+
+    def _ajustar_serie(
+        self, tipo: str, contenido: bytes, formato: FormatoSerie, con_residuos: bool,
+    ) -> tuple[Ajuste, dict | None]:
+        """Ajuste de la serie y, si se piden, sus columnas t, x, ajuste y residuo."""
+        t, x = leer_serie(contenido, formato)
+        ajuste = ajustar(tipo, t, x, con_residuos)
+        if not con_residuos:
+            return ajuste, None
+        return ajuste, {"t": t, "x": x, "ajuste": x - ajuste.residuos, "residuo": ajuste.residuos}
+
+    def _detalle_ajuste(self, ajuste: Ajuste) -> dict:
+        # Mismas reglas que /calculate: el experimento guardado no admite negativos
+        try:
+            datos = (MRUSchema if ajuste.tipo == "MRU" else MRUASchema)(**ajuste.detalle())
+        except ErrorFisica as e:
+            raise ValidationError(f"El ajuste no se puede guardar como {ajuste.tipo}: {e.message}")
+        return datos.model_dump()
+
+    def _bloques_serie(
+        self, contenido: bytes, formato: FormatoSerie, precision: PrecisionSerie, previos: list[dict],
+    ) -> list[dict]:
+        """Bloques comprimidos de las muestras subidas, a continuación de los ya guardados."""
+        t, x = leer_serie(contenido, formato)
+        validar_continuacion(t, previos)
+        return partir_en_bloques(t, x, precision, previos[-1]["indice"] + 1 if previos else 0)
+
+    def _resolver_lote(self, tipo: str, nombre: str, lote: LoteSchema) -> tuple[list[str], ResultadoLote]:
+        resultado = resolver_lote(tipo, lote.columnas())
+        nombres = lote.nombres or [f"{nombre} #{i + 1}" for i in range(len(resultado))]
+        return nombres, resultado
+
+    def _resolver_tabla(self, tipo: str, nombre: str, contenido: bytes, formato: FormatoTabla) -> tuple[list[str], ResultadoLote]:
+        # Las columnas del archivo llegan como arreglos: ni pydantic ni dicts por fila
+        columnas, nombres = leer_tabla(contenido, formato, tipo)
+        resultado = resolver_lote(tipo, columnas)
+        por_defecto = [f"{nombre} #{i + 1}" for i in range(len(resultado))]
+        return [n or d for n, d in zip(nombres, por_defecto)] if nombres else por_defecto, resultado
+
+    def _filas_validas(self, nombres: list[str], resultado: ResultadoLote) -> tuple[np.ndarray, list[str], list[dict]]:
+        indices = np.flatnonzero(resultado.validas)
+        filas = [
+            dict(zip(resultado.columnas, valores))
+            for valores in zip(*(col[indices].tolist() for col in resultado.columnas.values()))
+        ]
+        return indices, [nombres[i] for i in indices], filas
+
+    def _respuesta_lote(
+        self, resultado: ResultadoLote, indices: np.ndarray, ids_guardados: list[int], con_columnas: bool = True,
+    ) -> dict:
+        ids: list[int | None] = [None] * len(resultado)
+        for i, nuevo_id in zip(indices.tolist(), ids_guardados):
+            ids[i] = nuevo_id
+
+        # NaN no es JSON válido: las incógnitas sin resolver viajan como null
+        columnas = {
+            nombre_col: np.where(np.isnan(col), None, col).tolist()
+            for nombre_col, col in resultado.columnas.items()
+        } if con_columnas else {}
+        return {
+            "total": len(resultado),
+            "guardados": len(ids_guardados),
+            "ids": ids,
+            **columnas,
+            "errores": resultado.errores,
+        }
+
+    # --- OPERACIONES ---
+    # Cada operación se escribe una sola vez, como generador que cede sus llamadas
+    # al repositorio (`_repo`) y sus cálculos pesados (`_hilo`). El servicio síncrono
+    # las ejecuta en el momento y el asíncrono las espera (ver `_correr`).
+
+    @staticmethod
+    def _repo(metodo: str, *args, **kwargs) -> "Llamada":
+        return Llamada(metodo, args, kwargs)
+
+    @staticmethod
+    def _hilo(funcion: Callable, *args) -> "Llamada":
+        return Llamada(funcion, args, {}, en_hilo=True)
+
+    def _resolver_y_guardar(self, tipo: str, nombre: str, datos: BaseModel) -> Operacion:
+        # 1. Lógica de resolución física: el plan del modelo para las variables que faltan
+        self._resolver(tipo, datos)
 
-class PhysicsService:
-    def __init__(self):
-        # El servicio "contrata" al repositorio para persistir datos
-        self.repository = ExperimentRepository()
-
-    def _division_segura(self, num: float, den: float, magnitud: str) -> float:
-        if den == 0: 
-            raise ErrorDivisionPorCeroFisica(magnitud)
-        return num / den
-
-    def resolver_y_guardar_mru(self, nombre: str, datos: MRUSchema):
-        # 1. Lógica de resolución física
-        if datos.distancia is None:
-            datos.distancia = datos.velocidad * datos.tiempo
-        elif datos.tiempo is None:
-            datos.tiempo = self._division_segura(datos.distancia, datos.velocidad, "tiempo")
-        elif datos.velocidad is None:
-            datos.velocidad = self._division_segura(datos.distancia, datos.tiempo, "velocidad")
-        
         # 2. ALINEACIÓN: Creamos el contrato de "Experimento Maestro"
         # Esto soluciona el error que marcó Copilot
-        exp_maestro = ExperimentCreate(nombre=nombre, tipo="MRU")
-        
-        # 3. Guardar enviando el objeto maestro y el diccionario de física
-        return self.repository.create_mru_experiment(exp_maestro, datos.model_dump())
-
-    def _resolver_tiempo_cuadratico(self, a, vi, xi, xf):
-        coef_a = 0.5 * a
-        coef_b = vi
-        coef_c = xi - xf
-        discriminante = coef_b**2 - 4 * coef_a * coef_c
-        
-        if discriminante < 0:
-            raise ErrorDiscriminanteNegativo(discriminante)
-        
-        return (-coef_b + (discriminante**0.5)) / (2 * coef_a)
-
-    def resolver_y_guardar_mrua(self, nombre: str, m: MRUASchema):
-        # 1. Lógica de resolución MRUA
-        if m.aceleracion is None and m.tiempo is not None:
-            m.aceleracion = (m.velocidad_final - m.velocidad_inicial) / m.tiempo
-        
-        if m.posicion_final is None and m.tiempo is not None:
-            m.posicion_final = m.posicion_inicial + (m.velocidad_inicial * m.tiempo) + (0.5 * m.aceleracion * m.tiempo**2)
-            
-        if m.velocidad_final is None and m.aceleracion is not None and m.tiempo is not None:
-            m.velocidad_final = m.velocidad_inicial + (m.aceleracion * m.tiempo)
-            
-        if m.tiempo is None:
-            m.tiempo = self._resolver_tiempo_cuadratico(m.aceleracion, m.velocidad_inicial, m.posicion_inicial, m.posicion_final)
-            if m.velocidad_final is None and m.aceleracion is not None:
-                m.velocidad_final = m.velocidad_inicial + (m.aceleracion * m.tiempo)
-
-        # 2. Crear contrato maestro para MRUA
-        exp_maestro = ExperimentCreate(nombre=nombre, tipo="MRUA")
-
-        # 3. Guardar
-        return self.repository.create_mrua_experiment(exp_maestro, m.model_dump())
-    
-    def list_all(self):
-        return self.repository.get_all()
-
-    def get_one(self, exp_id: int):
-        return self.repository.get_by_id(exp_id)
-
-    def remove_one(self, exp_id: int) -> bool:
-        return self.repository.delete(exp_id)
\ No newline at end of file
+        exp_maestro = ExperimentCreate(nombre=nombre, tipo=tipo)
+        if self.write_behind is not None:
+            return (yield from self._encolar(exp_maestro, datos.model_dump()))
+
+        # 3. Guardar maestro y física en una sola transacción
+        creado = yield self._repo("create_experiment_with_detail", exp_maestro, datos.model_dump())
+        self._registrar_creacion(tipo, [creado["detalle"]])
+        return creado
+
+    def _encolar(self, exp_maestro: ExperimentCreate, detalle: dict) -> Operacion:
+        # El fsync del respaldo corre en un hilo para no frenar el event loop
+        ticket = yield self._hilo(self.write_behind.encolar, exp_maestro.tipo, exp_maestro.nombre, detalle)
+        return self._respuesta_encolado(ticket, exp_maestro.nombre, detalle)
+
+    def _resolver_y_guardar_mru(self, nombre: str, datos: MRUSchema) -> Operacion:
+        return (yield from self._resolver_y_guardar("MRU", nombre, datos))
+
+    def _resolver_y_guardar_mrua(self, nombre: str, m: MRUASchema) -> Operacion:
+        return (yield from self._resolver_y_guardar("MRUA", nombre, m))
+
+    def _resolver_y_guardar_lote(self, tipo: str, nombre: str, lote: LoteSchema) -> Operacion:
+        # 1. Resolución vectorizada de todas las filas a la vez (los lotes grandes, fuera del event loop)
+        nombres, resultado = yield self._hilo(self._resolver_lote, tipo, nombre, lote)
+
+        # 2. Solo las filas válidas se guardan, en inserciones multi-fila
+        return (yield from self._guardar_lote(tipo, nombres, resultado))
+
+    def _resolver_y_guardar_mru_lote(self, nombre: str, lote: MRULoteSchema) -> Operacion:
+        return (yield from self._resolver_y_guardar_lote("MRU", nombre, lote))
+
+    def _resolver_y_guardar_mrua_lote(self, nombre: str, lote: MRUALoteSchema) -> Operacion:
+        return (yield from self._resolver_y_guardar_lote("MRUA", nombre, lote))
+
+    def _importar_tabla(self, tipo: str, nombre: str, contenido: bytes, formato: FormatoTabla) -> Operacion:
+        """Valida, resuelve y guarda un archivo Parquet/Arrow de ensayos de un mismo tipo."""
+        nombres, resultado = yield self._hilo(self._resolver_tabla, tipo, nombre, contenido, formato)
+        # La respuesta no repite las columnas: el archivo puede tener millones de filas
+        return (yield from self._guardar_lote(tipo, nombres, resultado, con_columnas=False))
+
+    def _guardar_lote(self, tipo: str, nombres: list[str], resultado: ResultadoLote, con_columnas: bool = True) -> Operacion:
+        indices, nombres_validos, filas = self._filas_validas(nombres, resultado)
+        ids_guardados = (yield self._repo("create_experiments_bulk", tipo, nombres_validos, filas)) if filas else []
+        self._registrar_creacion(tipo, filas, ids_guardados)
+        return self._respuesta_lote(resultado, indices, ids_guardados, con_columnas)
+
+    def _propagar_y_guardar(
+        self, tipo: str, nombre: str, datos: MRUSchema | MRUASchema, incertidumbre: IncertidumbreSchema,
+        guardar: bool = False,
+    ) -> Operacion:
+        """Media, desviación e intervalo de confianza de las incógnitas por Monte Carlo.
+
+        Con `guardar`, persiste la solución nominal junto con la incertidumbre
+        (siempre en el momento: no pasa por la escritura diferida).
+        """
+        # Millones de muestras: el muestreo corre en un hilo (y, si se configuró, en el pool de procesos)
+        detalle, resultado, filas = yield self._hilo(self._propagar_incertidumbre, tipo, datos, incertidumbre)
+        if not guardar:
+            return {"tipo": tipo, "detalle": detalle, **resultado}
+        creado = yield self._repo(
+            "create_experiment_with_uncertainty", ExperimentCreate(nombre=nombre, tipo=tipo), detalle, filas,
+        )
+        self._registrar_creacion(tipo, [creado["detalle"]])
+        return {"id": creado["id"], "nombre": creado["nombre"], "tipo": tipo, "detalle": creado["detalle"], **resultado}
+
+    def _get_uncertainty(self, exp_id: int) -> Operacion:
+        return (yield self._repo("get_uncertainty", exp_id))
+
+    def _ajustar_y_guardar(
+        self, tipo: str, nombre: str, contenido: bytes, formato: FormatoSerie,
+        guardar: bool = False, con_residuos: bool = False,
+    ) -> Operacion:
+        """Ajusta MRU/MRUA a una serie (t, x); con `guardar`, la registra como experimento.
+
+        Retorna el resumen del ajuste y, con `con_residuos`, las columnas de la serie.
+        """
+        # Millones de puntos: lectura y ajuste corren en un hilo
+        ajuste, columnas = yield self._hilo(self._ajustar_serie, tipo, contenido, formato, con_residuos)
+        if not guardar:
+            return {**ajuste.resumen(), "detalle": ajuste.detalle()}, columnas
+        return (yield from self._guardar_ajuste(nombre, ajuste)), columnas
+
+    def _guardar_ajuste(self, nombre: str, ajuste: Ajuste) -> Operacion:
+        """Registra un ajuste como experimento del tipo ajustado (resumen + id o ticket)."""
+        detalle = self._detalle_ajuste(ajuste)
+        exp_maestro = ExperimentCreate(nombre=nombre, tipo=ajuste.tipo)
+        if self.write_behind is not None:
+            return {**ajuste.resumen(), **(yield from self._encolar(exp_maestro, detalle))}
+        creado = yield self._repo("create_experiment_with_detail", exp_maestro, detalle)
+        self._registrar_creacion(ajuste.tipo, [creado["detalle"]])
+        return {"id": creado["id"], "nombre": creado["nombre"], **ajuste.resumen(), "detalle": creado["detalle"]}
+
+    def _agregar_serie(
+        self, exp_id: int, contenido: bytes, formato: FormatoSerie, precision: PrecisionSerie = "float64",
+    ) -> Operacion:
+        """Agrega muestras crudas a la serie del experimento (None si no existe)."""
+        if (yield from self._get_one(exp_id)) is None:
+            return None
+        previos = yield self._repo("get_series_blocks", exp_id)
+        # Lectura y compresión de millones de muestras corren en un hilo
+        nuevos = yield self._hilo(self._bloques_serie, contenido, formato, precision, previos)
+        yield self._repo("add_series_blocks", exp_id, nuevos)
+        return resumen_serie(previos + nuevos)
+
+    def _info_serie(self, exp_id: int) -> Operacion:
+        bloques = yield self._repo("get_series_blocks", exp_id)
+        return resumen_serie(bloques) if bloques else None
+
+    def _leer_serie_guardada(
+        self, exp_id: int, t0: float | None = None, t1: float | None = None, max_puntos: int | None = None,
+    ) -> Operacion:
+        """Columnas t y x de la serie en [t0, t1], reducidas a `max_puntos` (None si no existe el experimento).
+
+        Solo se traen y descomprimen los bloques que la lectura necesita.
+        """
+        bloques = yield self._repo("get_series_blocks", exp_id, t0, t1)
+        plan = planificar_lectura(bloques, t0, t1, max_puntos)
+        if not plan.bloques and (yield from self._get_one(exp_id)) is None:
+            return None
+        datos = (yield self._repo("get_series_data", exp_id, plan.cargar)) if plan.cargar else {}
+        return (yield self._hilo(ejecutar_lectura, plan, datos))
+
+    def _list_all(self) -> Operacion:
+        listado = self.cache.get(("listado",))
+        if listado is None:
+            generacion = self.cache.generacion("listado")
+            listado = yield self._repo("get_all")
+            self.cache.set(("listado",), listado, generacion)
+        return listado
+
+    def _list_page(
+        self, limit: int = 100, cursor: str | None = None, fields: str | None = None,
+        tipo: str | None = None, desde: datetime | None = None, hasta: datetime | None = None,
+    ) -> Operacion:
+        """Página del listado y cursor de la siguiente (None si es la última)."""
+        clave, consulta = self._consulta_pagina(limit, cursor, fields, tipo, desde, hasta)
+        pagina = self.cache.get(clave)
+        if pagina is None:
+            generacion = self.cache.generacion("listado")
+            pagina = self._cerrar_pagina((yield self._repo("get_page", **consulta)), limit)
+            self.cache.set(clave, pagina, generacion)
+        return pagina
+
+    def _get_one(self, exp_id: int) -> Operacion:
+        exp = self.cache.get(("detalle", exp_id))
+        if exp is None:
+            generacion = self.cache.generacion("detalle")
+            exp = yield self._repo("get_by_id", exp_id)
+            if exp is not None:
+                self.cache.set(("detalle", exp_id), exp, generacion)
+        return exp
+
+    def _get_many(self, exp_ids: list[int]) -> Operacion:
+        """Detalles de varios experimentos en el orden pedido (los inexistentes se omiten)."""
+        encontrados, faltantes, generacion = self._detalles_en_cache(exp_ids)
+        nuevos = (yield self._repo("get_many", faltantes)) if faltantes else []
+        return self._ordenar_detalles(exp_ids, encontrados, nuevos, generacion)
+
+    def _get_trajectory(
+        self, exp_id: int, puntos: int = PUNTOS_POR_DEFECTO, t0: float | None = None, t1: float | None = None,
+    ) -> Operacion:
+        """Curvas t, x, v, a muestreadas en el servidor, cacheadas por (id, resolución) en una caché acotada en bytes."""
+        clave = ("trayectoria", exp_id, puntos, t0, t1)
+        curvas = self.trayectorias.get(clave)
+        if curvas is None:
+            generacion = self.trayectorias.generacion("trayectoria")
+            exp = yield from self._get_one(exp_id)
+            if exp is None:
+                return None
+            curvas = muestrear_trayectoria(exp["tipo"], exp["detalle"], puntos, t0, t1)
+            self._guardar_trayectoria(clave, curvas, generacion)
+        return curvas
+
+    def _compare(
+        self, exp_ids: list[int], variables: list[str], puntos: int = 1000,
+        t0: float | None = None, t1: float | None = None, max_puntos: int = 2000,
+    ) -> Operacion:
+        """Curvas superpuestas de varios experimentos (None si no existe ninguno)."""
+        experimentos = yield from self._get_many(exp_ids)
+        if not experimentos:
+            return None
+        # Cientos de curvas por miles de puntos: la evaluación no debe frenar el event loop
+        return (yield self._hilo(self._curvas_comparadas, experimentos, variables, puntos, t0, t1, max_puntos))
+
+    def _stats(self) -> Operacion:
+        """Conteos y resumen de campos físicos, cargados una vez y mantenidos al crear/borrar."""
+        if self.estadisticas.necesita_carga():
+            carga, after = self.estadisticas.iniciar_carga(), None
+            while True:
+                pagina = yield self._repo("get_page", **self._pagina_historial(after))
+                carga.acumular(pagina)
+                if len(pagina) < TAMANO_BLOQUE:
+                    break
+                after = (pagina[-1]["fecha_creacion"], pagina[-1]["id"])
+            self.estadisticas.adoptar(carga)
+        return self.estadisticas.resumen()
+
+    def _exportar(
+        self, formato: FormatoExportacion, tipo: str | None = None,
+        desde: datetime | None = None, hasta: datetime | None = None,
+    ) -> Operacion:
+        """Historial completo codificado, una página de `TAMANO_BLOQUE` filas a la vez.
+
+        Además de sus llamadas cede los fragmentos codificados, que `_recorrer` entrega al cliente.
+        """
+        filtros = {"tipo": tipo, "desde": normalizar_fecha(desde), "hasta": normalizar_fecha(hasta)}
+        codificador = crear_codificador(formato)
+        yield codificador.inicio()
+        after = None
+        while True:
+            pagina = yield self._repo("get_page", **self._pagina_historial(after, **filtros))
+            if pagina:
+                yield codificador.pagina(pagina)
+            if len(pagina) < TAMANO_BLOQUE:
+                break
+            after = (pagina[-1]["fecha_creacion"], pagina[-1]["id"])
+        yield codificador.cerrar()
+
+    def _remove_one(self, exp_id: int) -> Operacion:
+        # Con las estadísticas cargadas hay que saber qué se descuenta (suele estar en caché)
+        exp = (yield from self._get_one(exp_id)) if self.estadisticas.sigue_cambios else None
+        eliminado = yield self._repo("delete", exp_id)
+        self._registrar_borrado(exp_id, exp if eliminado else None)
+        return eliminado
+
+
+def _sincrono(operacion: Callable[..., Operacion]) -> Callable:
+    """Método público de `PhysicsService` para una operación de la base."""
+    @functools.wraps(operacion)
+    def metodo(self, *args, **kwargs):
+        return self._correr(operacion(self, *args, **kwargs))
+    metodo.__name__ = operacion.__name__.removeprefix("_")
+    return metodo
+
+
+def _asincrono(operacion: Callable[..., Operacion]) -> Callable:
+    """Método público de `AsyncPhysicsService` para una operación de la base."""
+    @functools.wraps(operacion)
+    async def metodo(self, *args, **kwargs):
+        return await self._correr(operacion(self, *args, **kwargs))
+    metodo.__name__ = operacion.__name__.removeprefix("_")
+    return metodo
+
+
+class PhysicsService(BasePhysicsService):
+    def __init__(self, repository=None, cache: LRUTTLCache | None = None, write_behind: WriteBehindQueue | None = None,
+                 estadisticas: EstadisticasExperimentos | None = None, trayectorias: LRUTTLCache | None = None):
+        # El servicio "contrata" al repositorio del backend configurado
+        self.repository = repository or crear_repositorio()
+        self.cache = cache or get_experiment_cache()
+        self.trayectorias = trayectorias or get_trajectory_cache()
+        self.write_behind = write_behind
+        self.estadisticas = estadisticas or get_experiment_stats()
+
+    def _ejecutar(self, llamada: Llamada):
+        funcion = llamada.funcion if llamada.en_hilo else getattr(self.repository, llamada.funcion)
+        return funcion(*llamada.args, **llamada.kwargs)
+
+    def _correr(self, operacion: Operacion):
+        resultado = None
+        while True:
+            try:
+                llamada = operacion.send(resultado)
+            except StopIteration as fin:
+                return fin.value
+            resultado = self._ejecutar(llamada)
+
+    def _recorrer(self, operacion: Operacion) -> Iterator:
+        resultado = None
+        while True:
+            try:
+                paso = operacion.send(resultado)
+            except StopIteration:
+                return
+            if isinstance(paso, Llamada):
+                resultado = self._ejecutar(paso)
+            else:
+                resultado = None
+                yield paso
+
+    def exportar(
+        self, formato: FormatoExportacion, tipo: str | None = None,
+        desde: datetime | None = None, hasta: datetime | None = None,
+    ) -> Iterator[str | bytes]:
+        """Historial completo codificado, una página de `TAMANO_BLOQUE` filas a la vez."""
+        return self._recorrer(self._exportar(formato, tipo, desde, hasta))
+
+    resolver_y_guardar = _sincrono(BasePhysicsService._resolver_y_guardar)
+    resolver_y_guardar_mru = _sincrono(BasePhysicsService._resolver_y_guardar_mru)
+    resolver_y_guardar_mrua = _sincrono(BasePhysicsService._resolver_y_guardar_mrua)
+    resolver_y_guardar_lote = _sincrono(BasePhysicsService._resolver_y_guardar_lote)
+    resolver_y_guardar_mru_lote = _sincrono(BasePhysicsService._resolver_y_guardar_mru_lote)
+    resolver_y_guardar_mrua_lote = _sincrono(BasePhysicsService._resolver_y_guardar_mrua_lote)
+    importar_tabla = _sincrono(BasePhysicsService._importar_tabla)
+    propagar_incertidumbre = _sincrono(BasePhysicsService._propagar_y_guardar)
+    get_uncertainty = _sincrono(BasePhysicsService._get_uncertainty)
+    ajustar_serie = _sincrono(BasePhysicsService._ajustar_y_guardar)
+    guardar_ajuste = _sincrono(BasePhysicsService._guardar_ajuste)
+    agregar_serie = _sincrono(BasePhysicsService._agregar_serie)
+    info_serie = _sincrono(BasePhysicsService._info_serie)
+    leer_serie_guardada = _sincrono(BasePhysicsService._leer_serie_guardada)
+    list_all = _sincrono(BasePhysicsService._list_all)
+    list_page = _sincrono(BasePhysicsService._list_page)
+    get_one = _sincrono(BasePhysicsService._get_one)
+    get_many = _sincrono(BasePhysicsService._get_many)
+    get_trajectory = _sincrono(BasePhysicsService._get_trajectory)
+    compare = _sincrono(BasePhysicsService._compare)
+    stats = _sincrono(BasePhysicsService._stats)
+    remove_one = _sincrono(BasePhysicsService._remove_one)
+
+
+class AsyncPhysicsService(BasePhysicsService):
+    """Misma API que `PhysicsService`, pero esperando a un repositorio asíncrono.
+
+    Los cálculos pesados de cada operación corren en un hilo para no frenar el event loop.
+    """
+
+    def __init__(self, repository, cache: LRUTTLCache | None = None, write_behind: WriteBehindQueue | None = None,
+                 estadisticas: EstadisticasExperimentos | None = None, trayectorias: LRUTTLCache | None = None):
+        self.repository = repository
+        self.cache = cache or get_experiment_cache()
+        self.trayectorias = trayectorias or get_trajectory_cache()
+        self.write_behind = write_behind
+        self.estadisticas = estadisticas or get_experiment_stats()
+
+    async def _ejecutar(self, llamada: Llamada):
+        if llamada.en_hilo:
+            return await asyncio.to_thread(llamada.funcion, *llamada.args)
+        return await getattr(self.repository, llamada.funcion)(*llamada.args, **llamada.kwargs)
+
+    async def _correr(self, operacion: Operacion):
+        resultado = None
+        while True:
+            try:
+                llamada = operacion.send(resultado)
+            except StopIteration as fin:
+                return fin.value
+            resultado = await self._ejecutar(llamada)
+
+    async def _recorrer(self, operacion: Operacion) -> AsyncIterator:
+        resultado = None
+        while True:
+            try:
+                paso = operacion.send(resultado)
+            except StopIteration:
+                return
+            if isinstance(paso, Llamada):
+                resultado = await self._ejecutar(paso)
+            else:
+                resultado = None
+                yield paso
+
+    def exportar(
+        self, formato: FormatoExportacion, tipo: str | None = None,
+        desde: datetime | None = None, hasta: datetime | None = None,
+    ) -> AsyncIterator[str | bytes]:
+        return self._recorrer(self._exportar(formato, tipo, desde, hasta))
+
+    resolver_y_guardar = _asincrono(BasePhysicsService._resolver_y_guardar)
+    resolver_y_guardar_mru = _asincrono(BasePhysicsService._resolver_y_guardar_mru)
+    resolver_y_guardar_mrua = _asincrono(BasePhysicsService._resolver_y_guardar_mrua)
+    resolver_y_guardar_lote = _asincrono(BasePhysicsService._resolver_y_guardar_lote)
+    resolver_y_guardar_mru_lote = _asincrono(BasePhysicsService._resolver_y_guardar_mru_lote)
+    resolver_y_guardar_mrua_lote = _asincrono(BasePhysicsService._resolver_y_guardar_mrua_lote)
+    importar_tabla = _asincrono(BasePhysicsService._importar_tabla)
+    propagar_incertidumbre = _asincrono(BasePhysicsService._propagar_y_guardar)
+    get_uncertainty = _asincrono(BasePhysicsService._get_uncertainty)
+    ajustar_serie = _asincrono(BasePhysicsService._ajustar_y_guardar)
+    guardar_ajuste = _asincrono(BasePhysicsService._guardar_ajuste)
+    agregar_serie = _asincrono(BasePhysicsService._agregar_serie)
+    info_serie = _asincrono(BasePhysicsService._info_serie)
+    leer_serie_guardada = _asincrono(BasePhysicsService._leer_serie_guardada)
+    list_all = _asincrono(BasePhysicsService._list_all)
+    list_page = _asincrono(BasePhysicsService._list_page)
+    get_one = _asincrono(BasePhysicsService._get_one)
+    get_many = _asincrono(BasePhysicsService._get_many)
+    get_trajectory = _asincrono(BasePhysicsService._get_trajectory)
+    compare = _asincrono(BasePhysicsService._compare)
+    stats = _asincrono(BasePhysicsService._stats)
+    remove_one = _asincrono(BasePhysicsService._remove_one)
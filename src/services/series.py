@@ -0,0 +1,194 @@
+"""
+Series de muestras crudas de un sensor, guardadas por bloques comprimidos.
+
+Una serie (t, x) ordenada por tiempo se parte en bloques de
+`PUNTOS_POR_BLOQUE_SERIE` muestras. Cada bloque es una fila con sus
+metadatos (índice, puntos, rango de tiempo, mínimo, máximo, primer y último
+valor) y los datos comprimidos sin pérdida:
+
+    1. cada columna se ve como enteros y se hace XOR con la muestra anterior
+       (tiempos equiespaciados o señales suaves comparten signo, exponente y
+       los bits altos de la mantisa, que quedan en cero)
+    2. los bytes se reordenan por posición ("byte shuffle"), juntando los
+       bytes altos, casi todos cero, de todas las muestras
+    3. zlib
+
+`t` siempre se guarda en float64 (los sensores usan tiempos absolutos); `x`
+en float32 o float64, según se pida al subir.
+
+Lecturas:
+    rango      -> solo se piden y descomprimen los bloques que se solapan con
+                  [t0, t1]
+    reducida   -> con más muestras que `max_puntos`, la envolvente min/max de
+                  `decimar_min_max` (dos puntos por cubeta). Si el rango abarca
+                  al menos `max_puntos / 4` bloques, las cubetas son grupos de
+                  bloques enteros y se arman solo con los metadatos (la
+                  envolvente sale con la mitad de puntos pedidos o más): se
+                  descomprimen a lo sumo los dos bloques de los extremos, que
+                  el rango corta.
+"""
+
+import zlib
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+
+from src.core.exceptions import ValidationError
+
+PrecisionSerie = Literal["float32", "float64"]
+
+PUNTOS_POR_BLOQUE_SERIE = 4096
+CODEC = "xor-shuffle-zlib"
+NIVEL_ZLIB = 6
+
+
+def _codificar(valores: np.ndarray) -> bytes:
+    enteros = valores.view(np.dtype(f"u{valores.itemsize}"))
+    delta = enteros.copy()
+    delta[1:] ^= enteros[:-1]
+    return delta.view(np.uint8).reshape(-1, valores.itemsize).T.tobytes()
+
+
+def _decodificar(datos: bytes, dtype: np.dtype, n: int) -> np.ndarray:
+    delta = np.frombuffer(datos, np.uint8).reshape(dtype.itemsize, n).T.copy().view(np.dtype(f"u{dtype.itemsize}")).ravel()
+    return np.bitwise_xor.accumulate(delta).view(dtype)
+
+
+def descomprimir_bloque(bloque: dict, datos: bytes) -> tuple[np.ndarray, np.ndarray]:
+    """Columnas t (float64) y x (en la precisión del bloque) de un bloque."""
+    if bloque["codec"] != CODEC:
+        raise ValidationError(f"Codec de serie desconocido: {bloque['codec']}")
+    n, crudo = bloque["puntos"], zlib.decompress(datos)
+    t = _decodificar(crudo[:8 * n], np.dtype(np.float64), n)
+    return t, _decodificar(crudo[8 * n:], np.dtype(bloque["precision"]), n)
+
+
+def partir_en_bloques(t: np.ndarray, x: np.ndarray, precision: PrecisionSerie, primer_indice: int = 0) -> list[dict]:
+    """Filas de bloque (metadatos y `datos` comprimidos) de una serie ordenada por tiempo."""
+    x = x.astype(precision)
+    inicios = np.arange(0, len(t), PUNTOS_POR_BLOQUE_SERIE)
+    finales = np.minimum(inicios + PUNTOS_POR_BLOQUE_SERIE, len(t)) - 1
+    # Estadísticas de todos los bloques en una pasada
+    minimos, maximos = np.minimum.reduceat(x, inicios), np.maximum.reduceat(x, inicios)
+
+    bloques = []
+    for i, (inicio, final) in enumerate(zip(inicios.tolist(), finales.tolist())):
+        datos = zlib.compress(_codificar(t[inicio:final + 1]) + _codificar(x[inicio:final + 1]), NIVEL_ZLIB)
+        bloques.append({
+            "indice": primer_indice + i,
+            "puntos": final - inicio + 1,
+            "t_inicio": float(t[inicio]),
+            "t_fin": float(t[final]),
+            "x_min": float(minimos[i]),
+            "x_max": float(maximos[i]),
+            "x_primero": float(x[inicio]),
+            "x_ultimo": float(x[final]),
+            "precision": precision,
+            "codec": CODEC,
+            "bytes": len(datos),
+            "datos": datos,
+        })
+    return bloques
+
+
+def validar_continuacion(t: np.ndarray, bloques: list[dict]) -> None:
+    """Los tiempos deben crecer y continuar después del último bloque guardado."""
+    if len(t) == 0:
+        raise ValidationError("La serie no tiene muestras.")
+    if np.any(np.diff(t) < 0):
+        raise ValidationError("Los tiempos de la serie deben estar ordenados de menor a mayor.")
+    if bloques and t[0] < bloques[-1]["t_fin"]:
+        raise ValidationError(f"Las muestras nuevas deben empezar en t >= {bloques[-1]['t_fin']} (fin de la serie guardada).")
+
+
+def resumen_serie(bloques: list[dict]) -> dict:
+    puntos = sum(b["puntos"] for b in bloques)
+    comprimidos = sum(b["bytes"] for b in bloques)
+    crudos = sum(b["puntos"] * (8 + np.dtype(b["precision"]).itemsize) for b in bloques)
+    return {
+        "puntos": puntos,
+        "bloques": len(bloques),
+        "t_inicio": bloques[0]["t_inicio"],
+        "t_fin": bloques[-1]["t_fin"],
+        "x_min": min(b["x_min"] for b in bloques),
+        "x_max": max(b["x_max"] for b in bloques),
+        "bytes": comprimidos,
+        "compresion": crudos / comprimidos if comprimidos else None,
+    }
+
+
+@dataclass
+class PlanLectura:
+    bloques: list[dict]          # Metadatos de los bloques que se solapan con el rango, en orden
+    t0: float
+    t1: float
+    max_puntos: int | None
+    reducida: bool               # Envolvente min/max armada con los metadatos
+    cargar: list[int]            # Índices de los bloques cuyos datos hay que traer
+
+
+def planificar_lectura(bloques: list[dict], t0: float | None, t1: float | None, max_puntos: int | None) -> PlanLectura:
+    t0 = -np.inf if t0 is None else t0
+    t1 = np.inf if t1 is None else t1
+    if t1 < t0:
+        raise ValidationError("El rango debe cumplir t0 <= t1.")
+    bloques = [b for b in bloques if b["t_fin"] >= t0 and b["t_inicio"] <= t1]
+    # Con bloques suficientes, cada cubeta agrupa bloques enteros (al menos max_puntos / 2 puntos)
+    reducida = (
+        max_puntos is not None
+        and sum(b["puntos"] for b in bloques) > max_puntos
+        and 4 * len(bloques) >= max_puntos
+    )
+    if reducida:
+        cargar = [b["indice"] for b in (bloques[0], bloques[-1]) if b["t_inicio"] < t0 or b["t_fin"] > t1]
+    else:
+        cargar = [b["indice"] for b in bloques]
+    return PlanLectura(bloques, t0, t1, max_puntos, reducida, sorted(set(cargar)))
+
+
+def _envolvente(t_primero, t_ultimo, minimos, maximos, x_primero, x_ultimo, max_puntos: int) -> dict[str, np.ndarray]:
+    """Agrupa tramos consecutivos en `max_puntos // 2` cubetas y emite su envolvente min/max."""
+    bordes = np.unique(np.linspace(0, len(t_primero), max_puntos // 2 + 1).astype(np.intp))[:-1]
+    finales = np.r_[bordes[1:], len(t_primero)] - 1
+    minimo, maximo = np.minimum.reduceat(minimos, bordes), np.maximum.reduceat(maximos, bordes)
+    sube = x_ultimo[finales] >= x_primero[bordes]
+    return {
+        "t": np.column_stack([t_primero[bordes], t_ultimo[finales]]).ravel(),
+        "x": np.column_stack([np.where(sube, minimo, maximo), np.where(sube, maximo, minimo)]).ravel(),
+    }
+
+
+def ejecutar_lectura(plan: PlanLectura, datos: dict[int, bytes]) -> dict[str, np.ndarray]:
+    """Columnas t y x del rango (o su envolvente) con los datos de `plan.cargar`."""
+    if not plan.bloques:
+        return {"t": np.empty(0), "x": np.empty(0)}
+
+    if not plan.reducida:
+        partes = [descomprimir_bloque(b, datos[b["indice"]]) for b in plan.bloques]
+        t = np.concatenate([p[0] for p in partes])
+        x = np.concatenate([p[1] for p in partes]).astype(np.float64)
+        dentro = (t >= plan.t0) & (t <= plan.t1)
+        t, x = t[dentro], x[dentro]
+        if plan.max_puntos is not None and len(t) > plan.max_puntos:
+            from src.services.kinematics import decimar_min_max
+            t, curvas = decimar_min_max(t, {"x": x[np.newaxis]}, plan.max_puntos)
+            x = curvas["x"][0]
+        return {"t": t, "x": x}
+
+    # Un tramo por bloque: los interiores con sus metadatos, los extremos recortados al rango
+    tramos = []
+    for b in plan.bloques:
+        if b["indice"] in datos:
+            t, x = descomprimir_bloque(b, datos[b["indice"]])
+            dentro = (t >= plan.t0) & (t <= plan.t1)
+            t, x = t[dentro], x[dentro].astype(np.float64)
+            if len(t):
+                tramos.append((t[0], t[-1], x.min(), x.max(), x[0], x[-1]))
+        else:
+            tramos.append((b["t_inicio"], b["t_fin"], b["x_min"], b["x_max"], b["x_primero"], b["x_ultimo"]))
+    if not tramos:
+        # Solo bloques de los extremos, sin muestras dentro del rango
+        return {"t": np.empty(0), "x": np.empty(0)}
+    columnas = [np.array(c, dtype=np.float64) for c in zip(*tramos)]
+    return _envolvente(*columnas, plan.max_puntos)
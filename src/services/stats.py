@@ -0,0 +1,231 @@
+"""
+Estadísticas agregadas del historial, mantenidas de forma incremental.
+
+`GET /experiments/stats` no recorre la tabla en cada consulta: el primer uso
+carga los agregados con un recorrido por páginas (`acumular` + `adoptar`) y,
+desde ahí, el servicio los actualiza al crear y al borrar experimentos.
+
+Por cada campo físico se guardan la cantidad, la suma (para la media) y un
+histograma logarítmico de error relativo acotado (al estilo DDSketch): cada
+cubeta cubre valores con razón `GAMMA` entre sus extremos, así que percentiles,
+mínimo y máximo se leen con un error relativo de a lo sumo `ERROR_RELATIVO`, y
+un borrado solo descuenta uno de su cubeta. Mientras no se borre el extremo,
+mínimo y máximo son exactos.
+
+Los cambios que llegan mientras corre una carga se anotan en ella y `adoptar`
+los reaplica, salvo los que el recorrido ya contó: el recorrido va del más
+nuevo al más antiguo, así que un alta con id mayor al primero que vio es
+posterior a su inicio, y una baja se descuenta solo si el recorrido ya había
+pasado por esa fila (o si era un alta reaplicada).
+
+Los agregados viven en el proceso: con varios workers, `stats_resync_seconds`
+fija cada cuánto se recargan para incorporar lo que escribieron los demás.
+"""
+
+import functools
+import math
+import threading
+import time
+from collections import Counter
+from typing import Iterable
+
+from src.core.config import settings
+from src.storage.experiment_repository import COLUMNAS_DETALLE
+
+ERROR_RELATIVO = 0.01
+GAMMA = (1 + ERROR_RELATIVO) / (1 - ERROR_RELATIVO)
+PERCENTILES = (25, 50, 75, 90, 99)
+
+
+class ResumenCampo:
+    """Cantidad, suma e histograma logarítmico de los valores de un campo."""
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.suma = 0.0
+        # (signo, índice) -> [conteo, mínimo, máximo] de los valores de esa cubeta
+        self._cubetas: dict[tuple[int, int], list] = {}
+
+    @staticmethod
+    def _cubeta(valor: float) -> tuple[int, int]:
+        if valor == 0:
+            return 0, 0
+        return (1 if valor > 0 else -1), math.ceil(math.log(abs(valor), GAMMA))
+
+    def agregar(self, valor: float) -> None:
+        self.n += 1
+        self.suma += valor
+        clave = self._cubeta(valor)
+        cubeta = self._cubetas.get(clave)
+        if cubeta is None:
+            self._cubetas[clave] = [1, valor, valor]
+        else:
+            cubeta[0] += 1
+            cubeta[1] = min(cubeta[1], valor)
+            cubeta[2] = max(cubeta[2], valor)
+
+    def quitar(self, valor: float) -> None:
+        clave = self._cubeta(valor)
+        cubeta = self._cubetas.get(clave)
+        if cubeta is None:
+            return
+        self.n -= 1
+        self.suma -= valor
+        cubeta[0] -= 1
+        if cubeta[0] == 0:
+            del self._cubetas[clave]
+
+    def resumen(self) -> dict:
+        if self.n == 0:
+            return {"n": 0}
+        cubetas = sorted(self._cubetas.values(), key=lambda c: c[1])
+        acumulados, total = [], 0
+        for conteo, _, _ in cubetas:
+            total += conteo
+            acumulados.append(total)
+
+        def percentil(p: float) -> float:
+            rango = int(p / 100 * (self.n - 1) + 0.5)  # Rango más cercano
+            conteo, minimo, maximo = next(c for c, acumulado in zip(cubetas, acumulados) if acumulado > rango)
+            return minimo if conteo == 1 else (minimo + maximo) / 2
+
+        return {
+            "n": self.n,
+            "media": self.suma / self.n,
+            "min": cubetas[0][1],
+            "max": cubetas[-1][2],
+            **{f"p{p}": percentil(p) for p in PERCENTILES},
+        }
+
+
+class EstadisticasExperimentos:
+    """Conteos por tipo y por día, y resumen de cada campo físico por tipo."""
+
+    def __init__(self, resync: float = 0.0) -> None:
+        self.resync = resync
+        self._lock = threading.Lock()
+        self._cargada_en: float | None = None
+        self._carga: EstadisticasExperimentos | None = None   # Carga completa en curso
+        # Solo en una carga: id más nuevo y más antiguo recorridos, y cambios ocurridos durante ella
+        self._tope: int | None = None
+        self._frontera: int | None = None
+        self._cambios: list[tuple[int, str, str, dict, int | None, bool]] = []
+        self._vistos: set[int] = set()
+        self._reiniciar()
+
+    def _reiniciar(self) -> None:
+        self.por_tipo: Counter[str] = Counter()
+        self.por_dia: Counter[str] = Counter()
+        self.campos = {tipo: {c: ResumenCampo() for c in columnas} for tipo, columnas in COLUMNAS_DETALLE.items()}
+
+    @property
+    def cargada(self) -> bool:
+        return self._cargada_en is not None
+
+    @property
+    def sigue_cambios(self) -> bool:
+        """Cargada o cargándose: las altas y bajas le importan."""
+        return self._cargada_en is not None or self._carga is not None
+
+    def necesita_carga(self) -> bool:
+        if self._cargada_en is None:
+            return True
+        return self.resync > 0 and time.monotonic() - self._cargada_en > self.resync
+
+    def iniciar_carga(self) -> "EstadisticasExperimentos":
+        """Agregados vacíos para una carga completa; desde ahora los cambios también se anotan en ella."""
+        carga = EstadisticasExperimentos()
+        with self._lock:
+            self._carga = carga
+        return carga
+
+    def acumular(self, experimentos: Iterable[dict]) -> None:
+        """Suma una página del recorrido (del más nuevo al más antiguo) durante una carga completa."""
+        with self._lock:
+            anotados = {cambio[4] for cambio in self._cambios}
+            for exp in experimentos:
+                self._aplicar(exp["tipo"], exp["fecha_creacion"], exp.get("detalle") or {}, +1)
+                if self._tope is None:
+                    self._tope = exp["id"]
+                self._frontera = exp["id"]
+                if exp["id"] in anotados:
+                    self._vistos.add(exp["id"])
+
+    def _anotar(self, signo: int, tipo: str, fecha_creacion: str, detalle: dict, exp_id: int | None) -> None:
+        with self._lock:
+            # Una baja de una fila que el recorrido ya pasó debe descontarse de la carga
+            recorrida = exp_id is not None and self._frontera is not None and exp_id >= self._frontera
+            self._cambios.append((signo, tipo, fecha_creacion, detalle, exp_id, recorrida))
+
+    def _reaplicar(self) -> None:
+        """Aplica los cambios anotados que el recorrido no alcanzó a contar."""
+        reaplicadas: set[int] = set()
+        for signo, tipo, fecha, detalle, exp_id, recorrida in self._cambios:
+            if exp_id is None:
+                self._aplicar(tipo, fecha, detalle, signo)
+            elif signo > 0 and (self._tope is None or exp_id > self._tope):
+                reaplicadas.add(exp_id)
+                self._aplicar(tipo, fecha, detalle, signo)
+            elif signo < 0 and (recorrida or exp_id in self._vistos or exp_id in reaplicadas):
+                self._aplicar(tipo, fecha, detalle, signo)
+
+    def adoptar(self, carga: "EstadisticasExperimentos") -> None:
+        """Reemplaza los agregados por los de una carga completa recién terminada."""
+        with self._lock:
+            if carga is not self._carga:
+                return  # Otra carga empezó después: esa es la que se adopta
+            with carga._lock:
+                carga._reaplicar()
+            self.por_tipo, self.por_dia, self.campos = carga.por_tipo, carga.por_dia, carga.campos
+            self._cargada_en = time.monotonic()
+            self._carga = None
+
+    def registrar(self, tipo: str, fecha_creacion: str, detalle: dict, exp_id: int | None = None) -> None:
+        self._cambiar(+1, tipo, fecha_creacion, detalle, exp_id)
+
+    def descontar(self, tipo: str, fecha_creacion: str, detalle: dict, exp_id: int | None = None) -> None:
+        self._cambiar(-1, tipo, fecha_creacion, detalle, exp_id)
+
+    def _cambiar(self, signo: int, tipo: str, fecha_creacion: str, detalle: dict, exp_id: int | None) -> None:
+        with self._lock:
+            if self.cargada:
+                self._aplicar(tipo, fecha_creacion, detalle, signo)
+            carga = self._carga
+        if carga is not None:
+            carga._anotar(signo, tipo, fecha_creacion, detalle, exp_id)
+
+    def invalidar(self) -> None:
+        """Fuerza una recarga en la próxima consulta."""
+        with self._lock:
+            self._cargada_en = None
+
+    def _aplicar(self, tipo: str, fecha_creacion: str, detalle: dict, signo: int) -> None:
+        dia = str(fecha_creacion)[:10]
+        self.por_tipo[tipo] += signo
+        self.por_dia[dia] += signo
+        for campo, resumen in self.campos.get(tipo, {}).items():
+            valor = detalle.get(campo)
+            if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+                continue
+            if signo > 0:
+                resumen.agregar(float(valor))
+            else:
+                resumen.quitar(float(valor))
+
+    def resumen(self) -> dict:
+        with self._lock:
+            return {
+                "total": sum(self.por_tipo.values()),
+                "por_tipo": {tipo: n for tipo, n in sorted(self.por_tipo.items()) if n > 0},
+                "por_dia": {dia: n for dia, n in sorted(self.por_dia.items()) if n > 0},
+                "campos": {
+                    tipo: {campo: resumen.resumen() for campo, resumen in campos.items()}
+                    for tipo, campos in self.campos.items()
+                },
+            }
+
+
+@functools.cache
+def get_experiment_stats() -> EstadisticasExperimentos:
+    """Agregados compartidos por todas las instancias del servicio dentro del proceso (se crean en el primer uso)."""
+    return EstadisticasExperimentos(settings.stats_resync_seconds)
@@ -0,0 +1,160 @@
+"""
+Barridos de parámetros sin persistencia (`POST /simulate/sweep`).
+
+Un barrido evalúa un modelo sobre el producto cartesiano de rangos de sus
+parámetros, p. ej. 200 aceleraciones × 200 velocidades iniciales × 50 tiempos
+(2 000 000 de celdas), con las mismas ecuaciones de `kinematics.evaluar`.
+
+La grilla no se materializa: se recorre en bloques de a lo sumo
+`FILAS_POR_BLOQUE` celdas. Se busca el primer eje tal que los siguientes
+quepan en un bloque; ese eje se trocea, los anteriores se fijan y los
+posteriores entran completos. Cada bloque se evalúa con broadcasting (un
+arreglo por eje, con forma (n, 1, ..., 1)) y sale ya en el orden de la grilla
+(último eje más rápido), así que la memoria queda acotada sin importar el
+tamaño total.
+
+Formatos de salida, ambos en streaming:
+    npy   -> arreglo de forma (salidas, celdas) en orden Fortran: se escribe
+             celda a celda y `np.load(...)[i]` sigue siendo la salida i, como
+             en las demás respuestas columnares
+    arrow -> stream IPC con un lote por bloque (requiere `pyarrow`)
+"""
+
+import io
+import math
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+
+from src.core.exceptions import ValidationError
+from src.schemas.simulation import (
+    PARAMETROS_BARRIDO,
+    PARAMETROS_OPCIONALES,
+    SALIDAS_BARRIDO,
+    BarridoSchema,
+)
+from src.services.kinematics import evaluar
+from src.services.tablas import Sumidero
+
+FILAS_POR_BLOQUE = 65_536
+
+# Celdas máximas por barrido (acota el tiempo de CPU, no la memoria)
+MAX_CELDAS_BARRIDO = 20_000_000
+
+
+@dataclass
+class Barrido:
+    modelo: str
+    ejes: dict[str, np.ndarray]   # Parámetros con rango, en el orden de la grilla
+    fijos: dict[str, float]
+    salidas: tuple[str, ...]
+    precision: np.dtype
+
+    @property
+    def forma(self) -> tuple[int, ...]:
+        return tuple(len(valores) for valores in self.ejes.values())
+
+    @property
+    def celdas(self) -> int:
+        return math.prod(self.forma)
+
+    def _evaluar(self, parametros: dict) -> dict[str, np.ndarray]:
+        if self.modelo == "mru":
+            distancia, _, _ = evaluar(0.0, parametros["velocidad"], 0.0, parametros["tiempo"])
+            return {"distancia": distancia}
+        posicion, velocidad, _ = evaluar(
+            parametros["posicion_inicial"], parametros["velocidad_inicial"], parametros["aceleracion"], parametros["tiempo"]
+        )
+        return {"posicion_final": posicion, "velocidad_final": velocidad}
+
+    def bloques(self, max_filas: int = FILAS_POR_BLOQUE) -> Iterator[dict[str, np.ndarray]]:
+        """Salidas de la grilla, bloque a bloque y en orden, como columnas planas."""
+        forma, nombres = self.forma, list(self.ejes)
+        if not forma:
+            yield {s: np.atleast_1d(v).astype(self.precision) for s, v in self._evaluar(self.fijos).items() if s in self.salidas}
+            return
+
+        # Eje que se trocea: el primero cuyos posteriores caben enteros en un bloque
+        k = next(i for i in range(len(forma)) if math.prod(forma[i + 1:]) <= max_filas)
+        resto = forma[k + 1:]
+        paso = max(1, max_filas // math.prod(resto))
+
+        for prefijo in np.ndindex(*forma[:k]):
+            for inicio in range(0, forma[k], paso):
+                parametros = dict(self.fijos)
+                for eje, nombre in enumerate(nombres):
+                    valores = self.ejes[nombre]
+                    if eje < k:
+                        parametros[nombre] = valores[prefijo[eje]]
+                    else:
+                        if eje == k:
+                            valores = valores[inicio:inicio + paso]
+                        parametros[nombre] = valores.reshape((-1,) + (1,) * (len(forma) - eje - 1))
+                forma_bloque = (min(paso, forma[k] - inicio), *resto)
+                resultado = self._evaluar(parametros)
+                yield {
+                    s: np.broadcast_to(resultado[s], forma_bloque).astype(self.precision).ravel()
+                    for s in self.salidas
+                }
+
+
+def planificar_barrido(datos: BarridoSchema) -> Barrido:
+    ejes, fijos = {}, {}
+    for nombre in PARAMETROS_BARRIDO[datos.modelo]:
+        valor = datos.parametros.get(nombre, PARAMETROS_OPCIONALES.get(nombre))
+        if isinstance(valor, (int, float)):
+            fijos[nombre] = float(valor)
+        else:
+            ejes[nombre] = np.linspace(valor.inicio, valor.fin, valor.pasos)
+    # Los rangos respetan el orden en que se declararon en la petición
+    ejes = {nombre: ejes[nombre] for nombre in datos.parametros if nombre in ejes}
+
+    barrido = Barrido(
+        modelo=datos.modelo,
+        ejes=ejes,
+        fijos=fijos,
+        salidas=tuple(datos.salidas or SALIDAS_BARRIDO[datos.modelo]),
+        precision=np.dtype(datos.precision),
+    )
+    if barrido.celdas > MAX_CELDAS_BARRIDO:
+        raise ValidationError(
+            f"El barrido tiene {barrido.celdas} celdas y el máximo es {MAX_CELDAS_BARRIDO}; reduce los pasos."
+        )
+    return barrido
+
+
+def largo_npy(barrido: Barrido) -> int:
+    """Bytes totales de la respuesta `npy` (permite enviar `Content-Length`)."""
+    return len(_cabecera_npy(barrido)) + barrido.celdas * len(barrido.salidas) * barrido.precision.itemsize
+
+
+def _cabecera_npy(barrido: Barrido) -> bytes:
+    buffer = io.BytesIO()
+    np.lib.format.write_array_header_1_0(buffer, {
+        "descr": np.lib.format.dtype_to_descr(barrido.precision),
+        "fortran_order": True,
+        "shape": (len(barrido.salidas), barrido.celdas),
+    })
+    return buffer.getvalue()
+
+
+def codificar_npy(barrido: Barrido) -> Iterator[bytes]:
+    yield _cabecera_npy(barrido)
+    for bloque in barrido.bloques():
+        # En orden Fortran, las salidas de una celda van contiguas
+        yield np.column_stack([bloque[s] for s in barrido.salidas]).tobytes()
+
+
+def codificar_arrow(barrido: Barrido) -> Iterator[bytes]:
+    import pyarrow as pa
+
+    tipo = pa.float32() if barrido.precision == np.float32 else pa.float64()
+    esquema = pa.schema([(s, tipo) for s in barrido.salidas])
+    sumidero = Sumidero()
+    escritor = pa.ipc.new_stream(sumidero, esquema)
+    for bloque in barrido.bloques():
+        escritor.write_batch(pa.record_batch([bloque[s] for s in barrido.salidas], schema=esquema))
+        yield sumidero.retirar()
+    escritor.close()
+    yield sumidero.retirar()
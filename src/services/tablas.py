@@ -0,0 +1,144 @@
+"""
+Tablas columnares de ensayos en Parquet o Arrow IPC (requiere `pyarrow`, opcional).
+
+Importación: cada columna física se lee directamente como un arreglo float64
+(los nulos quedan en NaN, es decir, como la incógnita de la fila) y el archivo
+completo pasa por los solucionadores vectorizados de `batch_solver`, que
+aplican la regla de no negatividad de `MRUSchema`/`MRUASchema` columna a
+columna. Nunca se arma un diccionario por fila para validar.
+
+Exportación: las mismas columnas planas que el CSV. Cada página del historial
+se escribe como un lote (Arrow) o un row group (Parquet) y sus bytes se
+entregan en cuanto se codifican.
+"""
+
+import importlib.util
+from typing import Literal
+
+import numpy as np
+
+from src.core.exceptions import ValidationError
+from src.core.modelos import obtener_modelo
+from src.storage.experiment_repository import COLUMNAS_DETALLE, COLUMNAS_MAESTRO
+
+FormatoTabla = Literal["parquet", "arrow"]
+
+MEDIA_TABLA = {"parquet": "application/vnd.apache.parquet", "arrow": "application/vnd.apache.arrow.stream"}
+
+# Columnas físicas de todos los tipos, sin repetir y en orden de declaración
+COLUMNAS_FISICAS = tuple(dict.fromkeys(c for columnas in COLUMNAS_DETALLE.values() for c in columnas))
+COLUMNAS_PLANAS = (*COLUMNAS_MAESTRO, *COLUMNAS_FISICAS)
+
+
+def pyarrow_disponible() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def fila_plana(exp: dict) -> list:
+    """Valores de `COLUMNAS_PLANAS` de un experimento con `detalle`; None donde no aplica."""
+    detalle = exp.get("detalle") or {}
+    return [exp.get(c) for c in COLUMNAS_MAESTRO] + [detalle.get(c) for c in COLUMNAS_FISICAS]
+
+
+def abrir_tabla(contenido: bytes, formato: FormatoTabla):
+    """Lee un archivo Parquet o un stream Arrow IPC completo como `pyarrow.Table`."""
+    import pyarrow as pa
+
+    try:
+        if formato == "parquet":
+            import pyarrow.parquet as pq
+            return pq.read_table(pa.BufferReader(contenido))
+        return pa.ipc.open_stream(contenido).read_all()
+    except pa.ArrowInvalid as e:
+        raise ValidationError(f"El archivo no es un {formato} válido: {e}")
+
+
+def columna_float64(tabla, nombre_col: str) -> np.ndarray:
+    import pyarrow as pa
+
+    try:
+        return tabla.column(nombre_col).cast(pa.float64()).to_numpy()
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        raise ValidationError(f"La columna '{nombre_col}' debe ser numérica.")
+
+
+def leer_tabla(contenido: bytes, formato: FormatoTabla, tipo: str) -> tuple[dict[str, np.ndarray], list[str | None] | None]:
+    """Columnas físicas de `tipo` como float64 y, si el archivo la trae, la columna `nombre`."""
+    import pyarrow as pa
+
+    tabla = abrir_tabla(contenido, formato)
+    # Las variables opcionales del modelo pueden faltar en el archivo y toman su valor por defecto
+    opcionales = obtener_modelo(tipo).opcionales
+    faltantes = [c for c in COLUMNAS_DETALLE[tipo] if c not in tabla.column_names and c not in opcionales]
+    if faltantes:
+        raise ValidationError(f"Faltan columnas de {tipo}: {', '.join(faltantes)}.")
+
+    columnas = {}
+    for nombre_col in COLUMNAS_DETALLE[tipo]:
+        if nombre_col not in tabla.column_names:
+            columnas[nombre_col] = np.full(tabla.num_rows, opcionales[nombre_col])
+            continue
+        columnas[nombre_col] = columna_float64(tabla, nombre_col)
+
+    nombres = tabla.column("nombre").cast(pa.string()).to_pylist() if "nombre" in tabla.column_names else None
+    if nombres is not None and any(n is not None and not 3 <= len(n) <= 100 for n in nombres):
+        raise ValidationError("Cada nombre debe tener entre 3 y 100 caracteres.")
+    return columnas, nombres
+
+
+class Sumidero:
+    """Destino de escritura que acumula los bytes hasta que se retiran."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self._partes: list[bytes] = []
+
+    def write(self, datos) -> int:
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        # El escritor de Parquet cierra su destino; los bytes se siguen pudiendo retirar
+        pass
+
+    def retirar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+class CodificadorTabla:
+    """Escribe páginas del historial como un único archivo Parquet o stream Arrow, por partes."""
+
+    def __init__(self, formato: FormatoTabla) -> None:
+        import pyarrow as pa
+
+        self._pa = pa
+        self._sumidero = Sumidero()
+        self.esquema = pa.schema(
+            [("id", pa.int64()), ("nombre", pa.string()), ("tipo", pa.string()), ("fecha_creacion", pa.string())]
+            + [(c, pa.float64()) for c in COLUMNAS_FISICAS]
+        )
+        if formato == "parquet":
+            import pyarrow.parquet as pq
+            self._escritor = pq.ParquetWriter(self._sumidero, self.esquema)
+        else:
+            self._escritor = pa.ipc.new_stream(self._sumidero, self.esquema)
+
+    def inicio(self) -> bytes:
+        return self._sumidero.retirar()
+
+    def pagina(self, pagina: list[dict]) -> bytes:
+        filas = [fila_plana(exp) for exp in pagina]
+        columnas = {nombre: list(valores) for nombre, valores in zip(COLUMNAS_PLANAS, zip(*filas))}
+        self._escritor.write_table(self._pa.table(columnas, schema=self.esquema))
+        return self._sumidero.retirar()
+
+    def cerrar(self) -> bytes:
+        # Parquet escribe aquí su pie con los metadatos de los row groups
+        self._escritor.close()
+        return self._sumidero.retirar()
@@ -0,0 +1,263 @@
+"""
+Propagación de incertidumbre por Monte Carlo para MRU y MRUA.
+
+Cada dato medido se muestrea de una normal centrada en su valor con la
+desviación indicada; las muestras se resuelven con los solucionadores
+vectorizados de `batch_solver`, igual que un lote, y de cada incógnita se
+reportan media, desviación estándar e intervalo de confianza. Las muestras
+sin solución física (un dato muestreado negativo, divisor cero,
+discriminante negativo) se descartan y se cuentan por motivo: el resultado
+es la distribución condicionada a que el ensayo tenga solución.
+
+Las muestras se procesan en bloques de `MUESTRAS_POR_BLOQUE`, así que la
+memoria no depende de cuántas se pidan. Media y varianza se combinan bloque
+a bloque (fórmula de Chan et al.); los percentiles salen de un histograma de
+`CUBETAS` cubetas cuyo rango fija el primer bloque (su intervalo, con medio
+ancho de margen a cada lado). Con un solo bloque los percentiles son exactos.
+
+Cada bloque tiene su propia semilla derivada de `semilla`, de modo que las
+muestras no dependen de cómo se repartan los bloques: con
+`montecarlo_workers > 0` los bloques posteriores al primero se reparten en
+un pool de procesos.
+"""
+
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.core.config import settings
+from src.core.exceptions import ValidationError
+from src.services.batch_solver import (
+    ESTADO_DATOS_INSUFICIENTES,
+    ESTADO_DISCRIMINANTE_NEGATIVO,
+    ESTADO_DIVISION_CERO,
+    ESTADO_VALOR_NEGATIVO,
+    resolver_lote,
+)
+from src.storage.experiment_repository import COLUMNAS_DETALLE
+
+MUESTRAS_POR_BLOQUE = 262_144
+CUBETAS = 16_384
+
+# Motivo de descarte de una muestra según su código de estado
+MOTIVOS_DESCARTE = {
+    ESTADO_DATOS_INSUFICIENTES: "datos_insuficientes",
+    ESTADO_DIVISION_CERO: "division_cero",
+    ESTADO_VALOR_NEGATIVO: "valor_negativo",
+    ESTADO_DISCRIMINANTE_NEGATIVO: "discriminante_negativo",
+}
+
+
+@dataclass(frozen=True)
+class PlanMonteCarlo:
+    tipo: str
+    datos: dict[str, float]          # Valor central de cada dato conocido
+    desviaciones: dict[str, float]
+    incognitas: tuple[str, ...]
+
+
+@dataclass
+class Acumulado:
+    """Momentos e histograma de una variable, combinables entre bloques y procesos."""
+
+    rango: tuple[float, float]
+    n: int = 0
+    media: float = 0.0
+    m2: float = 0.0                  # Suma de cuadrados de las desviaciones a la media
+    minimo: float = math.inf
+    maximo: float = -math.inf
+    # [debajo del rango, CUBETAS cubetas, encima del rango]
+    conteos: np.ndarray = field(default_factory=lambda: np.zeros(CUBETAS + 2, dtype=np.int64))
+
+    def agregar(self, valores: np.ndarray) -> None:
+        if not len(valores):
+            return
+        media = float(valores.mean())
+        inicio, fin = self.rango
+        posiciones = np.clip((valores - inicio) * (CUBETAS / (fin - inicio)), -1, CUBETAS)
+        self.unir(Acumulado(
+            rango=self.rango,
+            n=len(valores),
+            media=media,
+            m2=float(np.square(valores - media).sum()),
+            minimo=float(valores.min()),
+            maximo=float(valores.max()),
+            conteos=np.bincount(np.floor(posiciones).astype(np.int64) + 1, minlength=CUBETAS + 2),
+        ))
+
+    def unir(self, otro: "Acumulado") -> None:
+        n = self.n + otro.n
+        if n == 0:
+            return
+        delta = otro.media - self.media
+        self.media += delta * otro.n / n
+        self.m2 += otro.m2 + delta * delta * self.n * otro.n / n
+        self.n = n
+        self.minimo, self.maximo = min(self.minimo, otro.minimo), max(self.maximo, otro.maximo)
+        self.conteos += otro.conteos
+
+    @property
+    def desviacion(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def percentil(self, q: float) -> float | None:
+        """Percentil `q` interpolado dentro de su cubeta; None si cae fuera del rango."""
+        objetivo = q * self.n
+        acumulados = np.cumsum(self.conteos)
+        i = int(np.searchsorted(acumulados, objetivo))
+        if i == 0 or i >= CUBETAS + 1:
+            return None
+        inicio, fin = self.rango
+        fraccion = (objetivo - acumulados[i - 1]) / self.conteos[i]
+        valor = inicio + (i - 1 + fraccion) * (fin - inicio) / CUBETAS
+        return float(min(max(valor, self.minimo), self.maximo))
+
+
+def planificar_incertidumbre(tipo: str, datos: dict, desviaciones: dict[str, float]) -> PlanMonteCarlo:
+    """Separa datos e incógnitas (las variables en None) y valida las desviaciones."""
+    conocidos = {c: float(datos[c]) for c in COLUMNAS_DETALLE[tipo] if datos.get(c) is not None}
+    incognitas = tuple(c for c in COLUMNAS_DETALLE[tipo] if c not in conocidos)
+    sobrantes = sorted(set(desviaciones) - set(conocidos))
+    if sobrantes:
+        raise ValidationError(f"Solo los datos medidos llevan desviación; sobran: {', '.join(sobrantes)}.")
+    if not incognitas:
+        raise ValidationError("No hay incógnitas que propagar: deja en null la variable a despejar.")
+    return PlanMonteCarlo(tipo, conocidos, dict(desviaciones), incognitas)
+
+
+def _muestrear(plan: PlanMonteCarlo, n: int, rng: np.random.Generator) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """Resuelve `n` muestras: incógnitas de las válidas y cantidad de muestras por código de estado."""
+    columnas = {}
+    for columna in COLUMNAS_DETALLE[plan.tipo]:
+        if columna in plan.incognitas:
+            columnas[columna] = np.full(n, np.nan)
+        elif plan.desviaciones.get(columna):
+            columnas[columna] = rng.normal(plan.datos[columna], plan.desviaciones[columna], n)
+        else:
+            columnas[columna] = np.full(n, plan.datos[columna])
+    resultado = resolver_lote(plan.tipo, columnas)
+    validas = resultado.validas
+    estados = np.bincount(resultado.estado, minlength=max(MOTIVOS_DESCARTE) + 1)
+    return {v: resultado.columnas[v][validas] for v in plan.incognitas}, estados
+
+
+def _procesar_bloques(
+    plan: PlanMonteCarlo, semillas: list[np.random.SeedSequence], tamanos: list[int], rangos: dict[str, tuple[float, float]],
+) -> tuple[dict[str, Acumulado], np.ndarray]:
+    # Función de módulo: es lo que se envía a los procesos del pool
+    acumulados = {v: Acumulado(rangos[v]) for v in plan.incognitas}
+    estados = np.zeros(max(MOTIVOS_DESCARTE) + 1, dtype=np.int64)
+    for semilla, n in zip(semillas, tamanos):
+        valores, conteo = _muestrear(plan, n, np.random.default_rng(semilla))
+        for variable, acumulado in acumulados.items():
+            acumulado.agregar(valores[variable])
+        estados += conteo
+    return acumulados, estados
+
+
+_pool: ProcessPoolExecutor | None = None
+_lock_pool = threading.Lock()
+
+
+def _obtener_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            # "spawn": el proceso de la API tiene hilos (event loop, write-behind) que fork copiaría a medio usar
+            _pool = ProcessPoolExecutor(settings.montecarlo_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def cerrar_pool_montecarlo() -> None:
+    global _pool
+    with _lock_pool:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _repartir(
+    plan: PlanMonteCarlo, semillas: list[np.random.SeedSequence], tamanos: list[int], rangos: dict[str, tuple[float, float]],
+) -> list[tuple[dict[str, Acumulado], np.ndarray]]:
+    procesos = settings.montecarlo_workers
+    if procesos < 1 or len(tamanos) < 2:
+        return [_procesar_bloques(plan, semillas, tamanos, rangos)] if tamanos else []
+    pool = _obtener_pool()
+    futuros = [
+        pool.submit(_procesar_bloques, plan, semillas[i::procesos], tamanos[i::procesos], rangos)
+        for i in range(min(procesos, len(tamanos)))
+    ]
+    return [futuro.result() for futuro in futuros]
+
+
+def _intervalo_piloto(valores: np.ndarray, alfa: float) -> tuple[tuple[float, float], tuple[float, float]]:
+    """Intervalo exacto del primer bloque y rango del histograma que lo contiene con margen."""
+    inferior, superior = (float(q) for q in np.quantile(valores, [alfa / 2, 1 - alfa / 2]))
+    margen = 0.5 * (superior - inferior) or max(abs(inferior) * 1e-9, 1e-12)  # Variable sin dispersión
+    return (inferior, superior), (inferior - margen, superior + margen)
+
+
+def propagar(plan: PlanMonteCarlo, muestras: int, confianza: float, semilla: int | None = None) -> dict:
+    """Media, desviación e intervalo de confianza de cada incógnita, y muestras descartadas por motivo."""
+    tamanos = [MUESTRAS_POR_BLOQUE] * (muestras // MUESTRAS_POR_BLOQUE)
+    if muestras % MUESTRAS_POR_BLOQUE:
+        tamanos.append(muestras % MUESTRAS_POR_BLOQUE)
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    alfa = 1 - confianza
+
+    # El primer bloque fija el rango de los histogramas (y es el respaldo si un percentil cae fuera)
+    piloto, estados = _muestrear(plan, tamanos[0], np.random.default_rng(semillas[0]))
+    if not len(piloto[plan.incognitas[0]]):
+        motivos = ", ".join(MOTIVOS_DESCARTE[c] for c in np.flatnonzero(estados) if c in MOTIVOS_DESCARTE)
+        raise ValidationError(f"Ninguna muestra tiene solución física ({motivos}); revisa datos y desviaciones.")
+    intervalos, acumulados = {}, {}
+    for variable, valores in piloto.items():
+        intervalos[variable], rango = _intervalo_piloto(valores, alfa)
+        acumulados[variable] = Acumulado(rango)
+        acumulados[variable].agregar(valores)
+
+    for parciales, conteo in _repartir(plan, semillas[1:], tamanos[1:], {v: a.rango for v, a in acumulados.items()}):
+        for variable, parcial in parciales.items():
+            acumulados[variable].unir(parcial)
+        estados = estados + conteo
+
+    variables = {}
+    for variable, acumulado in acumulados.items():
+        inferior, superior = intervalos[variable]
+        if len(tamanos) > 1:
+            # Un percentil fuera del rango del histograma conserva el valor del primer bloque
+            p_inferior, p_superior = acumulado.percentil(alfa / 2), acumulado.percentil(1 - alfa / 2)
+            inferior = inferior if p_inferior is None else p_inferior
+            superior = superior if p_superior is None else p_superior
+        variables[variable] = {
+            "media": acumulado.media,
+            "desviacion": acumulado.desviacion,
+            "ic_inferior": inferior,
+            "ic_superior": superior,
+        }
+    return {
+        "muestras": muestras,
+        "validas": acumulados[plan.incognitas[0]].n,
+        "descartadas": {motivo: int(estados[codigo]) for codigo, motivo in MOTIVOS_DESCARTE.items() if estados[codigo]},
+        "confianza": confianza,
+        "variables": variables,
+    }
+
+
+def filas_incertidumbre(plan: PlanMonteCarlo, resultado: dict) -> list[dict]:
+    """Filas de la tabla `incertidumbres`: las incógnitas con su intervalo y los datos con su desviación."""
+    filas = [
+        {"variable": variable, "despejada": True, **resumen,
+         "confianza": resultado["confianza"], "muestras": resultado["validas"]}
+        for variable, resumen in resultado["variables"].items()
+    ]
+    filas += [
+        {"variable": variable, "despejada": False, "media": plan.datos[variable], "desviacion": sigma,
+         "ic_inferior": None, "ic_superior": None, "confianza": None, "muestras": None}
+        for variable, sigma in plan.desviaciones.items()
+    ]
+    return filas
@@ -0,0 +1,240 @@
+"""
+Escritura diferida (write-behind) con commit en grupo para los cálculos.
+
+Con `write_behind_enabled=True`, `POST /experiments/calculate/mru|mrua` no
+escribe en la base dentro de la petición: resuelve la física, encola el
+experimento y responde de inmediato con un ticket. Un hilo de fondo vacía la
+cola cada `write_behind_flush_ms` milisegundos (o antes, al juntar
+`write_behind_max_rows` filas) con las inserciones multi-fila de
+`create_experiments_bulk`, así que una ráfaga de 30 alumnos se guarda en un par
+de viajes en lugar de 30.
+
+Cada experimento encolado se anota antes en un archivo de respaldo (JSON por
+línea, con fsync) y se marca como guardado después del flush. Al reiniciar se
+reencolan los que no alcanzaron a marcarse. La entrega es "al menos una vez":
+si el proceso cae entre el insert y la marca, ese grupo se vuelve a insertar.
+Un fallo de la base, en cambio, no duplica: cada bloque de `TAMANO_BLOQUE`
+filas se guarda completo o nada y solo se reintentan los bloques fallidos.
+"""
+
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.core.config import settings
+from src.core.exceptions import StorageError
+from src.services.cache import LRUTTLCache, get_experiment_cache
+from src.services.stats import EstadisticasExperimentos, get_experiment_stats
+from src.storage.experiment_repository import TAMANO_BLOQUE
+
+# Tickets ya resueltos que se recuerdan para consultar su estado
+MAX_TICKETS_RESUELTOS = 10_000
+
+
+class WriteBehindQueue:
+    """Cola de experimentos resueltos pendientes de guardar.
+
+    Args:
+        repository: Repositorio síncrono con `create_experiments_bulk`.
+        ruta_respaldo: Archivo donde se anotan los pendientes (sobrevive a caídas).
+        intervalo: Segundos máximos que un experimento espera en la cola.
+        max_filas: Filas que disparan un flush sin esperar al intervalo.
+        cache: Caché cuyos listados se invalidan tras cada flush.
+        estadisticas: Agregados de /stats que se actualizan con lo guardado.
+    """
+
+    def __init__(
+        self,
+        repository,
+        ruta_respaldo: str,
+        intervalo: float = 0.05,
+        max_filas: int = 500,
+        cache: LRUTTLCache | None = None,
+        estadisticas: EstadisticasExperimentos | None = None,
+    ) -> None:
+        self.repository = repository
+        self.intervalo = intervalo
+        self.max_filas = max_filas
+        self.cache = cache or get_experiment_cache()
+        self.estadisticas = estadisticas or get_experiment_stats()
+        self._ruta = Path(ruta_respaldo)
+        self._ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._condicion = threading.Condition()
+        self._lock_flush = threading.Lock()  # Un solo flush a la vez
+        self._archivo = None
+        self._pendientes: OrderedDict[str, dict] = OrderedDict()
+        self._resueltos: OrderedDict[str, dict] = OrderedDict()
+        self._detener = False
+        self._recuperar()
+        self._hilo = threading.Thread(target=self._bucle, name="write-behind", daemon=True)
+        self._hilo.start()
+
+    # --- Respaldo en disco ---
+    def _recuperar(self) -> None:
+        """Reencola lo anotado en el respaldo que no llegó a marcarse como guardado."""
+        if self._ruta.exists():
+            with self._ruta.open(encoding="utf-8") as archivo:
+                for linea in archivo:
+                    try:
+                        registro = json.loads(linea)
+                    except json.JSONDecodeError:
+                        break  # Última línea a medio escribir durante la caída
+                    if "guardado" in registro:
+                        self._pendientes.pop(registro["ticket"], None)
+                    else:
+                        self._pendientes[registro["ticket"]] = registro
+        self._compactar()
+
+    def _anotar(self, registros: list[dict]) -> None:
+        self._archivo.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in registros))
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+
+    def _compactar(self) -> None:
+        """Reescribe el respaldo solo con los pendientes (o lo vacía) y lo reabre para anexar."""
+        temporal = self._ruta.with_suffix(self._ruta.suffix + ".tmp")
+        with temporal.open("w", encoding="utf-8") as archivo:
+            archivo.writelines(json.dumps(r, separators=(",", ":")) + "\n" for r in self._pendientes.values())
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self._ruta)
+        if self._archivo is not None:
+            self._archivo.close()
+        self._archivo = self._ruta.open("a", encoding="utf-8")
+
+    # --- API pública ---
+    def encolar(self, tipo: str, nombre: str, detalle: dict) -> str:
+        """Anota el experimento en el respaldo, lo encola y retorna su ticket."""
+        registro = {"ticket": uuid.uuid4().hex, "tipo": tipo, "nombre": nombre, "detalle": detalle}
+        with self._condicion:
+            self._anotar([registro])
+            self._pendientes[registro["ticket"]] = registro
+            if len(self._pendientes) >= self.max_filas:
+                self._condicion.notify()
+        return registro["ticket"]
+
+    def estado(self, ticket: str) -> dict | None:
+        """`pendiente` (con el último error, si un flush falló) o `guardado` con su id."""
+        with self._condicion:
+            if ticket in self._pendientes:
+                error = self._pendientes[ticket].get("error")
+                return {"ticket": ticket, "estado": "pendiente", **({"error": error} if error else {})}
+            resuelto = self._resueltos.get(ticket)
+            return {"ticket": ticket, **resuelto} if resuelto is not None else None
+
+    def pendientes(self) -> int:
+        with self._condicion:
+            return len(self._pendientes)
+
+    def vaciar(self) -> None:
+        """Guarda ya todo lo pendiente (lo usan el cierre y las pruebas)."""
+        while self._flush():
+            pass
+
+    def cerrar(self) -> None:
+        with self._condicion:
+            self._detener = True
+            self._condicion.notify()
+        self._hilo.join()
+        self._archivo.close()
+
+    # --- Hilo de fondo ---
+    def _bucle(self) -> None:
+        while True:
+            with self._condicion:
+                self._condicion.wait_for(
+                    lambda: self._detener or len(self._pendientes) >= self.max_filas,
+                    timeout=self.intervalo,
+                )
+                detener = self._detener
+            if detener:
+                self.vaciar()
+                return
+            self._flush()
+
+    def _flush(self) -> int:
+        """Guarda un grupo de hasta `max_filas` pendientes; retorna cuántos se guardaron."""
+        with self._lock_flush:
+            with self._condicion:
+                lote = list(self._pendientes.values())[:self.max_filas]
+            if not lote:
+                return 0
+            grupos: dict[str, list[dict]] = {}
+            for registro in lote:
+                grupos.setdefault(registro["tipo"], []).append(registro)
+
+            # Los viajes a la base ocurren sin el lock: encolar sigue respondiendo mientras tanto
+            guardados: list[tuple[dict, int]] = []
+            # Una llamada por bloque atómico del repositorio: si uno falla, solo ese se reintenta
+            bloques = [
+                (tipo, registros[inicio:inicio + TAMANO_BLOQUE])
+                for tipo, registros in grupos.items() for inicio in range(0, len(registros), TAMANO_BLOQUE)
+            ]
+            for tipo, registros in bloques:
+                try:
+                    ids = self.repository.create_experiments_bulk(
+                        tipo, [r["nombre"] for r in registros], [dict(r["detalle"]) for r in registros]
+                    )
+                except StorageError as e:
+                    # Quedan en la cola y se reintentan en el siguiente ciclo
+                    for registro in registros:
+                        registro["error"] = str(e)
+                    continue
+                guardados.extend(zip(registros, ids))
+
+            if not guardados:
+                return 0
+            with self._condicion:
+                for registro, nuevo_id in guardados:
+                    del self._pendientes[registro["ticket"]]
+                    self._resolver(registro["ticket"], {"estado": "guardado", "id": nuevo_id})
+                if self._pendientes:
+                    self._anotar([{"ticket": r["ticket"], "guardado": nuevo_id} for r, nuevo_id in guardados])
+                else:
+                    self._compactar()
+            self.cache.invalidar_grupo("listado")
+            fecha = datetime.now(timezone.utc).isoformat()
+            for registro, nuevo_id in guardados:
+                self.estadisticas.registrar(registro["tipo"], fecha, registro["detalle"], nuevo_id)
+            return len(guardados)
+
+    def _resolver(self, ticket: str, estado: dict) -> None:
+        self._resueltos[ticket] = estado
+        while len(self._resueltos) > MAX_TICKETS_RESUELTOS:
+            self._resueltos.popitem(last=False)
+
+
+_lock = threading.Lock()
+_cola: WriteBehindQueue | None = None
+
+
+def abrir_cola_escritura(repository) -> WriteBehindQueue:
+    """Crea (una sola vez) la cola del proceso, reencolando lo que quedó en el respaldo."""
+    global _cola
+    with _lock:
+        if _cola is None:
+            _cola = WriteBehindQueue(
+                repository,
+                settings.write_behind_spill_path,
+                intervalo=settings.write_behind_flush_ms / 1000,
+                max_filas=settings.write_behind_max_rows,
+            )
+        return _cola
+
+
+def get_cola_escritura() -> WriteBehindQueue | None:
+    """La cola abierta, o None si la escritura diferida está desactivada."""
+    return _cola
+
+
+def cerrar_cola_escritura() -> None:
+    """Guarda lo pendiente y detiene el hilo de fondo."""
+    global _cola
+    with _lock:
+        if _cola is not None:
+            _cola.cerrar()
+            _cola = None
@@ -0,0 +1,167 @@
+import asyncio
+
+from src.core.exceptions import StorageError
+from src.core.metrics import instrumentar
+from src.schemas.experiment import ExperimentCreate
+from src.storage.base import AsyncBaseRepository
+from src.storage.client import errores_supabase
+from src.storage.experiment_repository import (
+    BLOQUES_SERIE_POR_VIAJE,
+    COLUMNAS_MAESTRO,
+    COLUMNAS_SERIE,
+    SELECT_CON_DETALLE,
+    TABLA_INCERTIDUMBRE,
+    TABLA_SERIES,
+    TAMANO_BLOQUE,
+    datos_serie,
+    fila_serie,
+    filtrar_pagina,
+    filtrar_serie,
+    unir_detalle,
+)
+
+
+@instrumentar("supabase")
+class AsyncExperimentRepository(AsyncBaseRepository):
+    """Mismas operaciones que `ExperimentRepository`, sin bloquear el event loop."""
+
+    async def create_experiment_with_detail(self, exp_data: ExperimentCreate, physics_data: dict) -> dict:
+        """Versión asíncrona de `ExperimentRepository.create_experiment_with_detail`."""
+        try:
+            res = await self.client.rpc("crear_experimento_con_detalle", {
+                "p_nombre": exp_data.nombre,
+                "p_tipo": exp_data.tipo,
+                "p_detalle": physics_data,
+            }).execute()
+        except errores_supabase() as e:
+            self._handle_error("create_experiment_with_detail", str(e))
+        if not res.data:
+            raise StorageError("create_experiment_with_detail", "La función no retornó el experimento creado")
+        return res.data
+
+    async def create_experiment_with_uncertainty(
+        self, exp_data: ExperimentCreate, physics_data: dict, uncertainty_rows: list[dict],
+    ) -> dict:
+        """Versión asíncrona de `ExperimentRepository.create_experiment_with_uncertainty`."""
+        try:
+            res = await self.client.rpc("crear_experimento_con_incertidumbre", {
+                "p_nombre": exp_data.nombre,
+                "p_tipo": exp_data.tipo,
+                "p_detalle": physics_data,
+                "p_incertidumbre": uncertainty_rows,
+            }).execute()
+        except errores_supabase() as e:
+            self._handle_error("create_experiment_with_uncertainty", str(e))
+        if not res.data:
+            raise StorageError("create_experiment_with_uncertainty", "La función no retornó el experimento creado")
+        return res.data
+
+    async def create_experiments_bulk(self, tipo: str, nombres: list[str], physics_rows: list[dict]) -> list[int]:
+        """Versión asíncrona de `ExperimentRepository.create_experiments_bulk`."""
+        ids: list[int] = []
+        try:
+            for inicio in range(0, len(nombres), TAMANO_BLOQUE):
+                bloque = nombres[inicio:inicio + TAMANO_BLOQUE]
+                res = await self.client.rpc("crear_experimentos_con_detalle", {
+                    "p_tipo": tipo,
+                    "p_nombres": bloque,
+                    "p_detalles": physics_rows[inicio:inicio + TAMANO_BLOQUE],
+                }).execute()
+                if len(res.data) != len(bloque):
+                    raise StorageError("create_experiments_bulk", "No se pudieron crear todos los experimentos del bloque")
+                ids.extend(fila["id"] for fila in res.data)
+        except errores_supabase() as e:
+            self._handle_error("create_experiments_bulk", str(e))
+        return ids
+
+    async def get_all(self) -> list:
+        response = await self.client.table("experimentos").select("*").execute()
+        return response.data
+
+    async def get_page(
+        self,
+        limit: int,
+        after: tuple[str, int] | None = None,
+        columns: list[str] | None = None,
+        tipo: str | None = None,
+        desde: str | None = None,
+        hasta: str | None = None,
+        detalle: bool = False,
+    ) -> list[dict]:
+        query = self.client.table("experimentos").select(SELECT_CON_DETALLE if detalle else ",".join(columns or COLUMNAS_MAESTRO))
+        response = await filtrar_pagina(query, after, tipo, desde, hasta).limit(limit).execute()
+        return [unir_detalle(exp) for exp in response.data] if detalle else response.data
+
+    async def get_by_id(self, exp_id: int) -> dict | None:
+        response = await self.client.table("experimentos").select(SELECT_CON_DETALLE).eq("id", exp_id).execute()
+        if not response.data:
+            return None
+        return unir_detalle(response.data[0])
+
+    async def get_many(self, exp_ids: list[int]) -> list[dict]:
+        # Los bloques no dependen entre sí: se piden a la vez
+        respuestas = await asyncio.gather(*(
+            self.client.table("experimentos").select(SELECT_CON_DETALLE).in_("id", exp_ids[inicio:inicio + TAMANO_BLOQUE]).execute()
+            for inicio in range(0, len(exp_ids), TAMANO_BLOQUE)
+        ))
+        return [unir_detalle(exp) for response in respuestas for exp in response.data]
+
+    async def get_uncertainty(self, exp_id: int) -> list[dict]:
+        response = await self.client.table(TABLA_INCERTIDUMBRE).select("*").eq("experimento_id", exp_id).order("id").execute()
+        return response.data
+
+    async def add_series_blocks(self, exp_id: int, bloques: list[dict]) -> None:
+        from postgrest.types import ReturnMethod
+
+        try:
+            for inicio in range(0, len(bloques), BLOQUES_SERIE_POR_VIAJE):
+                await self.client.table(TABLA_SERIES).insert(
+                    [fila_serie(exp_id, b) for b in bloques[inicio:inicio + BLOQUES_SERIE_POR_VIAJE]],
+                    returning=ReturnMethod.minimal,
+                ).execute()
+        except errores_supabase() as e:
+            self._handle_error("add_series_blocks", str(e))
+
+    async def get_series_blocks(self, exp_id: int, t0: float | None = None, t1: float | None = None) -> list[dict]:
+        bloques: list[dict] = []
+        while True:
+            query = filtrar_serie(self.client.table(TABLA_SERIES).select(",".join(COLUMNAS_SERIE)), exp_id, t0, t1)
+            if bloques:
+                query = query.gt("indice", bloques[-1]["indice"])
+            pagina = (await query.limit(TAMANO_BLOQUE).execute()).data
+            bloques.extend(pagina)
+            if len(pagina) < TAMANO_BLOQUE:
+                return bloques
+
+    async def get_series_data(self, exp_id: int, indices: list[int]) -> dict[int, bytes]:
+        # Los grupos de bloques no dependen entre sí: se piden a la vez
+        respuestas = await asyncio.gather(*(
+            self.client.table(TABLA_SERIES).select("indice,datos").eq("experimento_id", exp_id)
+            .in_("indice", indices[inicio:inicio + BLOQUES_SERIE_POR_VIAJE]).execute()
+            for inicio in range(0, len(indices), BLOQUES_SERIE_POR_VIAJE)
+        ))
+        return {indice: datos for response in respuestas for indice, datos in datos_serie(response.data).items()}
+
+    async def delete(self, exp_id: int) -> bool:
+        response = await self.client.table("experimentos").delete().eq("id", exp_id).execute()
+        return len(response.data) > 0
+
+
+class AsyncRepositoryAdapter:
+    """Expone un repositorio síncrono (p. ej. SQLite) con la interfaz asíncrona.
+
+    Cada llamada corre en un hilo del pool por defecto; sirve para backends
+    locales cuyas operaciones duran microsegundos y no justifican un driver
+    asíncrono propio.
+    """
+
+    def __init__(self, repository) -> None:
+        self.repository = repository
+
+    def __getattr__(self, nombre: str):
+        metodo = getattr(self.repository, nombre)
+
+        async def llamada(*args, **kwargs):
+            return await asyncio.to_thread(metodo, *args, **kwargs)
+
+        return llamada
@@ -1,20 +1,38 @@
-from supabase import create_client, Client
-from src.core.config import settings
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 from src.core.exceptions import StorageError
+from src.storage.client import get_client
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient, Client
 
 class BaseRepository:
     """Clase base para todos los repositorios de Supabase."""
     
-    def __init__(self) -> None:
+    def __init__(self, client: Client | None = None) -> None:
         try:
-            # Inicializa el cliente usando el Singleton de settings
-            self.client: Client = create_client(
-                settings.supabase_url, 
-                settings.supabase_key
-            )
+            # Reutiliza el cliente compartido (y su pool de conexiones)
+            self.client: Client = client or get_client()
         except Exception as e:
             raise StorageError("Conexión", str(e))
 
     def _handle_error(self, operation: str, error_detail: str):
         """Centraliza el manejo de errores de la base de datos."""
-        raise StorageError(operation, error_detail)
\ No newline at end of file
+        raise StorageError(operation, error_detail)
+
+
+class AsyncBaseRepository:
+    """Clase base para los repositorios asíncronos de Supabase.
+
+    El cliente asíncrono se crea con `await`, por lo que se recibe ya abierto
+    (ver `src.storage.client.get_async_client`).
+    """
+
+    def __init__(self, client: AsyncClient) -> None:
+        self.client: AsyncClient = client
+
+    def _handle_error(self, operation: str, error_detail: str):
+        """Centraliza el manejo de errores de la base de datos."""
+        raise StorageError(operation, error_detail)
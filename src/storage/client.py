@@ -0,0 +1,146 @@
+"""
+Cliente Supabase compartido por todos los repositorios.
+
+Crear un cliente por petición implica abrir una conexión HTTP nueva (con su
+handshake TLS) en cada llamada. Aquí se mantiene un único cliente cuyo
+`httpx.Client` conserva un pool de conexiones keep-alive, dimensionado desde
+`Settings`. La API lo abre y cierra en su `lifespan`; fuera de ella (scripts,
+tests) se crea bajo demanda en el primer uso.
+
+La API usa la variante asíncrona (`AsyncClient` sobre `httpx.AsyncClient`) para
+que un solo worker mantenga muchas llamadas de almacenamiento en vuelo; la
+variante síncrona queda para scripts y el servicio síncrono.
+
+`supabase` y `httpx` se importan al abrir el cliente, no al importar este
+módulo: un worker con el backend SQLite, o un script que solo usa los
+esquemas, no paga sus ~300 ms de carga.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from typing import TYPE_CHECKING
+
+from src.core.config import settings
+from src.core.metrics import contar_viaje, contar_viaje_async
+
+if TYPE_CHECKING:
+    import httpx
+
+    from supabase import AsyncClient, Client
+
+_lock = threading.Lock()
+_client: Client | None = None
+_http: httpx.Client | None = None
+_async_lock: asyncio.Lock | None = None
+_async_client: AsyncClient | None = None
+_async_http: httpx.AsyncClient | None = None
+
+
+def _opciones_pool() -> dict:
+    import httpx
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.supabase_pool_size,
+            max_keepalive_connections=settings.supabase_pool_size,
+            keepalive_expiry=settings.supabase_keepalive_expiry,
+        ),
+        "timeout": settings.supabase_timeout,
+        "follow_redirects": True,
+        # HTTP/2 requiere el extra `httpx[http2]` (paquete h2)
+        "http2": settings.supabase_http2,
+    }
+
+
+@functools.cache
+def errores_supabase() -> tuple[type[Exception], ...]:
+    """Excepciones de una petición al cliente: error devuelto por PostgREST o falla de transporte HTTP.
+
+    Se usa como `except errores_supabase()`: la expresión solo se evalúa (e importa
+    `httpx` y `postgrest`) cuando la petición ya lanzó algo.
+    """
+    import httpx
+    from postgrest.exceptions import APIError
+
+    return (APIError, httpx.HTTPError)
+
+
+def _lock_async() -> asyncio.Lock:
+    # Se crea en el primer uso, ya dentro del event loop que lo va a usar
+    global _async_lock
+    if _async_lock is None:
+        _async_lock = asyncio.Lock()
+    return _async_lock
+
+
+def _crear_http() -> httpx.Client:
+    import httpx
+
+    return httpx.Client(**_opciones_pool(), event_hooks={"request": [contar_viaje]})
+
+
+def abrir_cliente() -> Client:
+    """Crea (una sola vez) el cliente compartido y su pool de conexiones."""
+    global _client, _http
+    from supabase import ClientOptions, create_client
+
+    with _lock:
+        if _client is None:
+            _http = _crear_http()
+            _client = create_client(
+                settings.supabase_url,
+                settings.supabase_key,
+                options=ClientOptions(httpx_client=_http),
+            )
+        return _client
+
+
+def cerrar_cliente() -> None:
+    """Libera las conexiones del pool; el siguiente uso vuelve a abrirlo."""
+    global _client, _http
+    with _lock:
+        if _http is not None:
+            _http.close()
+        _client = None
+        _http = None
+
+
+def get_client() -> Client:
+    """Retorna el cliente compartido, abriéndolo si aún no existe."""
+    return _client or abrir_cliente()
+
+
+async def abrir_cliente_async() -> AsyncClient:
+    """Crea (una sola vez) el cliente asíncrono compartido y su pool de conexiones."""
+    global _async_client, _async_http
+    import httpx
+
+    from supabase import AsyncClientOptions, acreate_client
+
+    async with _lock_async():
+        if _async_client is None:
+            _async_http = httpx.AsyncClient(**_opciones_pool(), event_hooks={"request": [contar_viaje_async]})
+            _async_client = await acreate_client(
+                settings.supabase_url,
+                settings.supabase_key,
+                options=AsyncClientOptions(httpx_client=_async_http),
+            )
+        return _async_client
+
+
+async def cerrar_cliente_async() -> None:
+    """Libera las conexiones del pool asíncrono."""
+    global _async_client, _async_http
+    async with _lock_async():
+        if _async_http is not None:
+            await _async_http.aclose()
+        _async_client = None
+        _async_http = None
+
+
+async def get_async_client() -> AsyncClient:
+    """Retorna el cliente asíncrono compartido, abriéndolo si aún no existe."""
+    return _async_client or await abrir_cliente_async()
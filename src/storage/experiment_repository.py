@@ -1,74 +1,229 @@
-from src.storage.base import BaseRepository
-from src.schemas.experiment import ExperimentCreate
 from src.core.exceptions import StorageError
+from src.core.metrics import instrumentar
+from src.core.modelos import MODELOS
+from src.schemas.experiment import ExperimentCreate
+from src.storage.base import BaseRepository
+from src.storage.client import errores_supabase
+
+# Tabla de detalle físico de cada tipo de experimento y sus columnas (las variables del modelo)
+TABLAS_DETALLE = {tipo: modelo.tabla for tipo, modelo in MODELOS.items()}
+COLUMNAS_DETALLE = {tipo: modelo.variables for tipo, modelo in MODELOS.items()}
+
+# Incertidumbre Monte Carlo guardada junto al detalle (una fila por variable)
+TABLA_INCERTIDUMBRE = "incertidumbres"
+COLUMNAS_INCERTIDUMBRE = (
+    "variable", "despejada", "media", "desviacion", "ic_inferior", "ic_superior", "confianza", "muestras",
+)
+
+# Series de muestras crudas, por bloques comprimidos (ver src/services/series.py)
+TABLA_SERIES = "series_bloques"
+COLUMNAS_SERIE = (
+    "indice", "puntos", "t_inicio", "t_fin", "x_min", "x_max", "x_primero", "x_ultimo", "precision", "codec", "bytes",
+)
+# Bloques por petición al insertar o leer datos comprimidos (hasta ~64 KB cada uno)
+BLOQUES_SERIE_POR_VIAJE = 64
+
+# Filas por inserción multi-fila (limita el tamaño de cada petición HTTP)
+TAMANO_BLOQUE = 1000
+
+# Columnas del maestro que se pueden proyectar en los listados (`fields=`)
+COLUMNAS_MAESTRO = ("id", "nombre", "tipo", "fecha_creacion")
+
+# Maestro con sus detalles embebidos (PostgREST resuelve el JOIN por la FK experimento_id)
+SELECT_CON_DETALLE = "*," + ",".join(f"{tabla}(*)" for tabla in TABLAS_DETALLE.values())
+
+
+def unir_detalle(exp: dict) -> dict:
+    """Reemplaza las tablas embebidas por la clave `detalle` del tipo del experimento."""
+    embebidos = {tipo: exp.pop(tabla, None) for tipo, tabla in TABLAS_DETALLE.items()}
+    filas = embebidos.get(exp.get("tipo")) or []
+    exp["detalle"] = filas[0] if filas else {}
+    return exp
+
+
+def fila_serie(exp_id: int, bloque: dict) -> dict:
+    """Fila de `series_bloques` para PostgREST: `bytea` viaja como texto hexadecimal."""
+    return {**bloque, "experimento_id": exp_id, "datos": "\\x" + bloque["datos"].hex()}
+
+
+def datos_serie(filas: list[dict]) -> dict[int, bytes]:
+    return {fila["indice"]: bytes.fromhex(fila["datos"].removeprefix("\\x")) for fila in filas}
+
+
+def filtrar_serie(query, exp_id: int, t0: float | None, t1: float | None):
+    """Bloques del experimento que se solapan con [t0, t1], en orden."""
+    query = query.eq("experimento_id", exp_id)
+    if t0 is not None:
+        query = query.gte("t_fin", t0)
+    if t1 is not None:
+        query = query.lte("t_inicio", t1)
+    return query.order("indice")
+
+
+def filtrar_pagina(query, after: tuple[str, int] | None, tipo: str | None, desde: str | None, hasta: str | None):
+    """Aplica filtros y la condición keyset `(fecha_creacion, id) < after` a un select.
 
+    El orden es `fecha_creacion DESC, id DESC` (índice `idx_experimentos_fecha`);
+    sirve tanto para el constructor síncrono como para el asíncrono.
+    """
+    if tipo is not None:
+        query = query.eq("tipo", tipo)
+    if desde is not None:
+        query = query.gte("fecha_creacion", desde)
+    if hasta is not None:
+        query = query.lt("fecha_creacion", hasta)
+    if after is not None:
+        fecha, ultimo_id = after
+        query = query.or_(f'fecha_creacion.lt."{fecha}",and(fecha_creacion.eq."{fecha}",id.lt.{int(ultimo_id)})')
+    return query.order("fecha_creacion", desc=True).order("id", desc=True)
+
+
+@instrumentar("supabase")
 class ExperimentRepository(BaseRepository):
-    
-    def create_mru_experiment(self, exp_data: ExperimentCreate, physics_data: dict):
+
+    def create_experiment_with_detail(self, exp_data: ExperimentCreate, physics_data: dict) -> dict:
+        """Crea el experimento maestro y su detalle en un solo viaje y de forma atómica.
+
+        Invoca la función `crear_experimento_con_detalle` de la base de datos
+        (ver `supabase/migrations`), que inserta ambas filas en una transacción.
+        """
         try:
-            # 1. Insertar en la tabla maestra 'experimentos'
-            res_exp = self.client.table("experimentos").insert({
-                "nombre": exp_data.nombre,
-                "tipo": exp_data.tipo
+            res = self.client.rpc("crear_experimento_con_detalle", {
+                "p_nombre": exp_data.nombre,
+                "p_tipo": exp_data.tipo,
+                "p_detalle": physics_data,
             }).execute()
-            
-            if not res_exp.data:
-                raise StorageError("Insert", "No se pudo crear el experimento maestro")
-            
-            # Obtener el ID que Supabase generó automáticamente
-            nuevo_id = res_exp.data[0]["id"]
-            
-            # 2. Insertar en 'ensayos_mru' usando ese ID como LLAVE FORÁNEA
-            physics_data["experimento_id"] = nuevo_id
-            res_physics = self.client.table("ensayos_mru").insert(physics_data).execute()
-            
-            return {
-                "id": nuevo_id,
-                "nombre": exp_data.nombre,
-                "detalle": res_physics.data[0]
-            }
-        except Exception as e:
-            self._handle_error("create_mru_experiment", str(e))
-
-    def create_mrua_experiment(self, exp_data: ExperimentCreate, physics_data: dict):
+        except errores_supabase() as e:
+            self._handle_error("create_experiment_with_detail", str(e))
+        if not res.data:
+            raise StorageError("create_experiment_with_detail", "La función no retornó el experimento creado")
+        return res.data
+
+    def create_experiment_with_uncertainty(
+        self, exp_data: ExperimentCreate, physics_data: dict, uncertainty_rows: list[dict],
+    ) -> dict:
+        """Como `create_experiment_with_detail`, guardando además las filas de incertidumbre.
+
+        Invoca `crear_experimento_con_incertidumbre` (ver `supabase/migrations`):
+        un solo viaje y una sola transacción para las tres tablas.
+        """
         try:
-            # Repetimos el proceso para MRUA
-            res_exp = self.client.table("experimentos").insert({
-                "nombre": exp_data.nombre,
-                "tipo": exp_data.tipo
+            res = self.client.rpc("crear_experimento_con_incertidumbre", {
+                "p_nombre": exp_data.nombre,
+                "p_tipo": exp_data.tipo,
+                "p_detalle": physics_data,
+                "p_incertidumbre": uncertainty_rows,
             }).execute()
-            
-            nuevo_id = res_exp.data[0]["id"]
-            
-            physics_data["experimento_id"] = nuevo_id
-            res_physics = self.client.table("ensayos_mrua").insert(physics_data).execute()
-            
-            return {
-                "id": nuevo_id,
-                "nombre": exp_data.nombre,
-                "detalle": res_physics.data[0]
-            }
-        except Exception as e:
-            self._handle_error("create_mrua_experiment", str(e))
+        except errores_supabase() as e:
+            self._handle_error("create_experiment_with_uncertainty", str(e))
+        if not res.data:
+            raise StorageError("create_experiment_with_uncertainty", "La función no retornó el experimento creado")
+        return res.data
+
+    def create_experiments_bulk(self, tipo: str, nombres: list[str], physics_rows: list[dict]) -> list[int]:
+        """Inserta muchos experimentos del mismo tipo con su detalle.
+
+        Un viaje por bloque de `TAMANO_BLOQUE` filas a la función
+        `crear_experimentos_con_detalle` (ver `supabase/migrations`), que guarda
+        el bloque completo o nada. Retorna los IDs en el mismo orden de entrada.
+        """
+        ids: list[int] = []
+        try:
+            for inicio in range(0, len(nombres), TAMANO_BLOQUE):
+                bloque = nombres[inicio:inicio + TAMANO_BLOQUE]
+                res = self.client.rpc("crear_experimentos_con_detalle", {
+                    "p_tipo": tipo,
+                    "p_nombres": bloque,
+                    "p_detalles": physics_rows[inicio:inicio + TAMANO_BLOQUE],
+                }).execute()
+                if len(res.data) != len(bloque):
+                    raise StorageError("create_experiments_bulk", "No se pudieron crear todos los experimentos del bloque")
+                ids.extend(fila["id"] for fila in res.data)
+        except errores_supabase() as e:
+            self._handle_error("create_experiments_bulk", str(e))
+        return ids
 
     def get_all(self) -> list:
         response = self.client.table("experimentos").select("*").execute()
         return response.data
 
+    def get_page(
+        self,
+        limit: int,
+        after: tuple[str, int] | None = None,
+        columns: list[str] | None = None,
+        tipo: str | None = None,
+        desde: str | None = None,
+        hasta: str | None = None,
+        detalle: bool = False,
+    ) -> list[dict]:
+        """Una página del listado, del más reciente al más antiguo, filtrada en la base.
+
+        Con `detalle=True` cada fila trae además su detalle físico (mismo JOIN que `get_by_id`).
+        """
+        query = self.client.table("experimentos").select(SELECT_CON_DETALLE if detalle else ",".join(columns or COLUMNAS_MAESTRO))
+        response = filtrar_pagina(query, after, tipo, desde, hasta).limit(limit).execute()
+        return [unir_detalle(exp) for exp in response.data] if detalle else response.data
+
     def get_by_id(self, exp_id: int) -> dict | None:
-        response = self.client.table("experimentos").select("*").eq("id", exp_id).execute()
+        # Maestro y detalle en un solo select con recursos embebidos
+        response = self.client.table("experimentos").select(SELECT_CON_DETALLE).eq("id", exp_id).execute()
         if not response.data:
             return None
-        
-        exp = response.data[0]
-        # Traemos el detalle correspondiente de manera limpia
-        if exp["tipo"] == "MRU":
-            det = self.client.table("ensayos_mru").select("*").eq("experimento_id", exp_id).execute()
-        else:
-            det = self.client.table("ensayos_mrua").select("*").eq("experimento_id", exp_id).execute()
-            
-        exp["detalle"] = det.data[0] if det.data else {}
-        return exp
+        return unir_detalle(response.data[0])
+
+    def get_many(self, exp_ids: list[int]) -> list[dict]:
+        """Experimentos con su detalle, en un viaje por bloque de `TAMANO_BLOQUE` IDs.
+
+        Los IDs inexistentes se omiten; el orden del resultado no está garantizado.
+        """
+        experimentos: list[dict] = []
+        for inicio in range(0, len(exp_ids), TAMANO_BLOQUE):
+            bloque = exp_ids[inicio:inicio + TAMANO_BLOQUE]
+            response = self.client.table("experimentos").select(SELECT_CON_DETALLE).in_("id", bloque).execute()
+            experimentos.extend(unir_detalle(exp) for exp in response.data)
+        return experimentos
+
+    def get_uncertainty(self, exp_id: int) -> list[dict]:
+        """Filas de incertidumbre del experimento (vacío si no se guardó con incertidumbre)."""
+        response = self.client.table(TABLA_INCERTIDUMBRE).select("*").eq("experimento_id", exp_id).order("id").execute()
+        return response.data
+
+    def add_series_blocks(self, exp_id: int, bloques: list[dict]) -> None:
+        """Inserta bloques de la serie del experimento, `BLOQUES_SERIE_POR_VIAJE` por petición."""
+        from postgrest.types import ReturnMethod
+
+        try:
+            for inicio in range(0, len(bloques), BLOQUES_SERIE_POR_VIAJE):
+                self.client.table(TABLA_SERIES).insert(
+                    [fila_serie(exp_id, b) for b in bloques[inicio:inicio + BLOQUES_SERIE_POR_VIAJE]],
+                    returning=ReturnMethod.minimal,
+                ).execute()
+        except errores_supabase() as e:
+            self._handle_error("add_series_blocks", str(e))
+
+    def get_series_blocks(self, exp_id: int, t0: float | None = None, t1: float | None = None) -> list[dict]:
+        """Metadatos (sin datos) de los bloques que se solapan con [t0, t1], por páginas keyset de `indice`."""
+        bloques: list[dict] = []
+        while True:
+            query = filtrar_serie(self.client.table(TABLA_SERIES).select(",".join(COLUMNAS_SERIE)), exp_id, t0, t1)
+            if bloques:
+                query = query.gt("indice", bloques[-1]["indice"])
+            pagina = query.limit(TAMANO_BLOQUE).execute().data
+            bloques.extend(pagina)
+            if len(pagina) < TAMANO_BLOQUE:
+                return bloques
+
+    def get_series_data(self, exp_id: int, indices: list[int]) -> dict[int, bytes]:
+        """Datos comprimidos de los bloques pedidos, por índice."""
+        datos: dict[int, bytes] = {}
+        for inicio in range(0, len(indices), BLOQUES_SERIE_POR_VIAJE):
+            response = (
+                self.client.table(TABLA_SERIES).select("indice,datos").eq("experimento_id", exp_id)
+                .in_("indice", indices[inicio:inicio + BLOQUES_SERIE_POR_VIAJE]).execute()
+            )
+            datos.update(datos_serie(response.data))
+        return datos
 
     def delete(self, exp_id: int) -> bool:
         response = self.client.table("experimentos").delete().eq("id", exp_id).execute()
@@ -0,0 +1,51 @@
+"""
+Selección del backend de almacenamiento según `Settings.storage_backend`.
+
+    "supabase" -> ExperimentRepository / AsyncExperimentRepository (por defecto)
+    "sqlite"   -> SQLiteExperimentRepository sobre `Settings.sqlite_path`
+
+Los servicios y la API piden sus repositorios aquí, de modo que cambiar de
+backend no toca la lógica de negocio.
+"""
+
+from src.core.config import settings
+from src.storage.async_experiment_repository import (
+    AsyncExperimentRepository,
+    AsyncRepositoryAdapter,
+)
+from src.storage.client import cerrar_cliente_async, get_async_client
+from src.storage.experiment_repository import ExperimentRepository
+from src.storage.sqlite_repository import (
+    SQLiteExperimentRepository,
+    cerrar_sqlite_databases,
+    get_sqlite_database,
+)
+
+
+def crear_repositorio():
+    """Repositorio síncrono del backend configurado."""
+    if settings.storage_backend == "sqlite":
+        return SQLiteExperimentRepository(get_sqlite_database(settings.sqlite_path))
+    return ExperimentRepository()
+
+
+async def crear_repositorio_async():
+    """Repositorio asíncrono del backend configurado."""
+    if settings.storage_backend == "sqlite":
+        return AsyncRepositoryAdapter(crear_repositorio())
+    return AsyncExperimentRepository(await get_async_client())
+
+
+async def abrir_almacenamiento() -> None:
+    """Prepara el backend al iniciar la API (pool de conexiones o esquema SQLite)."""
+    if settings.storage_backend == "sqlite":
+        get_sqlite_database(settings.sqlite_path)
+    else:
+        await get_async_client()
+
+
+async def cerrar_almacenamiento() -> None:
+    if settings.storage_backend == "sqlite":
+        cerrar_sqlite_databases()
+    else:
+        await cerrar_cliente_async()
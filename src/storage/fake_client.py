@@ -0,0 +1,330 @@
+"""
+Cliente Supabase falso, en memoria, para pruebas y benchmarks sin red.
+
+Imita el subconjunto de la API de `supabase.Client` (constructor de consultas
+de PostgREST) que usan los repositorios: `table(...).insert/select/delete`,
+filtros, recursos embebidos (`select("*,ensayos_mru(*)")`), `order`, `limit`,
+`execute()` y `rpc(...)`. Las funciones RPC de la
+base de datos se reimplementan en Python y corren "en transacción": si fallan,
+las tablas vuelven a su estado anterior.
+
+Cada `execute()` cuenta como un viaje a la base de datos (`viajes`) y puede
+esperar una latencia artificial (`latencia`, en segundos) para medir el costo
+de los viajes de red sin depender de Supabase.
+"""
+
+import asyncio
+import copy
+import operator
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+
+from src.storage.experiment_repository import (
+    TABLA_INCERTIDUMBRE,
+    TABLA_SERIES,
+    TABLAS_DETALLE,
+)
+
+# Tablas hijas que se borran en cascada con su experimento maestro
+CASCADAS = {
+    "experimentos": [
+        (tabla, "experimento_id") for tabla in (*TABLAS_DETALLE.values(), TABLA_INCERTIDUMBRE, TABLA_SERIES)
+    ],
+}
+
+# Llave foránea de cada relación padre -> hija, para los recursos embebidos (`tabla(*)`)
+RELACIONES = {(padre, hija): columna for padre, hijas in CASCADAS.items() for hija, columna in hijas}
+
+
+OPERADORES = {
+    "eq": operator.eq, "neq": operator.ne,
+    "gt": operator.gt, "gte": operator.ge,
+    "lt": operator.lt, "lte": operator.le,
+}
+
+
+def _comparar(valor_fila: Any, op: str, valor: Any) -> bool:
+    if valor_fila is None:
+        return False
+    if isinstance(valor, str) and isinstance(valor_fila, (int, float)) and not isinstance(valor_fila, bool):
+        valor = type(valor_fila)(float(valor))
+    return OPERADORES[op](valor_fila, valor)
+
+
+def _dividir_nivel_superior(texto: str) -> list[str]:
+    """Separa por comas que no estén dentro de paréntesis ni comillas."""
+    partes, actual, nivel, comillas = [], "", 0, False
+    for caracter in texto:
+        if caracter == '"':
+            comillas = not comillas
+        elif not comillas and caracter == "(":
+            nivel += 1
+        elif not comillas and caracter == ")":
+            nivel -= 1
+        elif not comillas and nivel == 0 and caracter == ",":
+            partes.append(actual)
+            actual = ""
+            continue
+        actual += caracter
+    return [*partes, actual] if actual else partes
+
+
+def filtro_postgrest(expresion: str) -> Callable[[dict], bool]:
+    """Convierte un árbol lógico de PostgREST (p. ej. `a.lt.1,and(b.eq.2,c.gt.3)`) en un predicado."""
+    for modo, combinar in (("and(", all), ("or(", any)):
+        if expresion.startswith(modo):
+            predicados = [filtro_postgrest(p) for p in _dividir_nivel_superior(expresion[len(modo):-1])]
+            return lambda fila: combinar(p(fila) for p in predicados)
+    columna, op, valor = expresion.split(".", 2)
+    if len(valor) >= 2 and valor[0] == valor[-1] == '"':
+        valor = valor[1:-1]
+    return lambda fila: _comparar(fila.get(columna), op, valor)
+
+
+def _proyectar(db: "BaseDeDatosFalsa", tabla: str, fila: dict, columnas: str) -> dict:
+    resultado: dict = {}
+    for columna in (c.strip() for c in _dividir_nivel_superior(columnas)):
+        if columna == "*":
+            resultado.update(copy.deepcopy(fila))
+        elif columna.endswith(")"):
+            # Recurso embebido: filas hijas unidas por la llave foránea
+            hija, interior = columna[:-1].split("(", 1)
+            llave = RELACIONES[(tabla, hija)]
+            resultado[hija] = [
+                _proyectar(db, hija, fila_hija, interior)
+                for fila_hija in db.filas(hija) if fila_hija.get(llave) == fila["id"]
+            ]
+        else:
+            resultado[columna] = fila.get(columna)
+    return resultado
+
+
+@dataclass
+class RespuestaFalsa:
+    """Equivalente mínimo de `postgrest.APIResponse`."""
+
+    data: Any
+    count: int | None = None
+
+
+class BaseDeDatosFalsa:
+    """Tablas en memoria con IDs autoincrementales y borrado en cascada."""
+
+    def __init__(self) -> None:
+        self.tablas: dict[str, list[dict]] = {}
+        self.secuencias: dict[str, int] = {}
+        self.fallar_en: set[str] = set()  # Tablas cuyo próximo insert debe fallar
+        self.lock = threading.RLock()
+        self.funciones: dict[str, Callable[[dict], Any]] = {
+            "crear_experimento_con_detalle": self._crear_experimento_con_detalle,
+            "crear_experimento_con_incertidumbre": self._crear_experimento_con_incertidumbre,
+            "crear_experimentos_con_detalle": self._crear_experimentos_con_detalle,
+        }
+
+    def filas(self, tabla: str) -> list[dict]:
+        return self.tablas.setdefault(tabla, [])
+
+    def insertar(self, tabla: str, filas: list[dict]) -> list[dict]:
+        if tabla in self.fallar_en:
+            raise APIError({"message": f"Fallo simulado al insertar en '{tabla}'"})
+        nuevas = []
+        for fila in filas:
+            self.secuencias[tabla] = self.secuencias.get(tabla, 0) + 1
+            nueva = {"id": self.secuencias[tabla], **fila}
+            if tabla == "experimentos":
+                nueva.setdefault("fecha_creacion", datetime.now(timezone.utc).isoformat())
+            nuevas.append(nueva)
+        self.filas(tabla).extend(nuevas)
+        return copy.deepcopy(nuevas)
+
+    def borrar(self, tabla: str, predicado: Callable[[dict], bool]) -> list[dict]:
+        borradas = [fila for fila in self.filas(tabla) if predicado(fila)]
+        self.tablas[tabla] = [fila for fila in self.filas(tabla) if not predicado(fila)]
+        ids = {fila["id"] for fila in borradas}
+        for hija, columna in CASCADAS.get(tabla, []):
+            self.borrar(hija, lambda fila, columna=columna: fila.get(columna) in ids)
+        return borradas
+
+    def llamar(self, funcion: str, params: dict) -> Any:
+        """Ejecuta una función RPC de forma atómica (todo o nada)."""
+        with self.lock:
+            # Las funciones solo insertan: deshacer es truncar cada tabla a su largo previo,
+            # sin copiar la base completa en cada llamada
+            largos, secuencias = {tabla: len(filas) for tabla, filas in self.tablas.items()}, dict(self.secuencias)
+            try:
+                return self.funciones[funcion](params)
+            except Exception:
+                self.tablas = {tabla: filas[:largos.get(tabla, 0)] for tabla, filas in self.tablas.items()}
+                self.secuencias = secuencias
+                raise
+
+    def _crear_experimento_con_detalle(self, params: dict) -> dict:
+        # Réplica de supabase/migrations/*_modelos.sql (tabla de detalle según el tipo registrado)
+        tipo = params["p_tipo"]
+        if tipo not in TABLAS_DETALLE:
+            raise APIError({"message": f"Tipo de experimento desconocido: {tipo}", "code": "P0001"})
+        maestro = self.insertar("experimentos", [{"nombre": params["p_nombre"], "tipo": tipo}])[0]
+        detalle = self.insertar(TABLAS_DETALLE[tipo], [{**params["p_detalle"], "experimento_id": maestro["id"]}])[0]
+        return {"id": maestro["id"], "nombre": maestro["nombre"], "detalle": detalle}
+
+    def _crear_experimentos_con_detalle(self, params: dict) -> list[dict]:
+        # Réplica de supabase/migrations/*_crear_experimentos_con_detalle.sql
+        tipo = params["p_tipo"]
+        if tipo not in TABLAS_DETALLE:
+            raise APIError({"message": f"Tipo de experimento desconocido: {tipo}", "code": "P0001"})
+        maestros = self.insertar("experimentos", [{"nombre": nombre, "tipo": tipo} for nombre in params["p_nombres"]])
+        self.insertar(TABLAS_DETALLE[tipo], [
+            {**detalle, "experimento_id": maestro["id"]} for maestro, detalle in zip(maestros, params["p_detalles"])
+        ])
+        return [{"id": maestro["id"]} for maestro in maestros]
+
+    def _crear_experimento_con_incertidumbre(self, params: dict) -> dict:
+        # Réplica de supabase/migrations/*_incertidumbres.sql
+        creado = self._crear_experimento_con_detalle(params)
+        filas = [{**fila, "experimento_id": creado["id"]} for fila in params["p_incertidumbre"]]
+        return {**creado, "incertidumbre": self.insertar(TABLA_INCERTIDUMBRE, filas)}
+
+
+class ConsultaFalsa:
+    """Constructor de consultas encadenable al estilo de `SyncRequestBuilder`."""
+
+    def __init__(self, cliente: "FakeSupabaseClient", tabla: str | None, rpc: tuple[str, dict] | None = None) -> None:
+        self._cliente = cliente
+        self._tabla = tabla
+        self._rpc = rpc
+        self._operacion = "select"
+        self._columnas = "*"
+        self._valores: list[dict] = []
+        self._representacion = True
+        self._filtros: list[Callable[[dict], bool]] = []
+        self._orden: list[tuple[str, bool]] = []
+        self._limite: int | None = None
+
+    # --- Operaciones ---
+    def select(self, *columnas: str, **_: Any) -> "ConsultaFalsa":
+        self._operacion = "select"
+        self._columnas = ",".join(columnas) or "*"
+        return self
+
+    def insert(self, json: dict | list[dict], *, returning: ReturnMethod = ReturnMethod.representation, **_: Any) -> "ConsultaFalsa":
+        self._operacion = "insert"
+        self._valores = json if isinstance(json, list) else [json]
+        self._representacion = returning == ReturnMethod.representation
+        return self
+
+    def delete(self, **_: Any) -> "ConsultaFalsa":
+        self._operacion = "delete"
+        return self
+
+    # --- Filtros y modificadores ---
+    def _comparacion(self, op: str, columna: str, valor: Any) -> "ConsultaFalsa":
+        self._filtros.append(lambda fila: _comparar(fila.get(columna), op, valor))
+        return self
+
+    def eq(self, columna: str, valor: Any) -> "ConsultaFalsa":
+        return self._comparacion("eq", columna, valor)
+
+    def neq(self, columna: str, valor: Any) -> "ConsultaFalsa":
+        return self._comparacion("neq", columna, valor)
+
+    def gt(self, columna: str, valor: Any) -> "ConsultaFalsa":
+        return self._comparacion("gt", columna, valor)
+
+    def gte(self, columna: str, valor: Any) -> "ConsultaFalsa":
+        return self._comparacion("gte", columna, valor)
+
+    def lt(self, columna: str, valor: Any) -> "ConsultaFalsa":
+        return self._comparacion("lt", columna, valor)
+
+    def lte(self, columna: str, valor: Any) -> "ConsultaFalsa":
+        return self._comparacion("lte", columna, valor)
+
+    def in_(self, columna: str, valores) -> "ConsultaFalsa":
+        conjunto = set(valores)
+        self._filtros.append(lambda fila: fila.get(columna) in conjunto)
+        return self
+
+    def or_(self, filtros: str, **_: Any) -> "ConsultaFalsa":
+        self._filtros.append(filtro_postgrest(f"or({filtros})"))
+        return self
+
+    def order(self, columna: str, *, desc: bool = False, **_: Any) -> "ConsultaFalsa":
+        self._orden.append((columna, desc))
+        return self
+
+    def limit(self, cantidad: int, **_: Any) -> "ConsultaFalsa":
+        self._limite = cantidad
+        return self
+
+    # --- Ejecución ---
+    def _resolver(self) -> RespuestaFalsa:
+        db = self._cliente.db
+        with db.lock:
+            if self._rpc is not None:
+                return RespuestaFalsa(data=copy.deepcopy(db.llamar(*self._rpc)))
+            if self._operacion == "insert":
+                filas = db.insertar(self._tabla, self._valores)
+                return RespuestaFalsa(data=filas if self._representacion else [])
+            cumple = lambda fila: all(filtro(fila) for filtro in self._filtros)  # noqa: E731
+            if self._operacion == "delete":
+                return RespuestaFalsa(data=copy.deepcopy(db.borrar(self._tabla, cumple)))
+
+            filas = [fila for fila in db.filas(self._tabla) if cumple(fila)]
+            for columna, desc in reversed(self._orden):
+                filas.sort(key=lambda fila: fila.get(columna), reverse=desc)
+            if self._limite is not None:
+                filas = filas[:self._limite]
+            return RespuestaFalsa(data=[_proyectar(db, self._tabla, fila, self._columnas) for fila in filas])
+
+    def execute(self) -> RespuestaFalsa:
+        self._cliente._registrar_viaje()
+        time.sleep(self._cliente.latencia)
+        return self._resolver()
+
+
+class ConsultaFalsaAsync(ConsultaFalsa):
+    """Igual que `ConsultaFalsa`, pero `execute()` es una corrutina."""
+
+    async def execute(self) -> RespuestaFalsa:
+        self._cliente._registrar_viaje()
+        await asyncio.sleep(self._cliente.latencia)
+        return self._resolver()
+
+
+class FakeSupabaseClient:
+    """Reemplazo en memoria de `supabase.Client` para los repositorios.
+
+    Args:
+        latencia: Segundos de espera simulada por cada viaje a la base de datos.
+        db: Base de datos a compartir con otro cliente (por ejemplo, uno asíncrono).
+    """
+
+    _consulta = ConsultaFalsa
+
+    def __init__(self, latencia: float = 0.0, db: BaseDeDatosFalsa | None = None) -> None:
+        self.latencia = latencia
+        self.db = db or BaseDeDatosFalsa()
+        self.viajes = 0
+        self._lock_viajes = threading.Lock()
+
+    def _registrar_viaje(self) -> None:
+        with self._lock_viajes:
+            self.viajes += 1
+
+    def table(self, tabla: str) -> ConsultaFalsa:
+        return self._consulta(self, tabla)
+
+    def rpc(self, funcion: str, params: dict | None = None, **_: Any) -> ConsultaFalsa:
+        return self._consulta(self, None, rpc=(funcion, params or {}))
+
+
+class FakeAsyncSupabaseClient(FakeSupabaseClient):
+    """Reemplazo en memoria de `supabase.AsyncClient`."""
+
+    _consulta = ConsultaFalsaAsync
@@ -0,0 +1,372 @@
+"""
+Backend de almacenamiento local sobre SQLite.
+
+Implementa las mismas operaciones que `ExperimentRepository` para despliegues
+de un solo nodo o sin red. La base usa WAL (lectores concurrentes con un
+escritor), `synchronous=NORMAL` y sentencias parametrizadas constantes que
+`sqlite3` mantiene precompiladas en su caché de sentencias. Cada hilo tiene
+su propia conexión.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+from src.core.exceptions import StorageError
+from src.core.metrics import instrumentar
+from src.schemas.experiment import ExperimentCreate
+from src.storage.experiment_repository import (
+    COLUMNAS_DETALLE,
+    COLUMNAS_INCERTIDUMBRE,
+    COLUMNAS_MAESTRO,
+    COLUMNAS_SERIE,
+    TABLA_INCERTIDUMBRE,
+    TABLA_SERIES,
+    TABLAS_DETALLE,
+    TAMANO_BLOQUE,
+)
+
+
+def ddl_detalle(tabla: str, columnas: tuple[str, ...]) -> str:
+    """Tabla de detalle de un modelo: una columna REAL por variable."""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {tabla} (\n"
+        "    id INTEGER PRIMARY KEY AUTOINCREMENT,\n"
+        "    experimento_id INTEGER NOT NULL REFERENCES experimentos (id) ON DELETE CASCADE,\n"
+        + ",\n".join(f"    {columna} REAL" for columna in columnas)
+        + f"\n);\nCREATE INDEX IF NOT EXISTS idx_{tabla}_experimento ON {tabla} (experimento_id);\n"
+    )
+
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS experimentos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    fecha_creacion TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_experimentos_fecha ON experimentos (fecha_creacion, id);
+
+CREATE TABLE IF NOT EXISTS incertidumbres (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    experimento_id INTEGER NOT NULL REFERENCES experimentos (id) ON DELETE CASCADE,
+    variable TEXT NOT NULL,
+    despejada INTEGER NOT NULL,
+    media REAL,
+    desviacion REAL,
+    ic_inferior REAL,
+    ic_superior REAL,
+    confianza REAL,
+    muestras INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_incertidumbres_experimento ON incertidumbres (experimento_id);
+
+CREATE TABLE IF NOT EXISTS series_bloques (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    experimento_id INTEGER NOT NULL REFERENCES experimentos (id) ON DELETE CASCADE,
+    indice INTEGER NOT NULL,
+    puntos INTEGER NOT NULL,
+    t_inicio REAL NOT NULL,
+    t_fin REAL NOT NULL,
+    x_min REAL NOT NULL,
+    x_max REAL NOT NULL,
+    x_primero REAL NOT NULL,
+    x_ultimo REAL NOT NULL,
+    precision TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    datos BLOB NOT NULL,
+    UNIQUE (experimento_id, indice)
+);
+CREATE INDEX IF NOT EXISTS idx_series_bloques_tiempo ON series_bloques (experimento_id, t_inicio);
+""" + "".join(ddl_detalle(TABLAS_DETALLE[tipo], columnas) for tipo, columnas in COLUMNAS_DETALLE.items())
+
+SQL_INSERTAR_MAESTRO = "INSERT INTO experimentos (nombre, tipo) VALUES (?, ?) RETURNING id, nombre, tipo, fecha_creacion"
+SQL_INSERTAR_DETALLE = {
+    tipo: (
+        f"INSERT INTO {TABLAS_DETALLE[tipo]} (experimento_id, {', '.join(columnas)}) "
+        f"VALUES (?, {', '.join('?' for _ in columnas)}) RETURNING *"
+    )
+    for tipo, columnas in COLUMNAS_DETALLE.items()
+}
+SQL_INSERTAR_INCERTIDUMBRE = (
+    f"INSERT INTO {TABLA_INCERTIDUMBRE} (experimento_id, {', '.join(COLUMNAS_INCERTIDUMBRE)}) "
+    f"VALUES (?, {', '.join('?' for _ in COLUMNAS_INCERTIDUMBRE)}) RETURNING *"
+)
+SQL_INCERTIDUMBRE = f"SELECT * FROM {TABLA_INCERTIDUMBRE} WHERE experimento_id = ? ORDER BY id"
+SQL_INSERTAR_SERIE = (
+    f"INSERT INTO {TABLA_SERIES} (experimento_id, {', '.join(COLUMNAS_SERIE)}, datos) "
+    f"VALUES (?, {', '.join('?' for _ in COLUMNAS_SERIE)}, ?)"
+)
+SQL_SERIE = (
+    f"SELECT {', '.join(COLUMNAS_SERIE)} FROM {TABLA_SERIES} "
+    "WHERE experimento_id = ? AND t_fin >= ? AND t_inicio <= ? ORDER BY indice"
+)
+SQL_LISTAR = "SELECT id, nombre, tipo, fecha_creacion FROM experimentos"
+
+
+def _sql_con_detalle() -> str:
+    """Maestro con su detalle (como objeto JSON) en una sola consulta con LEFT JOIN."""
+    alias = {tipo: f"d{i}" for i, tipo in enumerate(TABLAS_DETALLE)}
+    objetos = " ".join(
+        f"WHEN {a}.id IS NOT NULL THEN json_object('id', {a}.id, 'experimento_id', {a}.experimento_id, "
+        + ", ".join(f"'{columna}', {a}.{columna}" for columna in COLUMNAS_DETALLE[tipo]) + ")"
+        for tipo, a in alias.items()
+    )
+    uniones = " ".join(
+        f"LEFT JOIN {TABLAS_DETALLE[tipo]} {a} ON {a}.experimento_id = e.id AND e.tipo = '{tipo}'"
+        for tipo, a in alias.items()
+    )
+    return f"SELECT e.id, e.nombre, e.tipo, e.fecha_creacion, CASE {objetos} END AS detalle FROM experimentos e {uniones}"
+
+
+SQL_CON_DETALLE = _sql_con_detalle()
+SQL_BORRAR = "DELETE FROM experimentos WHERE id = ?"
+
+
+class SQLiteDatabase:
+    """Archivo SQLite compartido por los repositorios, con una conexión por hilo.
+
+    Args:
+        ruta: Ruta del archivo, o ":memory:" para una base en memoria
+            (compartida entre los hilos del proceso).
+    """
+
+    def __init__(self, ruta: str) -> None:
+        if ruta == ":memory:":
+            self._destino, self._uri = f"file:physilab-{id(self)}?mode=memory&cache=shared", True
+        else:
+            Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+            self._destino, self._uri = ruta, False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conexiones: list[sqlite3.Connection] = []
+        # La base en memoria vive mientras tenga al menos una conexión abierta
+        self.conexion().executescript(ESQUEMA)
+
+    def conexion(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self._destino, uri=self._uri, check_same_thread=False,
+                isolation_level=None, cached_statements=256,
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._lock:
+                self._conexiones.append(conn)
+        return conn
+
+    def cerrar(self) -> None:
+        with self._lock:
+            for conn in self._conexiones:
+                conn.close()
+            self._conexiones.clear()
+        self._local = threading.local()
+
+
+_lock_bases = threading.Lock()
+_bases: dict[str, SQLiteDatabase] = {}
+
+
+def get_sqlite_database(ruta: str) -> SQLiteDatabase:
+    """Retorna la base compartida para `ruta`, creándola (con su esquema) en el primer uso."""
+    with _lock_bases:
+        if ruta not in _bases:
+            _bases[ruta] = SQLiteDatabase(ruta)
+        return _bases[ruta]
+
+
+def cerrar_sqlite_databases() -> None:
+    with _lock_bases:
+        for base in _bases.values():
+            base.cerrar()
+        _bases.clear()
+
+
+@instrumentar("sqlite")
+class SQLiteExperimentRepository:
+    """Mismas operaciones que `ExperimentRepository` sobre un archivo SQLite local."""
+
+    def __init__(self, database: SQLiteDatabase) -> None:
+        self.database = database
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self.database.conexion()
+
+    def _handle_error(self, operation: str, error_detail: str):
+        raise StorageError(operation, error_detail)
+
+    def _insertar(self, exp_data: ExperimentCreate, physics_data: dict) -> dict:
+        maestro = dict(self.conn.execute(SQL_INSERTAR_MAESTRO, (exp_data.nombre, exp_data.tipo)).fetchone())
+        valores = [physics_data.get(columna) for columna in COLUMNAS_DETALLE[exp_data.tipo]]
+        detalle = dict(self.conn.execute(SQL_INSERTAR_DETALLE[exp_data.tipo], (maestro["id"], *valores)).fetchone())
+        return {"id": maestro["id"], "nombre": maestro["nombre"], "detalle": detalle}
+
+    def create_experiment_with_detail(self, exp_data: ExperimentCreate, physics_data: dict) -> dict:
+        """Inserta maestro y detalle dentro de una misma transacción."""
+        try:
+            with self._transaccion():
+                return self._insertar(exp_data, physics_data)
+        except sqlite3.Error as e:
+            self._handle_error("create_experiment_with_detail", str(e))
+
+    def create_experiment_with_uncertainty(
+        self, exp_data: ExperimentCreate, physics_data: dict, uncertainty_rows: list[dict],
+    ) -> dict:
+        """Inserta maestro, detalle y filas de incertidumbre en una misma transacción."""
+        try:
+            with self._transaccion():
+                creado = self._insertar(exp_data, physics_data)
+                creado["incertidumbre"] = [
+                    _fila_incertidumbre(self.conn.execute(
+                        SQL_INSERTAR_INCERTIDUMBRE,
+                        (creado["id"], *(fila.get(columna) for columna in COLUMNAS_INCERTIDUMBRE)),
+                    ).fetchone())
+                    for fila in uncertainty_rows
+                ]
+                return creado
+        except sqlite3.Error as e:
+            self._handle_error("create_experiment_with_uncertainty", str(e))
+
+    def create_experiments_bulk(self, tipo: str, nombres: list[str], physics_rows: list[dict]) -> list[int]:
+        """Inserta el lote por bloques, cada bloque en su propia transacción."""
+        columnas = COLUMNAS_DETALLE[tipo]
+        ids: list[int] = []
+        try:
+            for inicio in range(0, len(nombres), TAMANO_BLOQUE):
+                bloque = nombres[inicio:inicio + TAMANO_BLOQUE]
+                with self._transaccion():
+                    ids_bloque = [
+                        self.conn.execute(SQL_INSERTAR_MAESTRO, (nombre, tipo)).fetchone()["id"]
+                        for nombre in bloque
+                    ]
+                    self.conn.executemany(
+                        SQL_INSERTAR_DETALLE[tipo].removesuffix(" RETURNING *"),
+                        [
+                            (nuevo_id, *(fila.get(columna) for columna in columnas))
+                            for nuevo_id, fila in zip(ids_bloque, physics_rows[inicio:inicio + TAMANO_BLOQUE])
+                        ],
+                    )
+                ids.extend(ids_bloque)
+        except sqlite3.Error as e:
+            self._handle_error("create_experiments_bulk", str(e))
+        return ids
+
+    def get_all(self) -> list:
+        return [dict(fila) for fila in self.conn.execute(SQL_LISTAR)]
+
+    def get_page(
+        self,
+        limit: int,
+        after: tuple[str, int] | None = None,
+        columns: list[str] | None = None,
+        tipo: str | None = None,
+        desde: str | None = None,
+        hasta: str | None = None,
+        detalle: bool = False,
+    ) -> list[dict]:
+        """Página keyset; la comparación de filas usa el índice (fecha_creacion, id)."""
+        columnas = COLUMNAS_MAESTRO if detalle else columns or COLUMNAS_MAESTRO
+        if not set(columnas) <= set(COLUMNAS_MAESTRO):
+            raise StorageError("get_page", f"Columnas no permitidas: {sorted(set(columnas) - set(COLUMNAS_MAESTRO))}")
+
+        condiciones, params = [], []
+        if tipo is not None:
+            condiciones.append("e.tipo = ?")
+            params.append(tipo)
+        if desde is not None:
+            condiciones.append("e.fecha_creacion >= ?")
+            params.append(desde)
+        if hasta is not None:
+            condiciones.append("e.fecha_creacion < ?")
+            params.append(hasta)
+        if after is not None:
+            condiciones.append("(e.fecha_creacion, e.id) < (?, ?)")
+            params.extend(after)
+
+        sql = SQL_CON_DETALLE if detalle else f"SELECT {', '.join(f'e.{c}' for c in columnas)} FROM experimentos e"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY e.fecha_creacion DESC, e.id DESC LIMIT ?"
+        filas = [dict(fila) for fila in self.conn.execute(sql, (*params, limit))]
+        if detalle:
+            for exp in filas:
+                exp["detalle"] = json.loads(exp["detalle"]) if exp["detalle"] else {}
+        return filas
+
+    def get_by_id(self, exp_id: int) -> dict | None:
+        experimentos = self.get_many([exp_id])
+        return experimentos[0] if experimentos else None
+
+    def get_many(self, exp_ids: list[int]) -> list[dict]:
+        experimentos: dict[int, dict] = {}
+        for inicio in range(0, len(exp_ids), TAMANO_BLOQUE):
+            bloque = exp_ids[inicio:inicio + TAMANO_BLOQUE]
+            sql = f"{SQL_CON_DETALLE} WHERE e.id IN ({', '.join('?' for _ in bloque)})"
+            for fila in self.conn.execute(sql, bloque):
+                exp = dict(fila)
+                exp["detalle"] = json.loads(exp["detalle"]) if exp["detalle"] else {}
+                # Igual que PostgREST, si hubiera varios detalles se conserva el primero
+                experimentos.setdefault(exp["id"], exp)
+        return list(experimentos.values())
+
+    def get_uncertainty(self, exp_id: int) -> list[dict]:
+        return [_fila_incertidumbre(fila) for fila in self.conn.execute(SQL_INCERTIDUMBRE, (exp_id,))]
+
+    def add_series_blocks(self, exp_id: int, bloques: list[dict]) -> None:
+        """Inserta todos los bloques en una misma transacción."""
+        try:
+            with self._transaccion():
+                self.conn.executemany(
+                    SQL_INSERTAR_SERIE,
+                    [(exp_id, *(b[columna] for columna in COLUMNAS_SERIE), b["datos"]) for b in bloques],
+                )
+        except sqlite3.Error as e:
+            self._handle_error("add_series_blocks", str(e))
+
+    def get_series_blocks(self, exp_id: int, t0: float | None = None, t1: float | None = None) -> list[dict]:
+        limites = (float("-inf") if t0 is None else t0, float("inf") if t1 is None else t1)
+        return [dict(fila) for fila in self.conn.execute(SQL_SERIE, (exp_id, *limites))]
+
+    def get_series_data(self, exp_id: int, indices: list[int]) -> dict[int, bytes]:
+        datos: dict[int, bytes] = {}
+        for inicio in range(0, len(indices), TAMANO_BLOQUE):
+            bloque = indices[inicio:inicio + TAMANO_BLOQUE]
+            sql = (
+                f"SELECT indice, datos FROM {TABLA_SERIES} "
+                f"WHERE experimento_id = ? AND indice IN ({', '.join('?' for _ in bloque)})"
+            )
+            datos.update((fila["indice"], fila["datos"]) for fila in self.conn.execute(sql, (exp_id, *bloque)))
+        return datos
+
+    def delete(self, exp_id: int) -> bool:
+        with self._transaccion():
+            return self.conn.execute(SQL_BORRAR, (exp_id,)).rowcount > 0
+
+    def _transaccion(self):
+        return _Transaccion(self.conn)
+
+
+def _fila_incertidumbre(fila: sqlite3.Row) -> dict:
+    # SQLite guarda los booleanos como 0/1
+    return {**dict(fila), "despejada": bool(fila["despejada"])}
+
+
+class _Transaccion:
+    """BEGIN/COMMIT explícitos (la conexión trabaja en modo autocommit)."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
@@ -0,0 +1,45 @@
+-- Crea un experimento maestro y su fila de detalle físico en una sola llamada.
+--
+-- Al ser una función, ambas inserciones corren en la misma transacción: si la
+-- inserción del detalle falla no queda un experimento huérfano. Se invoca desde
+-- ExperimentRepository.create_experiment_with_detail vía RPC (un solo viaje).
+create or replace function public.crear_experimento_con_detalle(
+    p_nombre text,
+    p_tipo text,
+    p_detalle jsonb
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_id bigint;
+    v_detalle jsonb;
+begin
+    insert into experimentos (nombre, tipo)
+    values (p_nombre, p_tipo)
+    returning id into v_id;
+
+    if p_tipo = 'MRU' then
+        insert into ensayos_mru (experimento_id, distancia, velocidad, tiempo)
+        select v_id, d.distancia, d.velocidad, d.tiempo
+        from jsonb_to_record(p_detalle) as d(distancia float8, velocidad float8, tiempo float8)
+        returning to_jsonb(ensayos_mru) into v_detalle;
+    elsif p_tipo = 'MRUA' then
+        insert into ensayos_mrua (
+            experimento_id, posicion_inicial, posicion_final, aceleracion,
+            tiempo, velocidad_inicial, velocidad_final
+        )
+        select v_id, d.posicion_inicial, d.posicion_final, d.aceleracion,
+               d.tiempo, d.velocidad_inicial, d.velocidad_final
+        from jsonb_to_record(p_detalle) as d(
+            posicion_inicial float8, posicion_final float8, aceleracion float8,
+            tiempo float8, velocidad_inicial float8, velocidad_final float8
+        )
+        returning to_jsonb(ensayos_mrua) into v_detalle;
+    else
+        raise exception 'Tipo de experimento desconocido: %', p_tipo;
+    end if;
+
+    return jsonb_build_object('id', v_id, 'nombre', p_nombre, 'detalle', v_detalle);
+end;
+$$;
@@ -0,0 +1,9 @@
+-- Índices para la paginación keyset del listado (GET /experiments).
+-- La consulta ordena por (fecha_creacion DESC, id DESC) y compara contra la
+-- última clave vista, así que cada página es un recorrido acotado del índice.
+create index if not exists idx_experimentos_fecha
+    on public.experimentos (fecha_creacion desc, id desc);
+
+-- Filtro ?tipo= combinado con el mismo orden
+create index if not exists idx_experimentos_tipo_fecha
+    on public.experimentos (tipo, fecha_creacion desc, id desc);
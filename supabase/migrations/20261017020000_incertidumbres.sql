@@ -0,0 +1,58 @@
+-- Incertidumbre Monte Carlo guardada junto al detalle de un experimento
+-- (POST /experiments/calculate/{tipo}/uncertainty?guardar=true).
+--
+-- Una fila por variable: las despejadas con media, desviación e intervalo de
+-- confianza; los datos medidos con su valor central y la desviación indicada.
+create table if not exists public.incertidumbres (
+    id bigint generated by default as identity primary key,
+    experimento_id bigint not null references public.experimentos (id) on delete cascade,
+    variable text not null,
+    despejada boolean not null,
+    media float8,
+    desviacion float8,
+    ic_inferior float8,
+    ic_superior float8,
+    confianza float8,
+    muestras bigint
+);
+
+create index if not exists idx_incertidumbres_experimento
+    on public.incertidumbres (experimento_id);
+
+-- Maestro, detalle e incertidumbre en una sola llamada y una sola transacción.
+-- Se invoca desde ExperimentRepository.create_experiment_with_uncertainty vía RPC.
+create or replace function public.crear_experimento_con_incertidumbre(
+    p_nombre text,
+    p_tipo text,
+    p_detalle jsonb,
+    p_incertidumbre jsonb
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_creado jsonb;
+    v_filas jsonb;
+begin
+    v_creado := public.crear_experimento_con_detalle(p_nombre, p_tipo, p_detalle);
+
+    with insertadas as (
+        insert into incertidumbres (
+            experimento_id, variable, despejada, media, desviacion,
+            ic_inferior, ic_superior, confianza, muestras
+        )
+        select (v_creado ->> 'id')::bigint, f.variable, f.despejada, f.media, f.desviacion,
+               f.ic_inferior, f.ic_superior, f.confianza, f.muestras
+        from jsonb_to_recordset(p_incertidumbre) as f(
+            variable text, despejada boolean, media float8, desviacion float8,
+            ic_inferior float8, ic_superior float8, confianza float8, muestras bigint
+        )
+        returning *
+    )
+    select coalesce(jsonb_agg(to_jsonb(insertadas) order by insertadas.id), '[]'::jsonb)
+    into v_filas
+    from insertadas;
+
+    return v_creado || jsonb_build_object('incertidumbre', v_filas);
+end;
+$$;
@@ -0,0 +1,28 @@
+-- Series de muestras crudas de un sensor adjuntas a un experimento
+-- (POST/GET /experiments/{id}/series).
+--
+-- Una fila por bloque de hasta 4096 muestras: metadatos para filtrar por
+-- rango de tiempo y armar vistas reducidas sin leer los datos, y las columnas
+-- t y x comprimidas sin pérdida (XOR con la muestra anterior, bytes
+-- reordenados y zlib; ver src/services/series.py).
+create table if not exists public.series_bloques (
+    id bigint generated by default as identity primary key,
+    experimento_id bigint not null references public.experimentos (id) on delete cascade,
+    indice integer not null,
+    puntos integer not null,
+    t_inicio float8 not null,
+    t_fin float8 not null,
+    x_min float8 not null,
+    x_max float8 not null,
+    x_primero float8 not null,
+    x_ultimo float8 not null,
+    precision text not null check (precision in ('float32', 'float64')),
+    codec text not null,
+    bytes integer not null,
+    datos bytea not null,
+    unique (experimento_id, indice)
+);
+
+-- Lecturas por rango: los bloques de un experimento ordenados por tiempo
+create index if not exists idx_series_bloques_tiempo
+    on public.series_bloques (experimento_id, t_inicio);
@@ -0,0 +1,54 @@
+-- Registro de modelos físicos (ver src/core/modelos.py).
+--
+-- Cada tipo de experimento apunta a su tabla de detalle, cuyas columnas son
+-- las variables del modelo. Con esto `crear_experimento_con_detalle` deja de
+-- tener una rama por tipo: inserta en la tabla registrada las columnas que
+-- la tabla declara. Un modelo nuevo solo necesita su tabla y su fila aquí.
+create table if not exists public.modelos (
+    tipo text primary key,
+    tabla text not null unique
+);
+
+insert into public.modelos (tipo, tabla)
+values ('MRU', 'ensayos_mru'), ('MRUA', 'ensayos_mrua')
+on conflict (tipo) do update set tabla = excluded.tabla;
+
+create or replace function public.crear_experimento_con_detalle(
+    p_nombre text,
+    p_tipo text,
+    p_detalle jsonb
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_id bigint;
+    v_tabla text;
+    v_columnas text;
+    v_detalle jsonb;
+begin
+    select tabla into v_tabla from modelos where tipo = p_tipo;
+    if v_tabla is null then
+        raise exception 'Tipo de experimento desconocido: %', p_tipo;
+    end if;
+
+    insert into experimentos (nombre, tipo)
+    values (p_nombre, p_tipo)
+    returning id into v_id;
+
+    -- Todas las columnas de la tabla menos la identidad, en su orden
+    select string_agg(quote_ident(column_name), ', ' order by ordinal_position)
+    into v_columnas
+    from information_schema.columns
+    where table_schema = 'public' and table_name = v_tabla and column_name <> 'id';
+
+    execute format(
+        'insert into %1$I (%2$s) select %2$s from jsonb_populate_record(null::%1$I, $1) returning to_jsonb(%1$I)',
+        v_tabla, v_columnas
+    )
+    into v_detalle
+    using p_detalle || jsonb_build_object('experimento_id', v_id);
+
+    return jsonb_build_object('id', v_id, 'nombre', p_nombre, 'detalle', v_detalle);
+end;
+$$;
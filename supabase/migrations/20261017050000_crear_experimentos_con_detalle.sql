@@ -0,0 +1,46 @@
+-- Alta de experimentos en bloque (lotes, write-behind, importación Parquet).
+--
+-- Inserta cada maestro con su detalle dentro de la misma transacción: si
+-- falla una fila no queda ningún maestro del bloque sin detalle, y quien
+-- reintenta el bloque completo no lo duplica. Retorna los IDs en el orden
+-- de entrada. Se invoca desde ExperimentRepository.create_experiments_bulk.
+create or replace function public.crear_experimentos_con_detalle(
+    p_tipo text,
+    p_nombres jsonb,
+    p_detalles jsonb
+)
+returns table (id bigint)
+language plpgsql
+as $$
+declare
+    v_tabla text;
+    v_columnas text;
+    v_id bigint;
+begin
+    select m.tabla into v_tabla from modelos m where m.tipo = p_tipo;
+    if v_tabla is null then
+        raise exception 'Tipo de experimento desconocido: %', p_tipo;
+    end if;
+
+    -- Todas las columnas de la tabla menos la identidad, en su orden
+    select string_agg(quote_ident(c.column_name), ', ' order by c.ordinal_position)
+    into v_columnas
+    from information_schema.columns c
+    where c.table_schema = 'public' and c.table_name = v_tabla and c.column_name <> 'id';
+
+    for i in 0 .. jsonb_array_length(p_nombres) - 1 loop
+        insert into experimentos (nombre, tipo)
+        values (p_nombres ->> i, p_tipo)
+        returning experimentos.id into v_id;
+
+        execute format(
+            'insert into %1$I (%2$s) select %2$s from jsonb_populate_record(null::%1$I, $1)',
+            v_tabla, v_columnas
+        )
+        using (p_detalles -> i) || jsonb_build_object('experimento_id', v_id);
+
+        id := v_id;
+        return next;
+    end loop;
+end;
+$$;
@@ -0,0 +1,400 @@
+import asyncio
+import io
+import json
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_async_physics_service
+from src.api.main import app
+from src.app.listado import recorrer_listado
+from src.core.exceptions import StorageError
+from src.schemas.mru import MRUSchema
+from src.services.cache import LRUTTLCache
+from src.services.physics_service import AsyncPhysicsService
+from src.storage.async_experiment_repository import AsyncExperimentRepository
+from src.storage.fake_client import FakeAsyncSupabaseClient
+
+
+@pytest.fixture
+def service_async() -> AsyncPhysicsService:
+    """Servicio asíncrono con el repositorio reemplazado por un AsyncMock."""
+    return AsyncPhysicsService(
+        AsyncMock(), cache=LRUTTLCache(max_entradas=16, ttl=60), trayectorias=LRUTTLCache(16, 60, copiar=False),
+    )
+
+
+@pytest.fixture
+def api(service_async):
+    """Cliente HTTP de la API con el servicio inyectado."""
+    app.dependency_overrides[get_async_physics_service] = lambda: service_async
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+# --- SERVICIO Y RUTAS ASÍNCRONAS ---
+
+def test_servicio_async_resuelve_antes_de_guardar(service_async) -> None:
+    """La resolución física es la misma que en el servicio síncrono y se espera al repositorio."""
+    datos = MRUSchema(velocidad=10.0, tiempo=5.0)
+    asyncio.run(service_async.resolver_y_guardar_mru("Ensayo Async", datos))
+    exp_maestro, physics = service_async.repository.create_experiment_with_detail.await_args.args
+    assert exp_maestro.tipo == "MRU"
+    assert physics["distancia"] == 50.0
+
+
+def test_mrua_despeja_la_velocidad_inicial(api, service_async) -> None:
+    """Una velocidad inicial desconocida se despeja; sin ecuación que la alcance, la ruta responde 400."""
+    service_async.repository.create_experiment_with_detail.side_effect = (
+        lambda exp, physics: {"id": 1, "nombre": exp.nombre, "detalle": physics}
+    )
+    creado = api.post("/experiments/calculate/mrua", params={"nombre": "Rampa"}, json={
+        "posicion_final": 16.0, "aceleracion": 2.0, "tiempo": 2.0,
+    })
+    sin_tiempo = api.post("/experiments/calculate/mrua", params={"nombre": "Rampa"}, json={
+        "posicion_final": 16.0, "aceleracion": 2.0, "velocidad_final": 10.0,
+    })
+
+    assert creado.status_code == 200
+    assert creado.json()["detalle"]["velocidad_inicial"] == 6.0
+    assert creado.json()["detalle"]["velocidad_final"] == 10.0
+    assert sin_tiempo.status_code == 400
+    assert "velocidad_inicial" in sin_tiempo.json()["detail"]
+
+
+def test_ruta_detalle_async_404(api, service_async) -> None:
+    """La ruta de detalle espera al servicio y responde 404 si el experimento no existe."""
+    service_async.repository.get_by_id.return_value = None
+    respuesta = api.get("/experiments/99")
+    assert respuesta.status_code == 404
+    service_async.repository.get_by_id.assert_awaited_once_with(99)
+
+
+def test_error_de_almacenamiento_responde_502_en_todas_las_rutas(api, service_async) -> None:
+    """Un StorageError del repositorio llega al cliente como 502 con su mensaje, no como 500 ni 400."""
+    error = StorageError("get_by_id", "sin conexión")
+    service_async.repository.get_by_id.side_effect = error
+    service_async.repository.create_experiment_with_detail.side_effect = error
+    detalle = api.get("/experiments/7")
+    calculo = api.post("/experiments/calculate/mru", params={"nombre": "Ensayo"}, json={"velocidad": 2.0, "tiempo": 3.0})
+
+    for respuesta in (detalle, calculo):
+        assert respuesta.status_code == 502
+        assert respuesta.json() == {"detail": error.message}
+
+
+# --- CACHÉ DE LECTURAS ---
+
+def test_detalle_se_sirve_desde_cache_hasta_borrarlo(api, service_async) -> None:
+    """La segunda lectura no toca el repositorio y el borrado invalida la entrada."""
+    service_async.repository.get_by_id.return_value = {"id": 3, "tipo": "MRU", "detalle": {}}
+    service_async.repository.delete.return_value = True
+
+    api.get("/experiments/3")
+    api.get("/experiments/3")
+    assert service_async.repository.get_by_id.await_count == 1
+
+    api.delete("/experiments/3")
+    api.get("/experiments/3")
+    assert service_async.repository.get_by_id.await_count == 2
+
+    stats = api.get("/experiments/cache/stats").json()
+    assert (stats["aciertos"], stats["fallos"], stats["invalidaciones"]) == (1, 2, 1)
+
+
+def test_crear_invalida_listado(service_async) -> None:
+    """Registrar un ensayo invalida el listado cacheado."""
+    service_async.repository.get_all.return_value = []
+    asyncio.run(service_async.list_all())
+    asyncio.run(service_async.resolver_y_guardar_mru("Nuevo", MRUSchema(velocidad=1.0, tiempo=1.0)))
+    asyncio.run(service_async.list_all())
+    assert service_async.repository.get_all.await_count == 2
+
+
+def test_listado_paginado_expone_cursor(api, service_async) -> None:
+    """La ruta pide limit+1 filas al repositorio y publica el cursor de la página siguiente."""
+    service_async.repository.get_page.return_value = [
+        {"id": 3, "fecha_creacion": "2026-10-17T10:00:00.000+00:00"},
+        {"id": 2, "fecha_creacion": "2026-10-17T09:00:00.000+00:00"},
+    ]
+    respuesta = api.get("/experiments", params={"limit": 1, "fields": "id", "tipo": "MRU"})
+
+    assert respuesta.status_code == 200
+    assert respuesta.json() == [{"id": 3, "fecha_creacion": "2026-10-17T10:00:00Z"}]
+    assert respuesta.headers["X-Next-Cursor"]
+    assert service_async.repository.get_page.await_args.kwargs["limit"] == 2
+    assert api.get("/experiments", params={"cursor": "%%%"}).status_code == 400
+
+
+def test_pagina_de_analisis_recorre_todo_el_historial() -> None:
+    """La app sigue X-Next-Cursor hasta agotar el listado: no se queda con la primera página."""
+    service = AsyncPhysicsService(AsyncExperimentRepository(FakeAsyncSupabaseClient()), cache=LRUTTLCache(16, 60))
+    for i in range(5):
+        asyncio.run(service.resolver_y_guardar_mru(f"Ensayo {i}", MRUSchema(velocidad=1.0, tiempo=float(i + 1))))
+    app.dependency_overrides[get_async_physics_service] = lambda: service
+    pedidas = []
+
+    def obtener(url, params, timeout):
+        pedidas.append(dict(params))
+        return cliente.get(url, params=params)
+
+    try:
+        cliente = TestClient(app)
+        filas = recorrer_listado(obtener, "/experiments", {"fields": "nombre,tipo", "limit": 2})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert sorted(fila["nombre"] for fila in filas) == [f"Ensayo {i}" for i in range(5)]
+    assert len({fila["id"] for fila in filas}) == 5
+    assert len(pedidas) == 3 and "cursor" not in pedidas[0] and pedidas[-1]["cursor"]
+    assert set(filas[0]) == {"id", "nombre", "tipo", "fecha_creacion"}
+
+
+def test_detalles_en_bloque_solo_pide_los_no_cacheados(api, service_async) -> None:
+    """GET /experiments/details respeta el orden pedido y reutiliza los detalles ya cacheados."""
+    service_async.repository.get_by_id.return_value = {"id": 2, "nombre": "B", "tipo": "MRU", "detalle": {}}
+    api.get("/experiments/2")
+    service_async.repository.get_many.return_value = [
+        {"id": 1, "nombre": "A", "tipo": "MRU", "detalle": {}},
+        {"id": 3, "nombre": "C", "tipo": "MRUA", "detalle": {}},
+    ]
+
+    respuesta = api.get("/experiments/details", params={"ids": "3,2,1,3"})
+    assert [exp["id"] for exp in respuesta.json()] == [3, 2, 1]
+    service_async.repository.get_many.assert_awaited_once_with([3, 1])
+    assert api.get("/experiments/details", params={"ids": "1,x"}).status_code == 400
+
+
+def test_trayectoria_npy_y_cache_por_resolucion(api, service_async) -> None:
+    """Las curvas se calculan en el servidor y se cachean por (id, resolución)."""
+    service_async.repository.get_by_id.return_value = {
+        "id": 7, "nombre": "Rampa", "tipo": "MRUA",
+        "detalle": {"posicion_inicial": 1.0, "velocidad_inicial": 2.0, "aceleracion": 4.0, "tiempo": 3.0},
+    }
+    respuesta = api.get("/experiments/7/trajectory", params={"points": 4, "format": "npy"})
+
+    assert respuesta.headers["content-type"] == "application/x-npy"
+    curvas = dict(zip(respuesta.headers["X-Columns"].split(","), np.load(io.BytesIO(respuesta.content))))
+    np.testing.assert_allclose(curvas["t"], [0.0, 1.0, 2.0, 3.0])
+    np.testing.assert_allclose(curvas["x"], [1.0, 5.0, 13.0, 25.0])
+    np.testing.assert_allclose(curvas["v"], [2.0, 6.0, 10.0, 14.0])
+
+    assert api.get("/experiments/7/trajectory", params={"points": 4}).json()["a"] == [4.0] * 4
+    api.get("/experiments/7/trajectory", params={"points": 50})
+    assert service_async.repository.get_by_id.await_count == 1  # El detalle también sale de la caché
+    assert api.get("/experiments/7/trajectory", params={"t0": 2, "t1": 1}).status_code == 400
+
+
+def test_comparacion_superpone_en_malla_comun(api, service_async) -> None:
+    """Varios experimentos se evalúan sobre la misma malla y se deciman conservando extremos."""
+    service_async.repository.get_many.return_value = [
+        {"id": 1, "nombre": "Carrito", "tipo": "MRU", "detalle": {"velocidad": 3.0, "tiempo": 10.0}},
+        {"id": 2, "nombre": "Frenado", "tipo": "MRUA",
+         "detalle": {"velocidad_inicial": 5.0, "aceleracion": -2.0, "tiempo": 5.0}},
+    ]
+    curvas = api.get(
+        "/experiments/compare", params={"ids": "1,2", "variables": "x", "points": 1001, "max_points": 100}
+    ).json()
+
+    assert list(curvas) == ["t", "x:1", "x:2"]
+    assert len(curvas["t"]) == len(curvas["x:2"]) == 100
+    assert (curvas["t"][0], curvas["t"][-1]) == (0.0, 10.0)
+    assert max(curvas["x:2"]) == pytest.approx(6.25)  # Vértice de la parábola, preservado por min/max
+    assert curvas["x:1"][-1] == pytest.approx(30.0)
+    assert api.get("/experiments/compare", params={"ids": "1", "variables": "y"}).status_code == 400
+
+
+def test_exportacion_csv_recorre_por_paginas(api, service_async, monkeypatch) -> None:
+    """La exportación pide páginas keyset con detalle hasta agotar el historial y las emite en streaming."""
+    monkeypatch.setattr("src.services.physics_service.TAMANO_BLOQUE", 2)
+    service_async.repository.get_page.side_effect = [
+        [{"id": 3, "nombre": "C", "tipo": "MRUA", "fecha_creacion": "2026-10-17T10:00:00+00:00",
+          "detalle": {"aceleracion": 2.0, "tiempo": 1.0}},
+         {"id": 2, "nombre": "B", "tipo": "MRU", "fecha_creacion": "2026-10-17T09:00:00+00:00",
+          "detalle": {"distancia": 4.0, "velocidad": 2.0, "tiempo": 2.0}}],
+        [{"id": 1, "nombre": "A, con coma", "tipo": "MRU", "fecha_creacion": "2026-10-17T08:00:00+00:00",
+          "detalle": {"distancia": 1.0, "velocidad": 1.0, "tiempo": 1.0}}],
+    ]
+    respuesta = api.get("/experiments/export", params={"format": "csv"})
+
+    lineas = respuesta.text.splitlines()
+    assert respuesta.headers["content-type"].startswith("text/csv")
+    assert lineas[0].startswith("id,nombre,tipo,fecha_creacion,distancia,velocidad,tiempo,posicion_inicial")
+    assert lineas[2].startswith("2,B,MRU,2026-10-17T09:00:00+00:00,4.0,2.0,2.0,,")
+    assert lineas[3].startswith('1,"A, con coma",MRU')
+    segunda = service_async.repository.get_page.await_args_list[1].kwargs
+    assert (segunda["after"], segunda["detalle"]) == (("2026-10-17T09:00:00+00:00", 2), True)
+
+
+def test_formatos_columnares_sin_pyarrow(api, monkeypatch) -> None:
+    """Sin pyarrow la importación responde 415 y la exportación Parquet 406, antes de leer la base."""
+    monkeypatch.setattr("src.api.routers.experiments.pyarrow_disponible", lambda: False)
+    assert api.post("/experiments/import/mru", content=b"PAR1").status_code == 415
+    assert api.get("/experiments/export", params={"format": "parquet"}).status_code == 406
+
+
+# --- MÉTRICAS ---
+
+def test_metricas_por_plantilla_de_ruta(api, service_async) -> None:
+    """Las peticiones se agrupan por la plantilla de la ruta y su estado, no por la URL concreta."""
+    service_async.repository.get_by_id.return_value = None
+    api.get("/experiments/7")
+    api.get("/experiments/8")
+
+    texto = api.get("/metrics").text
+    assert "# TYPE physilab_http_request_duration_seconds histogram" in texto
+    serie = 'physilab_http_request_duration_seconds_count{method="GET",route="/experiments/{id}",status="404"}'
+    assert any(linea.startswith(serie) and int(linea.split()[-1]) >= 2 for linea in texto.splitlines())
+    assert "/experiments/7" not in texto
+
+
+def test_server_timing_desglosa_el_almacenamiento(monkeypatch) -> None:
+    """Con la opción activa, cada respuesta detalla las llamadas al repositorio que hizo."""
+    monkeypatch.setattr("src.api.metrics.settings.server_timing_enabled", True)
+    service = AsyncPhysicsService(AsyncExperimentRepository(FakeAsyncSupabaseClient()))
+    app.dependency_overrides[get_async_physics_service] = lambda: service
+    try:
+        cliente = TestClient(app)
+        creado = cliente.post("/experiments/calculate/mru", params={"nombre": "Ensayo"}, json={"velocidad": 2.0, "tiempo": 3.0})
+        respuesta = cliente.get(f"/experiments/{creado.json()['id']}")
+    finally:
+        app.dependency_overrides.clear()
+
+    cabecera = respuesta.headers["server-timing"]
+    assert cabecera.startswith("total;dur=")
+    assert 'desc="1 llamadas' in cabecera
+    assert "get_by_id;dur=" in cabecera
+    texto = TestClient(app).get("/metrics").text
+    assert 'physilab_storage_call_duration_seconds_count{backend="supabase",operation="get_by_id",result="ok"}' in texto
+
+
+def test_incertidumbre_guardada_se_consulta_por_experimento() -> None:
+    """Con guardar=true la respuesta trae el id y la incertidumbre queda en /{id}/uncertainty."""
+    service = AsyncPhysicsService(AsyncExperimentRepository(FakeAsyncSupabaseClient()), cache=LRUTTLCache(16, 60))
+    app.dependency_overrides[get_async_physics_service] = lambda: service
+    try:
+        cliente = TestClient(app)
+        cuerpo = {
+            "datos": {"distancia": 100.0, "velocidad": 10.0},
+            "incertidumbre": {"desviaciones": {"distancia": 0.5}, "muestras": 5000, "semilla": 1},
+        }
+        creado = cliente.post("/experiments/calculate/mru/uncertainty", params={"guardar": True}, json=cuerpo).json()
+        filas = cliente.get(f"/experiments/{creado['id']}/uncertainty").json()
+        invalida = cliente.post("/experiments/calculate/mru/uncertainty", json={
+            **cuerpo, "incertidumbre": {"desviaciones": {"tiempo": 0.1}},
+        })
+    finally:
+        app.dependency_overrides.clear()
+
+    assert creado["detalle"]["tiempo"] == 10.0
+    assert creado["variables"]["tiempo"]["desviacion"] == pytest.approx(0.05, rel=0.05)
+    assert {f["variable"]: f["despejada"] for f in filas} == {"tiempo": True, "distancia": False}
+    assert invalida.status_code == 400
+
+
+def test_ajuste_de_serie_npy_se_guarda_como_experimento() -> None:
+    """Una serie (2, n) en npy se ajusta, se guarda como MRU y devuelve residuos en columnas."""
+    service = AsyncPhysicsService(AsyncExperimentRepository(FakeAsyncSupabaseClient()), cache=LRUTTLCache(16, 60))
+    app.dependency_overrides[get_async_physics_service] = lambda: service
+    t = np.linspace(0.0, 5.0, 501)
+    buffer = io.BytesIO()
+    np.save(buffer, np.stack([t, 2.0 + 4.0 * t]))
+    try:
+        respuesta = TestClient(app).post(
+            "/experiments/fit/mru", params={"format": "npy", "guardar": True, "residuals": "npy", "nombre": "Fotopuerta"},
+            content=buffer.getvalue(),
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert respuesta.status_code == 200
+    resumen = json.loads(respuesta.headers["x-fit"])
+    assert resumen["parametros"]["velocidad"] == pytest.approx(4.0)
+    assert resumen["detalle"]["distancia"] == pytest.approx(20.0) and resumen["r2"] == pytest.approx(1.0)
+    columnas = dict(zip(respuesta.headers["x-columns"].split(","), np.load(io.BytesIO(respuesta.content))))
+    assert np.abs(columnas["residuo"]).max() < 1e-9
+    assert asyncio.run(service.get_one(resumen["id"]))["detalle"]["velocidad"] == pytest.approx(4.0)
+
+
+def test_serie_cruda_se_sube_y_se_lee_por_rango() -> None:
+    """Las muestras subidas a un experimento se leen por rango en npy y se resumen en /series/info."""
+    service = AsyncPhysicsService(AsyncExperimentRepository(FakeAsyncSupabaseClient()), cache=LRUTTLCache(16, 60))
+    app.dependency_overrides[get_async_physics_service] = lambda: service
+    creado = asyncio.run(service.resolver_y_guardar_mru("Sensor", MRUSchema(distancia=10.0, velocidad=2.0)))
+    t = np.linspace(0.0, 5.0, 5001)
+    try:
+        cliente = TestClient(app)
+        subida = cliente.post(
+            f"/experiments/{creado['id']}/series", params={"precision": "float32"},
+            content=json.dumps({"t": t.tolist(), "x": (2.0 * t).tolist()}),
+        )
+        rango = cliente.get(f"/experiments/{creado['id']}/series", params={"t0": 1.0, "t1": 2.0, "format": "npy"})
+        info = cliente.get(f"/experiments/{creado['id']}/series/info")
+        inexistente = cliente.post("/experiments/999/series", content=json.dumps({"t": [0.0], "x": [0.0]}))
+    finally:
+        app.dependency_overrides.clear()
+
+    assert subida.status_code == 200 and subida.json()["bloques"] == 2
+    leidos = np.load(io.BytesIO(rango.content))
+    assert rango.headers["x-columns"] == "t,x" and leidos.shape == (2, 1001)
+    assert leidos[1] == pytest.approx(2.0 * leidos[0], rel=1e-6)
+    assert info.json()["puntos"] == 5001 and info.json()["compresion"] > 1
+    assert inexistente.status_code == 404
+
+
+# --- AJUSTE EN VIVO ---
+
+def test_sesion_en_vivo_publica_el_ajuste_y_guarda_al_cerrar() -> None:
+    """Los lotes del sensor actualizan el ajuste del suscriptor y el cierre registra un MRU."""
+    service = AsyncPhysicsService(AsyncExperimentRepository(FakeAsyncSupabaseClient()), cache=LRUTTLCache(16, 60))
+    app.dependency_overrides[get_async_physics_service] = lambda: service
+    t = np.linspace(0.0, 3.0, 301)
+    try:
+        cliente = TestClient(app)
+        with cliente.websocket_connect("/live/mru?nombre=Fotopuerta") as sensor:
+            sesion = sensor.receive_json()["sesion"]
+            with cliente.websocket_connect(f"/live/sessions/{sesion}") as aula:
+                assert aula.receive_json()["parametros"] is None
+                sensor.send_text(json.dumps({"t": t[:150].tolist(), "x": (1.0 + 2.0 * t[:150]).tolist()}))
+                assert sensor.receive_json()["puntos"] == 150
+                buffer = io.BytesIO()
+                np.save(buffer, np.stack([t[150:], 1.0 + 2.0 * t[150:]]))
+                sensor.send_bytes(buffer.getvalue())
+                assert sensor.receive_json()["parametros"]["velocidad"] == pytest.approx(2.0)
+                sensor.send_text(json.dumps({"t": [1.0], "x": [1.0, 2.0]}))
+                assert sensor.receive_json()["evento"] == "error"
+                sensor.send_text(json.dumps({"fin": True}))
+                final = sensor.receive_json()
+                mensajes = [aula.receive_json()]
+                while mensajes[-1]["evento"] != "fin":
+                    mensajes.append(aula.receive_json())
+    finally:
+        app.dependency_overrides.clear()
+
+    assert final["evento"] == "fin" and final["puntos"] == 301
+    assert mensajes[-1]["guardado"]["id"] == final["guardado"]["id"]
+    guardado = asyncio.run(service.get_one(final["guardado"]["id"]))
+    assert guardado["nombre"] == "Fotopuerta" and guardado["detalle"]["distancia"] == pytest.approx(6.0)
+
+
+# --- BARRIDOS DE PARÁMETROS ---
+
+def test_barrido_npy_en_streaming_con_forma_de_grilla() -> None:
+    """El barrido no persiste nada y llega como (salidas, celdas) con los ejes en cabeceras."""
+    cuerpo = {
+        "modelo": "mru",
+        "parametros": {"velocidad": {"inicio": 1, "fin": 3, "pasos": 3}, "tiempo": {"inicio": 0, "fin": 10, "pasos": 11}},
+        "precision": "float32",
+    }
+    respuesta = TestClient(app).post("/simulate/sweep", json=cuerpo)
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers["x-grid-axes"] == "velocidad,tiempo"
+    assert int(respuesta.headers["content-length"]) == len(respuesta.content)
+    valores = np.load(io.BytesIO(respuesta.content), allow_pickle=False)
+    columnas = dict(zip(respuesta.headers["x-columns"].split(","), valores))
+    distancia = columnas["distancia"].reshape([int(n) for n in respuesta.headers["x-grid-shape"].split(",")])
+    assert distancia.dtype == np.float32
+    assert distancia[2, 10] == pytest.approx(30.0)
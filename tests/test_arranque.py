@@ -0,0 +1,65 @@
+import ast
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+# Segundos que puede tardar `import src.api.main` en un proceso nuevo (holgado:
+# en un equipo de desarrollo ronda 0.5 s; el error típico es duplicarlo de golpe)
+PRESUPUESTO_API = 1.5
+
+# Módulos que la API solo carga al abrir el almacenamiento o al exportar
+CARGA_DIFERIDA = ("supabase", "postgrest", "httpx", "pandas", "pyarrow", "plotly")
+
+SONDA = """
+import json, sys, time
+inicio = time.perf_counter()
+import src.api.main
+segundos = time.perf_counter() - inicio
+from src.core.config import get_settings
+print(json.dumps({
+    "segundos": segundos,
+    "cargados": sorted(m for m in sys.modules if m.split(".")[0] in MODULOS),
+    "settings_creados": get_settings.cache_info().currsize,
+}))
+"""
+
+
+def _importar_api() -> dict:
+    entorno = {k: v for k, v in os.environ.items() if not k.startswith("SUPABASE_")}
+    salida = subprocess.run(
+        [sys.executable, "-c", SONDA.replace("MODULOS", repr(set(CARGA_DIFERIDA)))],
+        cwd=RAIZ, env=entorno, capture_output=True, text=True, check=True,
+    )
+    return json.loads(salida.stdout)
+
+
+def test_importar_la_api_no_carga_cliente_ni_configuracion() -> None:
+    """Importar la API (sin variables de Supabase) no construye Settings ni carga el cliente HTTP."""
+    medida = _importar_api()
+    assert medida["cargados"] == []
+    assert medida["settings_creados"] == 0
+
+
+def test_importar_la_api_dentro_del_presupuesto() -> None:
+    """El arranque en frío de un worker se mantiene bajo el presupuesto (mejor de tres)."""
+    segundos = min(_importar_api()["segundos"] for _ in range(3))
+    assert segundos < PRESUPUESTO_API, f"import src.api.main tardó {segundos:.2f} s"
+
+
+def test_paginas_streamlit_difieren_las_librerias_pesadas() -> None:
+    """Las páginas solo importan numpy, pandas o plotly dentro de las funciones que dibujan."""
+    pesadas = {"numpy", "pandas", "plotly"}
+    for pagina in sorted((RAIZ / "src" / "app").rglob("*.py")):
+        arbol = ast.parse(pagina.read_text(encoding="utf-8"))
+        for nodo in arbol.body:  # Solo el nivel de módulo; `if TYPE_CHECKING:` queda fuera
+            if isinstance(nodo, ast.Import):
+                modulos = [alias.name for alias in nodo.names]
+            elif isinstance(nodo, ast.ImportFrom):
+                modulos = [nodo.module or ""]
+            else:
+                continue
+            assert not {m.split(".")[0] for m in modulos} & pesadas, f"{pagina.name}: {ast.unparse(nodo)}"
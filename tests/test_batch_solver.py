@@ -0,0 +1,220 @@
+import sqlite3
+from typing import Optional
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from pydantic import BaseModel
+
+from src.core.exceptions import ErrorDivisionPorCeroFisica, ValidationError
+from src.core.modelos import MODELOS, MRUA, Despeje, Ecuacion, Modelo
+from src.schemas.mru import MRULoteSchema
+from src.schemas.simulation import BarridoSchema
+from src.services.batch_solver import (
+    ESTADO_DATOS_INSUFICIENTES,
+    ESTADO_DISCRIMINANTE_NEGATIVO,
+    ESTADO_DIVISION_CERO,
+    ESTADO_OK,
+    ESTADO_VALOR_NEGATIVO,
+    resolver_fila,
+    resolver_lote,
+    resolver_mru_lote,
+    resolver_mrua_lote,
+)
+from src.services.physics_service import PhysicsService
+from src.services.sweep import planificar_barrido
+from src.storage.sqlite_repository import ddl_detalle
+
+
+@pytest.fixture
+def service_mock() -> PhysicsService:
+    """Servicio con el repositorio reemplazado por un Mock."""
+    service = PhysicsService()
+    service.repository = MagicMock()
+    return service
+
+
+# --- SOLUCIONADOR VECTORIZADO MRU ---
+
+def test_lote_mru_despeja_cada_variable() -> None:
+    """Cada fila despeja su propia incógnita con los mismos resultados que el cálculo escalar."""
+    resultado = resolver_mru_lote(
+        distancia=[None, 100.0, 100.0],
+        velocidad=[10.0, 10.0, None],
+        tiempo=[5.0, None, 5.0],
+    )
+    assert resultado.estado.tolist() == [ESTADO_OK] * 3
+    assert resultado.columnas["distancia"][0] == 50.0
+    assert resultado.columnas["tiempo"][1] == 10.0
+    assert resultado.columnas["velocidad"][2] == 20.0
+
+
+def test_lote_mru_reporta_errores_por_fila_sin_abortar() -> None:
+    """La división por cero, los negativos y los datos insuficientes solo invalidan su fila."""
+    resultado = resolver_mru_lote(
+        distancia=[50.0, None, -1.0, 8.0],
+        velocidad=[0.0, None, 2.0, 2.0],
+        tiempo=[None, 3.0, None, None],
+    )
+    assert resultado.estado.tolist() == [
+        ESTADO_DIVISION_CERO, ESTADO_DATOS_INSUFICIENTES, ESTADO_VALOR_NEGATIVO, ESTADO_OK,
+    ]
+    assert "tiempo" in resultado.errores[0]
+    assert np.isnan(resultado.columnas["tiempo"][0])
+    assert resultado.columnas["tiempo"][3] == 4.0
+
+
+def test_lote_mru_guarda_solo_filas_validas(service_mock) -> None:
+    """El servicio persiste las filas válidas en bloque y devuelve null donde no hubo cálculo."""
+    service_mock.repository.create_experiments_bulk.return_value = [7]
+    lote = MRULoteSchema(distancia=[None, 50.0], velocidad=[10.0, 0.0], tiempo=[5.0, None])
+
+    respuesta = service_mock.resolver_y_guardar_mru_lote("Noche", lote)
+
+    tipo, nombres, filas = service_mock.repository.create_experiments_bulk.call_args.args
+    assert (tipo, nombres) == ("MRU", ["Noche #1"])
+    assert filas == [{"distancia": 50.0, "velocidad": 10.0, "tiempo": 5.0}]
+    assert respuesta["ids"] == [7, None]
+    assert respuesta["tiempo"] == [5.0, None]
+    assert respuesta["guardados"] == 1
+    assert set(respuesta["errores"]) == {1}
+
+
+# --- SOLUCIONADOR VECTORIZADO MRUA ---
+
+def test_lote_mrua_coincide_con_calculo_escalar() -> None:
+    """Aceleración, posición final y velocidad final se resuelven igual que en el servicio escalar."""
+    resultado = resolver_mrua_lote(
+        posicion_inicial=[10.0, 0.0],
+        posicion_final=[None, None],
+        aceleracion=[2.0, None],
+        tiempo=[3.0, 2.0],
+        velocidad_inicial=[5.0, 1.0],
+        velocidad_final=[None, 5.0],
+    )
+    assert resultado.estado.tolist() == [ESTADO_OK, ESTADO_OK]
+    assert resultado.columnas["posicion_final"].tolist() == [34.0, 6.0]
+    assert resultado.columnas["velocidad_final"][0] == 11.0
+    assert resultado.columnas["aceleracion"][1] == 2.0
+
+
+def test_lote_mrua_tiempo_cuadratico_estable_y_lineal() -> None:
+    """La raíz del tiempo es estable con aceleración diminuta y cae al caso lineal con a = 0."""
+    resultado = resolver_mrua_lote(
+        posicion_inicial=[0.0, 0.0, 100.0, 0.0],
+        posicion_final=[34.0, 10.0, 0.0, 10.0],
+        aceleracion=[2.0, 0.0, 2.0, 1e-12],
+        tiempo=[None] * 4,
+        velocidad_inicial=[5.0, 2.0, 5.0, 1e4],
+        velocidad_final=[None] * 4,
+    )
+    assert resultado.estado.tolist() == [ESTADO_OK, ESTADO_OK, ESTADO_DISCRIMINANTE_NEGATIVO, ESTADO_OK]
+    t = resultado.columnas["tiempo"]
+    assert t[0] == pytest.approx((-5 + np.sqrt(25 + 4 * 34)) / 2)
+    assert t[1] == 5.0
+    assert t[3] == pytest.approx(1e-3, rel=1e-12)
+    assert "discriminante negativo" in resultado.errores[2]
+    assert resultado.columnas["velocidad_final"][1] == 2.0
+
+
+def test_lote_mrua_sin_datos_y_sin_movimiento() -> None:
+    """Sin velocidad ni aceleración el tiempo es indeterminado; sin datos suficientes se marca la fila."""
+    resultado = resolver_mrua_lote(
+        posicion_inicial=[0.0, 0.0],
+        posicion_final=[5.0, None],
+        aceleracion=[0.0, None],
+        tiempo=[None, None],
+        velocidad_inicial=[0.0, 3.0],
+        velocidad_final=[None, None],
+    )
+    assert resultado.estado.tolist() == [ESTADO_DIVISION_CERO, ESTADO_DATOS_INSUFICIENTES]
+
+
+# --- REGISTRO DE MODELOS ---
+
+def test_plan_precompilado_por_patron_y_lote_mixto_igual_al_escalar() -> None:
+    """Cada patrón de incógnitas tiene su plan; un lote con patrones mezclados da lo mismo que fila a fila."""
+    plan = MRUA.plan({"tiempo", "velocidad_final"})
+    assert [p.variable for p in plan.pasos] == ["tiempo", "velocidad_final"]
+    assert plan is MRUA.plan(["velocidad_final", "tiempo"])
+    assert MRUA.plan({"aceleracion", "tiempo"}).sin_despejar == ("aceleracion", "tiempo")
+
+    filas = [
+        {"posicion_final": 34.0, "aceleracion": 2.0, "velocidad_inicial": 5.0},
+        {"tiempo": 2.0, "velocidad_inicial": 1.0, "velocidad_final": 5.0},
+        {"posicion_inicial": 3.0, "aceleracion": 1.0, "tiempo": 4.0, "velocidad_inicial": 0.5},
+    ]
+    resultado = resolver_lote("MRUA", {v: [f.get(v) for f in filas] for v in MRUA.variables})
+    assert resultado.validas.all()
+    for i, fila in enumerate(filas):
+        escalar = resolver_fila("MRUA", fila)
+        assert {v: c[i] for v, c in resultado.columnas.items()} == pytest.approx(escalar)
+
+
+class FuerzaSchema(BaseModel):
+    fuerza: Optional[float] = None
+    masa: Optional[float] = None
+    aceleracion: Optional[float] = None
+
+
+def test_modelo_nuevo_obtiene_calculo_escalar_lote_y_tabla(monkeypatch, service_mock) -> None:
+    """Declarar F = m·a basta para resolver un ensayo, un lote y crear su tabla de detalle."""
+    variables = ("fuerza", "masa", "aceleracion")
+    fuerza = Modelo("FUERZA", "ensayos_fuerza", variables, (
+        Ecuacion("F = m·a", variables, (
+            Despeje("fuerza", lambda c: c["masa"] * c["aceleracion"]),
+            Despeje("masa", lambda c: c["fuerza"] / c["aceleracion"]),
+            Despeje("aceleracion", lambda c: c["fuerza"] / c["masa"]),
+        )),
+    ))
+    monkeypatch.setitem(MODELOS, "FUERZA", fuerza)
+
+    datos = FuerzaSchema(fuerza=12.0, masa=4.0)
+    service_mock.resolver_y_guardar("FUERZA", "Carro", datos)
+    assert datos.aceleracion == 3.0
+    maestro, detalle = service_mock.repository.create_experiment_with_detail.call_args.args
+    assert maestro.tipo == "FUERZA" and detalle == {"fuerza": 12.0, "masa": 4.0, "aceleracion": 3.0}
+    with pytest.raises(ErrorDivisionPorCeroFisica):
+        service_mock.resolver_y_guardar("FUERZA", "Carro", FuerzaSchema(fuerza=1.0, aceleracion=0.0))
+
+    resultado = resolver_lote("FUERZA", {"fuerza": [None, 6.0, None], "masa": [2.0, None, None], "aceleracion": [5.0, 0.0, 1.0]})
+    assert resultado.estado.tolist() == [ESTADO_OK, ESTADO_DIVISION_CERO, ESTADO_DATOS_INSUFICIENTES]
+    assert resultado.columnas["fuerza"][0] == 10.0
+
+    conexion = sqlite3.connect(":memory:")
+    conexion.executescript("CREATE TABLE experimentos (id INTEGER PRIMARY KEY);" + ddl_detalle(fuerza.tabla, fuerza.variables))
+    columnas = [fila[1] for fila in conexion.execute("PRAGMA table_info(ensayos_fuerza)")]
+    assert columnas == ["id", "experimento_id", *variables]
+
+
+# --- BARRIDOS DE PARÁMETROS ---
+
+def test_barrido_por_bloques_coincide_con_la_grilla_completa() -> None:
+    """Trocear la grilla (incluso a mitad de un eje) da las mismas celdas, en el mismo orden."""
+    plan = planificar_barrido(BarridoSchema(modelo="mrua", parametros={
+        "tiempo": {"inicio": 0, "fin": 4, "pasos": 5},
+        "posicion_inicial": 1.5,
+        "aceleracion": {"inicio": 0, "fin": 2, "pasos": 3},
+        "velocidad_inicial": {"inicio": 1, "fin": 3, "pasos": 7},
+    }))
+    assert list(plan.ejes) == ["tiempo", "aceleracion", "velocidad_inicial"]
+
+    bloques = list(plan.bloques(max_filas=10))  # 7 celdas por (t, a): trocea el eje de aceleración
+    assert max(len(b["posicion_final"]) for b in bloques) <= 10
+    obtenido = np.concatenate([b["posicion_final"] for b in bloques]).reshape(plan.forma)
+
+    t, a, v0 = np.meshgrid(*plan.ejes.values(), indexing="ij")
+    np.testing.assert_allclose(obtenido, 1.5 + v0 * t + 0.5 * a * t**2)
+
+
+def test_barrido_valida_parametros_y_tamano() -> None:
+    """Parámetros ajenos al modelo o negativos se rechazan; una grilla enorme no se planifica."""
+    with pytest.raises(ValueError, match="no válidos"):
+        BarridoSchema(modelo="mru", parametros={"velocidad": 1.0, "tiempo": 1.0, "aceleracion": 2.0})
+    with pytest.raises(ValueError, match="no negativos"):
+        BarridoSchema(modelo="mru", parametros={"velocidad": {"inicio": -1, "fin": 1, "pasos": 3}, "tiempo": 1.0})
+    enorme = BarridoSchema(modelo="mru", parametros={
+        "velocidad": {"inicio": 0, "fin": 1, "pasos": 100_000}, "tiempo": {"inicio": 0, "fin": 1, "pasos": 1_000},
+    })
+    with pytest.raises(ValidationError, match="celdas"):
+        planificar_barrido(enorme)
@@ -0,0 +1,40 @@
+from starlette.testclient import TestClient
+
+from benchmarks.bench_micro import CASOS, comparar, ejecutar
+from benchmarks.stub_postgrest import crear_app
+from src.schemas.experiment import ExperimentCreate
+from src.storage.experiment_repository import ExperimentRepository
+from supabase import ClientOptions, create_client
+
+
+def test_casos_corren_con_entradas_minimas() -> None:
+    """Todos los casos del micro-benchmark se arman y ejecutan sin red ni Supabase."""
+    resultado = ejecutar(tamanos=(2,), rondas=1)
+    assert set(resultado["casos"]) == {f"{nombre}[2]" for nombre in CASOS}
+    assert all(medida["relativo"] > 0 for medida in resultado["casos"].values())
+
+
+def test_comparar_reporta_solo_lo_que_supera_el_umbral() -> None:
+    """La regresión se juzga sobre el tiempo relativo a la referencia, no el absoluto."""
+    base = {"casos": {"mru/lote[10]": {"relativo": 1.0}, "mru/escalar[10]": {"relativo": 1.0}}}
+    actual = {"casos": {
+        "mru/lote[10]": {"relativo": 1.2},
+        "mru/escalar[10]": {"relativo": 1.5},
+        "esquema/mru[10]": {"relativo": 9.0},  # Sin línea base: no se juzga
+    }}
+    assert comparar(actual, base, umbral=0.25) == [("mru/escalar[10]", 1.5)]
+
+
+def test_stub_postgrest_atiende_al_cliente_real() -> None:
+    """El cliente Supabase de verdad, por HTTP contra el stub, cubre las rutas de la prueba de carga."""
+    http = TestClient(crear_app())
+    repo = ExperimentRepository(create_client("http://testserver", "stub.stub.stub", options=ClientOptions(httpx_client=http)))
+
+    creado = repo.create_experiment_with_detail(ExperimentCreate(nombre="Carrito", tipo="MRU"), {"distancia": 6.0, "velocidad": 2.0, "tiempo": 3.0})
+    repo.create_experiments_bulk("MRU", ["Bola", "Rueda"], [{"distancia": 1.0, "velocidad": 1.0, "tiempo": 1.0}] * 2)
+
+    pagina = repo.get_page(2)
+    assert [e["id"] for e in pagina] == [3, 2]
+    assert [e["id"] for e in repo.get_page(2, after=(pagina[-1]["fecha_creacion"], pagina[-1]["id"]))] == [1]
+    assert repo.get_by_id(creado["id"])["detalle"]["distancia"] == 6.0
+    assert repo.delete(creado["id"]) and repo.get_by_id(creado["id"]) is None
@@ -1,14 +1,39 @@
-import pytest
+import io
+import time
 from unittest.mock import MagicMock
 
+import numpy as np
+import pytest
+
 from src.core.exceptions import (
-    ErrorDivisionPorCeroFisica,
     ErrorDiscriminanteNegativo,
+    ErrorDivisionPorCeroFisica,
     ErrorValorNegativo,
+    StorageError,
+    ValidationError,
 )
 from src.schemas.mru import MRUSchema
 from src.schemas.mrua import MRUASchema
+from src.schemas.uncertainty import IncertidumbreSchema
+from src.services.cache import LRUTTLCache, bytes_curvas
+from src.services.fitting import ajustar
+from src.services.live import AjusteIncremental
 from src.services.physics_service import PhysicsService
+from src.services.series import (
+    descomprimir_bloque,
+    ejecutar_lectura,
+    partir_en_bloques,
+    planificar_lectura,
+)
+from src.services.stats import EstadisticasExperimentos
+from src.services.uncertainty import (
+    cerrar_pool_montecarlo,
+    planificar_incertidumbre,
+    propagar,
+)
+from src.services.write_behind import WriteBehindQueue
+from src.storage.experiment_repository import ExperimentRepository
+from src.storage.fake_client import FakeSupabaseClient
 
 
 @pytest.fixture
@@ -109,4 +134,320 @@ def test_eliminar_experimento_inexistente(service_mock) -> None:
     """Verifica que el servicio retorne False si intentamos borrar un ID que no figura en la base de datos."""
     service_mock.repository.delete.return_value = False
     resultado = service_mock.remove_one(9999)
-    assert resultado is False
\ No newline at end of file
+    assert resultado is False
+
+# --- CACHÉ LRU + TTL ---
+
+def test_cache_desaloja_la_entrada_menos_usada() -> None:
+    """Al superar la capacidad se desaloja la entrada usada hace más tiempo."""
+    cache = LRUTTLCache(max_entradas=2, ttl=60)
+    cache.set(("detalle", 1), "a")
+    cache.set(("detalle", 2), "b")
+    cache.get(("detalle", 1))
+    cache.set(("detalle", 3), "c")
+    assert cache.get(("detalle", 2)) is None
+    assert cache.get(("detalle", 1)) == "a"
+    assert cache.estadisticas()["desalojos"] == 1
+
+
+def test_cache_expira_por_ttl(monkeypatch) -> None:
+    """Una entrada vencida cuenta como fallo y se descarta."""
+    cache = LRUTTLCache(max_entradas=10, ttl=5)
+    cache.set(("listado",), [])
+    ahora = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: ahora + 6)
+    assert cache.get(("listado",)) is None
+    assert cache.estadisticas()["expiraciones"] == 1
+
+
+def test_cache_de_trayectorias_respeta_el_presupuesto_de_bytes() -> None:
+    """Se desaloja por bytes, lo que no entra en el presupuesto no se guarda y lo cacheado es de solo lectura."""
+    cache = LRUTTLCache(16, 60, copiar=False, max_bytes=2000, tamano=bytes_curvas)
+    cache.set(("trayectoria", 1), {"t": np.zeros(100)})
+    cache.set(("trayectoria", 2), {"t": np.zeros(100)})
+    cache.set(("trayectoria", 3), {"t": np.zeros(250)})
+    assert cache.get(("trayectoria", 1)) is None and cache.get(("trayectoria", 2)) is None
+    assert cache.estadisticas()["bytes"] == 2000
+    cache.set(("trayectoria", 4), {"t": np.zeros(300)})
+    assert cache.get(("trayectoria", 4)) is None
+    assert cache.get(("trayectoria", 3)) is not None
+
+    repo = MagicMock()
+    repo.get_by_id.return_value = {"id": 1, "tipo": "MRU", "detalle": {"distancia": 10.0, "velocidad": 2.0, "tiempo": 5.0}}
+    service = PhysicsService(repo, cache=LRUTTLCache(16, 60), trayectorias=LRUTTLCache(16, 60, copiar=False))
+    curvas = service.get_trajectory(1, 50)
+    assert service.get_trajectory(1, 50) is curvas
+    with pytest.raises(ValueError):
+        curvas["x"][0] = 1.0
+
+
+def test_cache_entrega_copias_y_descarta_lecturas_previas_a_invalidar() -> None:
+    """Modificar un resultado no altera la caché; una lectura iniciada antes de invalidar no se guarda."""
+    repo = MagicMock()
+    repo.get_by_id.return_value = {"id": 1, "tipo": "MRU", "detalle": {"distancia": 5.0}}
+    service = PhysicsService(repo, cache=LRUTTLCache(max_entradas=16, ttl=60))
+    service.get_one(1)["detalle"]["distancia"] = -1.0
+    assert service.get_one(1)["detalle"]["distancia"] == 5.0
+    assert repo.get_by_id.call_count == 1
+
+    # Un alta invalida el listado mientras la lectura anterior seguía en vuelo
+    def listado_en_vuelo():
+        service._registrar_creacion("MRU", [{"distancia": 1.0}])
+        return [{"id": 1}]
+    repo.get_all.side_effect = listado_en_vuelo
+    service.list_all()
+    repo.get_all.side_effect = None
+    repo.get_all.return_value = [{"id": 2}, {"id": 1}]
+    assert service.list_all() == [{"id": 2}, {"id": 1}]
+
+
+# --- ESCRITURA DIFERIDA (WRITE-BEHIND) ---
+
+def test_rafaga_se_guarda_en_un_flush(tmp_path) -> None:
+    """30 cálculos encolados se guardan con una inserción multi-fila y cada ticket recibe su id."""
+    repo = ExperimentRepository(FakeSupabaseClient())
+    cola = WriteBehindQueue(repo, str(tmp_path / "cola.jsonl"), intervalo=60, max_filas=1000)
+    service = PhysicsService(repo, cache=LRUTTLCache(max_entradas=16, ttl=60), write_behind=cola)
+
+    tickets = [
+        service.resolver_y_guardar_mru(f"Alumno {i}", MRUSchema(velocidad=2.0, tiempo=float(i + 1)))["ticket"]
+        for i in range(30)
+    ]
+    assert service.estado_escritura(tickets[0])["estado"] == "pendiente"
+    assert repo.client.viajes == 0
+
+    cola.vaciar()
+    assert repo.client.viajes == 1  # Maestros y detalles en una sola llamada para toda la ráfaga
+    estados = [service.estado_escritura(t) for t in tickets]
+    assert all(e["estado"] == "guardado" for e in estados)
+    assert repo.get_by_id(estados[-1]["id"])["detalle"]["distancia"] == 60.0
+    cola.cerrar()
+    assert (tmp_path / "cola.jsonl").read_text() == ""
+
+
+def test_pendientes_sobreviven_a_una_caida(tmp_path) -> None:
+    """Lo encolado y no guardado se recupera del archivo de respaldo al reiniciar."""
+    ruta = str(tmp_path / "cola.jsonl")
+    caido = MagicMock()
+    caida = StorageError("create_experiments_bulk", "sin conexión")
+    caido.create_experiments_bulk.side_effect = caida
+    cola = WriteBehindQueue(caido, ruta, intervalo=60)
+    ticket = cola.encolar("MRU", "Carrito", {"distancia": 10.0, "velocidad": 2.0, "tiempo": 5.0})
+    cola.vaciar()
+    assert cola.estado(ticket) == {"ticket": ticket, "estado": "pendiente", "error": caida.message}
+
+    repo = ExperimentRepository(FakeSupabaseClient())
+    recuperada = WriteBehindQueue(repo, ruta, intervalo=60)
+    assert recuperada.pendientes() == 1
+    recuperada.vaciar()
+    assert repo.get_by_id(recuperada.estado(ticket)["id"])["nombre"] == "Carrito"
+    recuperada.cerrar()
+    cola.cerrar()
+
+
+# --- ESTADÍSTICAS INCREMENTALES ---
+
+def test_estadisticas_se_mantienen_sin_recorrer_la_tabla() -> None:
+    """/stats se carga una vez; crear y borrar actualizan los agregados sin volver a consultar la base."""
+    repo = ExperimentRepository(FakeSupabaseClient())
+    repo.create_experiments_bulk("MRU", [f"E{i}" for i in range(100)], [
+        {"distancia": float(i + 1), "velocidad": 1.0, "tiempo": float(i + 1)} for i in range(100)
+    ])
+    service = PhysicsService(repo, cache=LRUTTLCache(max_entradas=16, ttl=60), estadisticas=EstadisticasExperimentos())
+
+    stats = service.stats()
+    distancia = stats["campos"]["MRU"]["distancia"]
+    assert stats["total"] == 100 and stats["por_tipo"] == {"MRU": 100}
+    assert (distancia["media"], distancia["min"], distancia["max"]) == (50.5, 1.0, 100.0)
+    assert distancia["p50"] == pytest.approx(50.5, rel=0.02)
+    assert distancia["p90"] == pytest.approx(90.1, rel=0.02)
+
+    viajes = repo.client.viajes
+    creado = service.resolver_y_guardar_mru("Lejos", MRUSchema(velocidad=100.0, tiempo=10.0))
+    assert service.stats()["campos"]["MRU"]["distancia"]["max"] == 1000.0
+    service.remove_one(creado["id"])
+    stats = service.stats()
+    assert stats["total"] == 100 and stats["campos"]["MRU"]["distancia"]["max"] == 100.0
+    assert repo.client.viajes - viajes == 3  # Crear, leer el detalle a descontar y borrar
+
+
+def test_estadisticas_no_pierden_cambios_durante_la_carga(monkeypatch) -> None:
+    """Altas y bajas entre páginas del recorrido se reaplican sin contarse dos veces."""
+    repo = ExperimentRepository(FakeSupabaseClient())
+    ids = repo.create_experiments_bulk("MRU", [f"E{i}" for i in range(1500)], [
+        {"distancia": 1.0, "velocidad": 1.0, "tiempo": 1.0} for _ in range(1500)
+    ])
+    service = PhysicsService(repo, cache=LRUTTLCache(max_entradas=16, ttl=60), estadisticas=EstadisticasExperimentos())
+
+    get_page = repo.get_page
+    def pagina_con_cambios(**kwargs):
+        pagina = get_page(**kwargs)
+        if kwargs.get("after") is None:
+            # Tras la primera página: un alta, la baja de una fila ya recorrida y la de una por recorrer
+            service.resolver_y_guardar_mru("Nuevo", MRUSchema(velocidad=2.0, tiempo=5.0))
+            service.remove_one(ids[-1])
+            service.remove_one(ids[0])
+        return pagina
+    monkeypatch.setattr(repo, "get_page", pagina_con_cambios)
+
+    stats = service.stats()
+    assert stats["total"] == 1499
+    assert stats["campos"]["MRU"]["distancia"]["max"] == 10.0
+    assert stats["campos"]["MRU"]["distancia"]["n"] == 1499
+
+
+def test_importacion_columnar_valida_y_guarda_en_bloque(service_mock, monkeypatch) -> None:
+    """Las columnas del archivo se resuelven en bloque y solo las filas válidas se insertan."""
+    columnas = {
+        "distancia": np.array([np.nan, 10.0, 5.0]),
+        "velocidad": np.array([2.0, -1.0, np.nan]),
+        "tiempo": np.array([3.0, 1.0, 2.0]),
+    }
+    monkeypatch.setattr("src.services.physics_service.leer_tabla", lambda *_: (columnas, ["Carrito", None, "Bola"]))
+    service_mock.repository.create_experiments_bulk.return_value = [11, 12]
+
+    respuesta = service_mock.importar_tabla("MRU", "Importado", b"", "parquet")
+
+    nombres, filas = service_mock.repository.create_experiments_bulk.call_args.args[1:]
+    assert nombres == ["Carrito", "Bola"]
+    assert filas[0]["distancia"] == 6.0 and filas[1]["velocidad"] == 2.5
+    assert respuesta["ids"] == [11, None, 12] and 1 in respuesta["errores"]
+    assert "distancia" not in respuesta
+
+
+def test_parquet_ida_y_vuelta() -> None:
+    """Un Parquet exportado por páginas se puede volver a importar."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    service = PhysicsService(ExperimentRepository(FakeSupabaseClient()), cache=LRUTTLCache(max_entradas=16, ttl=60))
+    service.resolver_y_guardar_mrua("Rampa", MRUASchema(aceleracion=2.0, tiempo=3.0, velocidad_inicial=1.0))
+
+    contenido = b"".join(service.exportar("parquet"))
+    tabla = pq.read_table(io.BytesIO(contenido))
+    assert tabla.num_rows == 1 and tabla.column("posicion_final").to_pylist() == [12.0]
+
+    respuesta = service.importar_tabla("MRUA", "Copia", contenido, "parquet")
+    assert respuesta["guardados"] == 1
+
+
+# --- INCERTIDUMBRE MONTE CARLO ---
+
+def test_incertidumbre_mru_coincide_con_la_propagacion_lineal(service_mock) -> None:
+    """Para d = v·t con errores chicos, la desviación es la de la propagación de primer orden."""
+    incertidumbre = IncertidumbreSchema(desviaciones={"velocidad": 0.2, "tiempo": 0.1}, muestras=600_000, semilla=7)
+    respuesta = service_mock.propagar_incertidumbre("MRU", "Carrito", MRUSchema(velocidad=10.0, tiempo=5.0), incertidumbre)
+
+    distancia = respuesta["variables"]["distancia"]
+    sigma = np.hypot(5.0 * 0.2, 10.0 * 0.1)
+    assert respuesta["detalle"]["distancia"] == 50.0 and respuesta["validas"] == 600_000
+    assert distancia["media"] == pytest.approx(50.0, abs=0.02)
+    assert distancia["desviacion"] == pytest.approx(sigma, rel=0.01)
+    assert distancia["ic_inferior"] == pytest.approx(50.0 - 1.96 * sigma, rel=0.005)
+    assert distancia["ic_superior"] == pytest.approx(50.0 + 1.96 * sigma, rel=0.005)
+    service_mock.repository.create_experiment_with_uncertainty.assert_not_called()
+
+
+def test_incertidumbre_descarta_muestras_sin_solucion() -> None:
+    """Las velocidades muestreadas negativas se descartan y se cuentan, en vez de fallar."""
+    plan = planificar_incertidumbre("MRU", {"distancia": 100.0, "velocidad": 1.0}, {"velocidad": 0.5})
+    resultado = propagar(plan, 10_000, 0.9, semilla=1)
+    assert resultado["descartadas"]["valor_negativo"] == 10_000 - resultado["validas"] > 0
+    assert resultado["variables"]["tiempo"]["ic_inferior"] > 0
+
+    with pytest.raises(ValidationError):
+        planificar_incertidumbre("MRU", {"velocidad": 1.0, "tiempo": 2.0}, {"distancia": 0.1})
+
+
+def test_incertidumbre_igual_con_pool_de_procesos(monkeypatch) -> None:
+    """Cada bloque tiene su semilla: repartir en procesos no cambia el resultado."""
+    plan = planificar_incertidumbre(
+        "MRUA", {"posicion_inicial": 0.0, "posicion_final": 100.0, "aceleracion": 2.0, "velocidad_inicial": 1.0},
+        {"aceleracion": 0.1, "posicion_final": 1.0},
+    )
+    local = propagar(plan, 700_000, 0.95, semilla=3)
+    monkeypatch.setattr("src.services.uncertainty.settings.montecarlo_workers", 2)
+    try:
+        repartido = propagar(plan, 700_000, 0.95, semilla=3)
+    finally:
+        cerrar_pool_montecarlo()
+
+    assert repartido["validas"] == local["validas"]
+    for variable, resumen in local["variables"].items():
+        assert repartido["variables"][variable] == pytest.approx(resumen, rel=1e-9)
+
+
+# --- AJUSTE DE SERIES ---
+
+def test_ajuste_mrua_recupera_parametros_con_tiempos_absolutos(monkeypatch) -> None:
+    """Con marcas de tiempo grandes y varios bloques, el ajuste coincide con polyfit sobre t relativo."""
+    monkeypatch.setattr("src.services.fitting.PUNTOS_POR_BLOQUE", 10_000)
+    rng = np.random.default_rng(0)
+    t = 1.7e9 + np.sort(rng.uniform(0.0, 4.0, 45_000))
+    relativo = t - t.min()
+    x = 1.5 + 3.0 * relativo + 0.5 * 2.0 * relativo**2 + rng.normal(0.0, 0.01, len(t))
+
+    ajuste = ajustar("MRUA", t, x, con_residuos=True)
+
+    a2, v0, x0 = np.polyfit(relativo, x, 2)
+    assert ajuste.parametros == pytest.approx({"posicion_inicial": x0, "velocidad_inicial": v0, "aceleracion": 2 * a2}, rel=1e-6)
+    assert ajuste.errores["aceleracion"] < 1e-3 and ajuste.r2 > 0.9999
+    assert ajuste.rmse == pytest.approx(0.01, rel=0.05)
+    assert ajuste.residuos == pytest.approx(x - np.polyval([a2, v0, x0], relativo), abs=1e-9)
+    assert ajuste.detalle()["tiempo"] == pytest.approx(relativo.max())
+
+
+def test_ajuste_rechaza_series_degeneradas() -> None:
+    with pytest.raises(ValidationError):
+        ajustar("MRU", np.array([1.0, 2.0]), np.array([0.0, 1.0]))
+    with pytest.raises(ValidationError):
+        ajustar("MRUA", np.array([0.0, 0.0, 1.0, 1.0]), np.array([0.0, 0.0, 1.0, 1.0]))
+
+
+def test_ajuste_incremental_coincide_con_el_ajuste_completo() -> None:
+    """Las sumas acumuladas por lotes dan los mismos parámetros y errores que el ajuste de toda la serie."""
+    rng = np.random.default_rng(1)
+    t = 1.7e9 + np.sort(rng.uniform(0.0, 4.0, 20_000))
+    relativo = t - t[0]
+    x = 1.5 + 3.0 * relativo + relativo**2 + rng.normal(0.0, 0.01, len(t))
+
+    incremental = AjusteIncremental("MRUA")
+    assert incremental.ajuste() is None
+    for inicio in range(0, len(t), 777):
+        incremental.agregar(t[inicio:inicio + 777], x[inicio:inicio + 777])
+    en_vivo, completo = incremental.ajuste(), ajustar("MRUA", t, x)
+
+    assert en_vivo.puntos == len(t) and en_vivo.t_fin == pytest.approx(t[-1])
+    assert en_vivo.parametros == pytest.approx(completo.parametros, rel=1e-6)
+    assert en_vivo.errores == pytest.approx(completo.errores, rel=1e-6)
+    assert en_vivo.rmse == pytest.approx(completo.rmse, rel=1e-6)
+    # Dos instantes no determinan una parábola
+    dos_instantes = AjusteIncremental("MRUA")
+    dos_instantes.agregar(np.array([0.0, 0.0, 1.0, 1.0]), np.array([0.0, 0.1, 1.0, 1.1]))
+    assert dos_instantes.ajuste() is None
+
+
+# --- SERIES COMPRIMIDAS ---
+
+@pytest.mark.parametrize("precision", ["float32", "float64"])
+def test_bloques_de_serie_sin_perdida_y_comprimidos(precision) -> None:
+    """Tiempos absolutos equiespaciados y una señal suave vuelven bit a bit y ocupan mucho menos."""
+    t = 1.7e9 + np.arange(10_000) * 1e-3
+    x = np.cos(np.arange(10_000) / 700.0) * 2.5
+    bloques = partir_en_bloques(t, x, precision)
+
+    partes = [descomprimir_bloque(b, b["datos"]) for b in bloques]
+    assert np.array_equal(np.concatenate([p[0] for p in partes]), t)
+    assert np.array_equal(np.concatenate([p[1] for p in partes]), x.astype(precision))
+    assert [b["indice"] for b in bloques] == [0, 1, 2] and bloques[1]["t_inicio"] == t[4096]
+    crudos = t.nbytes + x.astype(precision).nbytes
+    assert sum(b["bytes"] for b in bloques) < crudos / 2
+
+
+def test_lectura_reducida_de_un_rango_sin_muestras_queda_vacia() -> None:
+    """Un rango que cae entre dos muestras del único bloque no arma envolvente: responde vacío."""
+    t = np.arange(4096, dtype=np.float64)
+    bloques = partir_en_bloques(t, t * 0.5, "float64")
+
+    plan = planificar_lectura(bloques, 10.2, 10.7, 2)
+    assert plan.reducida and plan.cargar == [0]
+    lectura = ejecutar_lectura(plan, {0: bloques[0]["datos"]})
+    assert len(lectura["t"]) == 0 and len(lectura["x"]) == 0
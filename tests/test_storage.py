@@ -0,0 +1,271 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.core.exceptions import StorageError, ValidationError
+from src.schemas.experiment import ExperimentCreate
+from src.services.cache import LRUTTLCache
+from src.services.physics_service import PhysicsService
+from src.storage import client as storage_client
+from src.storage.async_experiment_repository import AsyncExperimentRepository
+from src.storage.experiment_repository import ExperimentRepository
+from src.storage.factory import crear_repositorio
+from src.storage.fake_client import FakeAsyncSupabaseClient, FakeSupabaseClient
+from src.storage.sqlite_repository import (
+    SQLiteDatabase,
+    SQLiteExperimentRepository,
+    cerrar_sqlite_databases,
+)
+
+
+@pytest.fixture
+def cliente_limpio():
+    """Garantiza que cada prueba arranque y termine sin cliente compartido abierto."""
+    storage_client.cerrar_cliente()
+    yield
+    storage_client.cerrar_cliente()
+
+
+# --- CLIENTE COMPARTIDO Y POOL DE CONEXIONES ---
+
+def test_repositorios_comparten_cliente(cliente_limpio) -> None:
+    """Dos repositorios reutilizan el mismo cliente Supabase en lugar de crear uno cada uno."""
+    repo_a = ExperimentRepository()
+    repo_b = ExperimentRepository()
+    assert repo_a.client is repo_b.client is storage_client.get_client()
+
+
+def test_pool_usa_limites_de_settings(cliente_limpio) -> None:
+    """El pool HTTP se dimensiona con el tamaño y keep-alive configurados (HTTP/2 solo si se activa)."""
+    storage_client.abrir_cliente()
+    pool = storage_client._http._transport._pool
+    assert pool._max_connections == settings.supabase_pool_size
+    assert pool._keepalive_expiry == settings.supabase_keepalive_expiry
+    assert pool._http2 is settings.supabase_http2 is False
+
+
+def test_cerrar_cliente_permite_reabrir(cliente_limpio) -> None:
+    """Tras cerrar el cliente (fin del lifespan) el siguiente uso abre uno nuevo."""
+    primero = storage_client.abrir_cliente()
+    storage_client.cerrar_cliente()
+    assert storage_client.get_client() is not primero
+
+
+# --- CREACIÓN TRANSACCIONAL (RPC) ---
+
+@pytest.fixture
+def repo_falso() -> ExperimentRepository:
+    """Repositorio real sobre el cliente Supabase en memoria."""
+    return ExperimentRepository(FakeSupabaseClient())
+
+
+def test_creacion_con_detalle_en_un_viaje(repo_falso) -> None:
+    """La RPC crea maestro y detalle con un único viaje a la base de datos."""
+    exp = ExperimentCreate(nombre="Carrito", tipo="MRU")
+    creado = repo_falso.create_experiment_with_detail(exp, {"distancia": 50.0, "velocidad": 10.0, "tiempo": 5.0})
+
+    assert repo_falso.client.viajes == 1
+    assert creado["detalle"]["experimento_id"] == creado["id"]
+    assert repo_falso.get_by_id(creado["id"])["detalle"]["distancia"] == 50.0
+
+
+def test_creacion_con_detalle_es_atomica(repo_falso) -> None:
+    """Si falla el detalle, la RPC no deja un maestro huérfano."""
+    repo_falso.client.db.fallar_en.add("ensayos_mru")
+    exp = ExperimentCreate(nombre="Carrito", tipo="MRU")
+
+    with pytest.raises(StorageError):
+        repo_falso.create_experiment_with_detail(exp, {"distancia": 1.0, "velocidad": 1.0, "tiempo": 1.0})
+    assert repo_falso.get_all() == []
+
+
+def test_alta_en_bloque_es_atomica(repo_falso) -> None:
+    """Si falla el detalle de un bloque no queda ningún maestro suyo y el reintento no duplica."""
+    repo_falso.client.db.fallar_en.add("ensayos_mru")
+    with pytest.raises(StorageError):
+        repo_falso.create_experiments_bulk("MRU", ["A", "B"], [{"distancia": 1.0}, {"distancia": 2.0}])
+    assert repo_falso.get_all() == []
+
+    repo_falso.client.db.fallar_en.clear()
+    ids = repo_falso.create_experiments_bulk("MRU", ["A", "B"], [{"distancia": 1.0}, {"distancia": 2.0}])
+    assert sorted(e["nombre"] for e in repo_falso.get_many(ids)) == ["A", "B"] and len(repo_falso.get_all()) == 2
+
+
+def test_detalle_async_en_un_solo_select() -> None:
+    """El repositorio asíncrono trae maestro y detalle embebido en un viaje: cuesta una latencia, no dos."""
+    cliente = FakeAsyncSupabaseClient()
+    repo = AsyncExperimentRepository(cliente)
+    exp = ExperimentCreate(nombre="Rampa", tipo="MRUA")
+    creado = asyncio.run(repo.create_experiment_with_detail(exp, {"aceleracion": 2.0, "tiempo": 1.0}))
+
+    viajes = cliente.viajes
+    detalle = asyncio.run(repo.get_by_id(creado["id"]))
+    assert cliente.viajes - viajes == 1
+    assert detalle["detalle"]["aceleracion"] == 2.0
+    assert "ensayos_mrua" not in detalle
+
+
+def test_detalles_en_bloque_con_viajes_constantes(repo_falso) -> None:
+    """N experimentos de tipos mezclados se traen con sus detalles en un solo viaje."""
+    ids = repo_falso.create_experiments_bulk("MRU", ["A", "B", "C"], [{"distancia": float(i)} for i in range(3)])
+    ids += repo_falso.create_experiments_bulk("MRUA", ["D"], [{"aceleracion": 9.8}])
+    repo_falso.client.viajes = 0
+
+    detalles = {exp["id"]: exp for exp in repo_falso.get_many([*ids, 999])}
+    assert repo_falso.client.viajes == 1
+    assert set(detalles) == set(ids)
+    assert detalles[ids[2]]["detalle"]["distancia"] == 2.0
+    assert detalles[ids[3]]["detalle"]["aceleracion"] == 9.8
+
+
+@pytest.fixture(params=["supabase", "sqlite"])
+def repo_cualquiera(request, tmp_path):
+    if request.param == "supabase":
+        yield ExperimentRepository(FakeSupabaseClient())
+    else:
+        database = SQLiteDatabase(str(tmp_path / "physilab.db"))
+        yield SQLiteExperimentRepository(database)
+        database.cerrar()
+
+
+def test_incertidumbre_se_guarda_y_borra_con_el_experimento(repo_cualquiera) -> None:
+    """Detalle e incertidumbre se guardan juntos y el borrado del maestro alcanza a ambos."""
+    filas = [
+        {"variable": "distancia", "despejada": True, "media": 50.0, "desviacion": 1.4,
+         "ic_inferior": 47.2, "ic_superior": 52.8, "confianza": 0.95, "muestras": 1000},
+        {"variable": "velocidad", "despejada": False, "media": 10.0, "desviacion": 0.2,
+         "ic_inferior": None, "ic_superior": None, "confianza": None, "muestras": None},
+    ]
+    creado = repo_cualquiera.create_experiment_with_uncertainty(
+        ExperimentCreate(nombre="Carrito", tipo="MRU"), {"distancia": 50.0, "velocidad": 10.0, "tiempo": 5.0}, filas,
+    )
+
+    assert creado["detalle"]["distancia"] == 50.0
+    guardadas = repo_cualquiera.get_uncertainty(creado["id"])
+    assert [(f["variable"], f["despejada"], f["experimento_id"]) for f in guardadas] == [
+        ("distancia", True, creado["id"]), ("velocidad", False, creado["id"]),
+    ]
+    assert repo_cualquiera.delete(creado["id"]) is True
+    assert repo_cualquiera.get_uncertainty(creado["id"]) == []
+
+
+def test_serie_por_bloques_lee_rangos_y_resume_con_metadatos(repo_cualquiera, monkeypatch) -> None:
+    """La serie se agrega en partes, se lee por rango exacta y la vista reducida no descomprime bloques internos."""
+    monkeypatch.setattr("src.services.series.PUNTOS_POR_BLOQUE_SERIE", 100)
+    service = PhysicsService(repo_cualquiera, cache=LRUTTLCache(max_entradas=16, ttl=60))
+    exp_id = repo_cualquiera.create_experiments_bulk("MRU", ["Sensor"], [{}])[0]
+    t = np.arange(1000) * 0.01
+    x = np.sin(t * 3)
+    service.agregar_serie(exp_id, json.dumps({"t": t[:650].tolist(), "x": x[:650].tolist()}).encode(), "json")
+    info = service.agregar_serie(exp_id, json.dumps({"t": t[650:].tolist(), "x": x[650:].tolist()}).encode(), "json")
+    assert info["puntos"] == 1000 and info["bloques"] == 11
+    with pytest.raises(ValidationError):
+        service.agregar_serie(exp_id, json.dumps({"t": [5.0], "x": [0.0]}).encode(), "json")
+
+    rango = service.leer_serie_guardada(exp_id, 2.055, 6.5)
+    dentro = (t >= 2.055) & (t <= 6.5)
+    assert np.array_equal(rango["t"], t[dentro]) and np.array_equal(rango["x"], x[dentro])
+
+    pedidos = []
+    original = repo_cualquiera.get_series_data
+    monkeypatch.setattr(repo_cualquiera, "get_series_data", lambda i, indices: pedidos.append(indices) or original(i, indices))
+    reducida = service.leer_serie_guardada(exp_id, 0.5, None, max_puntos=40)
+    assert pedidos == [[0]]  # Solo el primer bloque, cortado por t0
+    assert len(reducida["t"]) <= 40 and np.all(np.diff(reducida["t"]) >= 0)
+    assert reducida["x"].max() == x[t >= 0.5].max() and reducida["x"].min() == x[t >= 0.5].min()
+
+    assert service.leer_serie_guardada(exp_id + 1) is None
+    assert repo_cualquiera.delete(exp_id) is True
+    assert repo_cualquiera.get_series_blocks(exp_id) == []
+
+
+# --- BACKEND LOCAL SQLITE ---
+
+@pytest.fixture
+def repo_sqlite(tmp_path) -> SQLiteExperimentRepository:
+    """Repositorio SQLite sobre un archivo temporal."""
+    database = SQLiteDatabase(str(tmp_path / "physilab.db"))
+    yield SQLiteExperimentRepository(database)
+    database.cerrar()
+
+
+def test_sqlite_crud_completo(repo_sqlite) -> None:
+    """SQLite cumple el mismo contrato que el repositorio de Supabase, incluido el borrado en cascada."""
+    creado = repo_sqlite.create_experiment_with_detail(
+        ExperimentCreate(nombre="Rampa", tipo="MRUA"),
+        {"posicion_inicial": 0.0, "posicion_final": 9.0, "aceleracion": 2.0,
+         "tiempo": 3.0, "velocidad_inicial": 0.0, "velocidad_final": 6.0},
+    )
+    ids = repo_sqlite.create_experiments_bulk("MRU", ["Lote #1", "Lote #2"], [
+        {"distancia": 10.0, "velocidad": 2.0, "tiempo": 5.0},
+        {"distancia": 8.0, "velocidad": 4.0, "tiempo": 2.0},
+    ])
+
+    assert [exp["id"] for exp in repo_sqlite.get_all()] == [creado["id"], *ids]
+    assert repo_sqlite.get_by_id(ids[1])["detalle"]["distancia"] == 8.0
+    assert [exp["detalle"]["tiempo"] for exp in sorted(repo_sqlite.get_many([*ids, creado["id"]]), key=lambda e: e["id"])] == [3.0, 5.0, 2.0]
+    assert repo_sqlite.delete(creado["id"]) is True
+    assert repo_sqlite.get_by_id(creado["id"]) is None
+    assert repo_sqlite.conn.execute("SELECT COUNT(*) FROM ensayos_mrua").fetchone()[0] == 0
+
+
+def test_sqlite_usa_wal_e_indices(repo_sqlite) -> None:
+    """La base queda en modo WAL y con índices sobre experimento_id y fecha_creacion."""
+    assert repo_sqlite.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = repo_sqlite.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM ensayos_mru WHERE experimento_id = 1"
+    ).fetchall()
+    assert "idx_ensayos_mru_experimento" in str([tuple(fila) for fila in plan])
+
+
+def test_backend_sqlite_desde_settings(monkeypatch, tmp_path) -> None:
+    """`storage_backend=sqlite` hace que el servicio use el repositorio local."""
+    monkeypatch.setattr(settings, "storage_backend", "sqlite")
+    monkeypatch.setattr(settings, "sqlite_path", str(tmp_path / "local.db"))
+    assert isinstance(crear_repositorio(), SQLiteExperimentRepository)
+    cerrar_sqlite_databases()
+
+
+# --- PAGINACIÓN KEYSET ---
+
+@pytest.fixture(params=["supabase", "sqlite"])
+def repo_paginado(request, tmp_path):
+    """El mismo contrato de paginación sobre el cliente Supabase falso y sobre SQLite."""
+    if request.param == "supabase":
+        yield ExperimentRepository(FakeSupabaseClient())
+        return
+    database = SQLiteDatabase(str(tmp_path / "paginas.db"))
+    yield SQLiteExperimentRepository(database)
+    database.cerrar()
+
+
+def test_paginacion_recorre_todo_sin_repetir(repo_paginado) -> None:
+    """Las páginas encadenadas por cursor cubren todas las filas una vez, de la más nueva a la más vieja."""
+    ids = repo_paginado.create_experiments_bulk("MRU", [f"Ensayo {i}" for i in range(25)], [{} for _ in range(25)])
+    ids += repo_paginado.create_experiments_bulk("MRUA", ["Rampa 1", "Rampa 2"], [{}, {}])
+    service = PhysicsService(repo_paginado, cache=LRUTTLCache(max_entradas=16, ttl=60))
+
+    vistos, cursor = [], None
+    while True:
+        filas, cursor = service.list_page(limit=10, cursor=cursor, fields="nombre")
+        assert all(set(fila) == {"id", "nombre", "fecha_creacion"} for fila in filas)
+        vistos += [fila["id"] for fila in filas]
+        if cursor is None:
+            break
+
+    assert vistos == sorted(ids, reverse=True)
+    filas, _ = service.list_page(tipo="MRUA", hasta=datetime.now(timezone.utc) + timedelta(days=1))
+    assert [fila["nombre"] for fila in filas] == ["Rampa 2", "Rampa 1"]
+    assert service.list_page(desde=datetime.now(timezone.utc) + timedelta(days=1)) == ([], None)
+
+
+def test_paginacion_rechaza_cursor_y_campos_invalidos(repo_falso) -> None:
+    service = PhysicsService(repo_falso, cache=LRUTTLCache(max_entradas=16, ttl=60))
+    with pytest.raises(ValidationError):
+        service.list_page(cursor="no-es-un-cursor")
+    with pytest.raises(ValidationError):
+        service.list_page(fields="nombre,clave_secreta")